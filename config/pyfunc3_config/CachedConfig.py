@@ -0,0 +1,146 @@
+"""
+Cached access to a JSON config file that reloads when the file changes.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from .get_config import get_config_path
+
+
+_MISSING = object()
+
+
+class CachedConfig:
+    """
+    A JSON config file that is read once and served from memory.
+
+    The file is read again only when its modification time or size changes,
+    or after invalidate(). Lookups accept dotted keys for nested values, e.g.
+    "emails.0.server". One instance can be shared by many threads.
+
+    Values are returned without copying, so they must not be modified.
+    """
+
+    def __init__(self, folder="/.cfo/", check_interval=1.0):
+        """
+        Initialize the CachedConfig. The file is read on first use.
+
+        Args:
+            folder (str): Path to the folder containing the config file
+            check_interval (float): Seconds between checks of the file for changes
+                                    (0 to check on every lookup)
+        """
+        self.path = get_config_path(folder)
+        self.check_interval = check_interval
+        self._config = None
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.RLock()
+
+    def _file_signature(self):
+        """Get (mtime, size) of the config file, or None if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """Reload the file if it changed since it was last read."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        signature = self._file_signature()
+        if signature == self._signature and self._config is not None:
+            return
+        if signature is None:
+            if self._signature is not None or self._config is None:
+                logging.error(f"Config file not found: {self.path}")
+            self._config = None
+            self._signature = None
+            return
+        try:
+            with open(self.path, 'r') as f:
+                config = json.load(f)
+        except Exception as e:
+            # Keep serving the last good config while the file is being edited
+            logging.error(f"Error reading config: {e}")
+            return
+        self._config = config
+        self._signature = signature
+        logging.debug(f"Loaded config from {self.path}")
+
+    def invalidate(self):
+        """
+        Read the file again on the next lookup.
+        """
+        with self._lock:
+            self._signature = None
+            self._checked_at = None
+            self._config = None
+
+    def get(self, key=None, default=None):
+        """
+        Get a configuration value.
+
+        Args:
+            key (str, optional): Key to retrieve, dotted for nested values
+                                 (list items by index, e.g. "emails.0.server")
+            default (Any): Value to return if the key or the file does not exist
+
+        Returns:
+            Any: The configuration value, or the entire config if no key is specified
+        """
+        with self._lock:
+            self._load()
+            value = self._config
+        if value is None:
+            return default
+        if not key:
+            return value
+
+        for part in key.split('.'):
+            if isinstance(value, dict):
+                value = value.get(part, _MISSING)
+            elif isinstance(value, list) and part.lstrip('-').isdigit() and -len(value) <= int(part) < len(value):
+                value = value[int(part)]
+            else:
+                value = _MISSING
+            if value is _MISSING:
+                return default
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_cached_config(folder="/.cfo/"):
+    """
+    Get the shared CachedConfig of a config folder.
+
+    Args:
+        folder (str): Path to the folder containing the config file
+
+    Returns:
+        CachedConfig: The same instance for every call with the same folder
+    """
+    path = get_config_path(folder)
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = CachedConfig(folder)
+        return _instances[path]
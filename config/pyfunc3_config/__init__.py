@@ -2,7 +2,10 @@
 Configuration utilities for the month project.
 """
 
-from .get_config import get_config
+from .get_config import get_config, get_config_path
 from .get_email_path import get_email_path
+from .CachedConfig import CachedConfig, get_cached_config
+from .metrics import Metrics, get_metrics
 
-__all__ = ["get_config", "get_email_path"]
+__all__ = ["get_config", "get_config_path", "get_email_path", "CachedConfig", "get_cached_config",
+           "Metrics", "get_metrics"]
@@ -8,6 +8,29 @@ import logging
 from pathlib import Path
 
 
+def get_config_path(folder="/.cfo/"):
+    """
+    Get the path of the config file in a config folder.
+    
+    Args:
+        folder (str): Path to the folder containing the config file, absolute,
+                      starting with ~ or relative to the home directory
+        
+    Returns:
+        str: Path of config.json
+    """
+    # Expand user home directory if needed
+    if folder.startswith("~"):
+        folder = os.path.expanduser(folder)
+    
+    # Handle absolute paths that start with /
+    if folder.startswith("/"):
+        return os.path.join(folder, "config.json")
+    # Handle relative paths
+    home_dir = str(Path.home())
+    return os.path.join(home_dir, folder, "config.json")
+
+
 def get_config(folder="/.cfo/", key=None):
     """
     Get configuration values from a JSON config file.
@@ -20,17 +43,7 @@ def get_config(folder="/.cfo/", key=None):
         Any: The configuration value for the specified key, or the entire config if no key is specified
     """
     try:
-        # Expand user home directory if needed
-        if folder.startswith("~"):
-            folder = os.path.expanduser(folder)
-        
-        # Handle absolute paths that start with /
-        if folder.startswith("/"):
-            config_path = os.path.join(folder, "config.json")
-        else:
-            # Handle relative paths
-            home_dir = str(Path.home())
-            config_path = os.path.join(home_dir, folder, "config.json")
+        config_path = get_config_path(folder)
         
         # Check if config file exists
         if not os.path.exists(config_path):
@@ -0,0 +1,264 @@
+"""
+Counters and timing histograms for finding where a run spends its time.
+
+pyfunc3_email and pyfunc3_ocr record into the registry of this module, so a
+process using both has one set of metrics.
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+# Upper bounds in seconds of the histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    """Turn keyword labels into a hashable, sorted key."""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _prometheus_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and timing histograms.
+
+    Counters and histograms are identified by a name and optional labels,
+    e.g. metrics.inc("messages_total", status="saved"). Hooks are called for
+    every recorded value, e.g. to forward them to a monitoring system.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the Metrics.
+
+        Args:
+            buckets (tuple): Upper bounds in seconds of the histogram buckets
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """
+        Call a function for every recorded value.
+
+        Args:
+            hook (callable): Called as hook(kind, name, value, labels) with kind
+                             "counter" or "histogram"; exceptions are ignored
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Stop calling a hook added with add_hook.
+
+        Args:
+            hook (callable): The hook
+        """
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def _notify(self, kind, name, value, labels):
+        for hook in self._hooks:
+            try:
+                hook(kind, name, value, labels)
+            except Exception:
+                pass
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Counter name, e.g. "messages_total"
+            value (float): Amount to add
+            **labels: Labels of the counter, e.g. status="saved"
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self._hooks:
+            self._notify('counter', name, value, labels)
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record a duration in a histogram.
+
+        Args:
+            name (str): Histogram name, e.g. "imap_fetch_seconds"
+            seconds (float): Duration
+            **labels: Labels of the histogram
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'count': 0, 'sum': 0.0, 'min': seconds, 'max': seconds,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                }
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+            histogram['min'] = min(histogram['min'], seconds)
+            histogram['max'] = max(histogram['max'], seconds)
+            histogram['buckets'][bisect.bisect_left(self.buckets, seconds)] += 1
+        if self._hooks:
+            self._notify('histogram', name, seconds, labels)
+
+    @contextmanager
+    def time(self, name, **labels):
+        """
+        Time a block of code into a histogram: with metrics.time("parse_seconds"): ...
+
+        Args:
+            name (str): Histogram name
+            **labels: Labels of the histogram
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """
+        Get a copy of all values.
+
+        Returns:
+            dict: {"counters": [...], "histograms": [...], "buckets": [...]}, each
+                  counter and histogram a dict with name, labels and its values
+        """
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(key), 'value': value}
+                for (name, key), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                dict(name=name, labels=dict(key), count=histogram['count'], sum=histogram['sum'],
+                     min=histogram['min'], max=histogram['max'], buckets=list(histogram['buckets']))
+                for (name, key), histogram in sorted(self._histograms.items())
+            ]
+        return {'counters': counters, 'histograms': histograms, 'buckets': list(self.buckets)}
+
+    def merge(self, snapshot):
+        """
+        Add the values of a snapshot, e.g. one taken in a worker process.
+
+        Args:
+            snapshot (dict): Result of snapshot() with the same buckets
+        """
+        with self._lock:
+            for counter in snapshot['counters']:
+                key = (counter['name'], _label_key(counter['labels']))
+                self._counters[key] = self._counters.get(key, 0) + counter['value']
+            for other in snapshot['histograms']:
+                key = (other['name'], _label_key(other['labels']))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    self._histograms[key] = dict(count=other['count'], sum=other['sum'], min=other['min'],
+                                                 max=other['max'], buckets=list(other['buckets']))
+                    continue
+                histogram['count'] += other['count']
+                histogram['sum'] += other['sum']
+                histogram['min'] = min(histogram['min'], other['min'])
+                histogram['max'] = max(histogram['max'], other['max'])
+                histogram['buckets'] = [a + b for a, b in zip(histogram['buckets'], other['buckets'])]
+
+    def reset(self):
+        """
+        Remove all values; hooks are kept.
+        """
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def to_json(self):
+        """
+        Get all values as JSON.
+
+        Returns:
+            str: The snapshot as JSON
+        """
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="pyfunc3_"):
+        """
+        Get all values in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of every metric name
+
+        Returns:
+            str: Counters as counters, histograms with cumulative _bucket, _sum and _count
+        """
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for counter in snapshot['counters']:
+            name = prefix + counter['name']
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_prometheus_labels(_label_key(counter['labels']))} {counter['value']}")
+        bounds = [str(bound) for bound in snapshot['buckets']] + ["+Inf"]
+        for histogram in snapshot['histograms']:
+            name = prefix + histogram['name']
+            key = _label_key(histogram['labels'])
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(bounds, histogram['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_prometheus_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_prometheus_labels(key)} {histogram['sum']}")
+            lines.append(f"{name}_count{_prometheus_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, format=None):
+        """
+        Write all values to a file atomically.
+
+        Args:
+            path (str): File to write
+            format (str, optional): "json" or "prometheus". Defaults to "prometheus" for
+                                    .prom and .txt files and "json" otherwise.
+
+        Returns:
+            str: path
+        """
+        if format is None:
+            format = 'prometheus' if path.endswith(('.prom', '.txt')) else 'json'
+        text = self.to_prometheus() if format == 'prometheus' else self.to_json()
+        temp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        return path
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """
+    Get the process-wide Metrics that the pyfunc3 packages record into.
+
+    Returns:
+        Metrics: The shared registry
+    """
+    return _metrics
@@ -0,0 +1,204 @@
+"""
+AttachmentStore class for storing attachments by content hash.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import datetime
+
+
+class AttachmentStore:
+    """
+    Content-addressed attachment storage with a manifest of original names.
+
+    Each distinct content is written once as blobs/<ab>/<sha256><ext>, so the
+    same invoice forwarded several times takes the space of one file, and two
+    different files with the same name no longer overwrite each other. Every
+    saved attachment is recorded in manifest.jsonl with its original file name
+    and the message it came from. Since blobs are named by SHA-256, the same
+    key can be used to skip content that was already processed downstream.
+    """
+
+    def __init__(self, root):
+        """
+        Initialize the AttachmentStore and read its manifest.
+
+        Args:
+            root (str): Directory of the store
+        """
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self._recorded = set()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        for entry in self.entries():
+            self._recorded.add((entry.get('sha256'), entry.get('filename'), entry.get('message')))
+
+    @staticmethod
+    def _extension(filename):
+        """Get the lower-case extension of a file name, limited to safe characters."""
+        extension = os.path.splitext(filename or "")[1].lower()
+        if len(extension) > 10 or not all(c.isalnum() for c in extension[1:]):
+            return ""
+        return extension
+
+    def blob_path(self, sha256, filename=None):
+        """
+        Get the path of the blob for a content hash.
+
+        Args:
+            sha256 (str): Hex SHA-256 of the content
+            filename (str, optional): Original file name, whose extension the blob keeps
+
+        Returns:
+            str: Path of the blob
+        """
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}{self._extension(filename)}")
+
+    def has(self, sha256, filename=None):
+        """
+        Check whether the store has a blob.
+
+        Args:
+            sha256 (str): Hex SHA-256 of the content
+            filename (str, optional): Original file name
+
+        Returns:
+            bool: True if the blob exists
+        """
+        return os.path.exists(self.blob_path(sha256, filename))
+
+    def temp_path(self):
+        """
+        Get a path for writing a file that will be added with put_file.
+
+        Returns:
+            str: Unused path inside the store
+        """
+        return os.path.join(self.root, f".incoming-{uuid.uuid4().hex}")
+
+    def put_bytes(self, data, filename, **info):
+        """
+        Store an attachment from memory.
+
+        Args:
+            data (bytes): Decoded attachment
+            filename (str): Original file name
+            **info: Extra manifest fields, e.g. message and subject
+
+        Returns:
+            dict: The manifest entry, with "stored" False if the blob already existed
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256, filename)
+        stored = False
+        if not os.path.exists(path):
+            temp_path = self.temp_path()
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            stored = self._commit(temp_path, path)
+        return self._record(sha256, len(data), path, filename, stored, info)
+
+    def put_file(self, temp_path, filename, **info):
+        """
+        Store an attachment that was written to a file, e.g. by stream_part_to_file.
+
+        The file is moved into the store, or deleted if the content is already there.
+
+        Args:
+            temp_path (str): Path of the file, ideally from temp_path()
+            filename (str): Original file name
+            **info: Extra manifest fields, e.g. message and subject
+
+        Returns:
+            dict: The manifest entry, with "stored" False if the blob already existed
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(temp_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+                size += len(block)
+        sha256 = digest.hexdigest()
+        path = self.blob_path(sha256, filename)
+        stored = False
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            stored = self._commit(temp_path, path)
+        return self._record(sha256, size, path, filename, stored, info)
+
+    def _commit(self, temp_path, path):
+        """Move a finished file to its blob path."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # Different file system, e.g. a temp file from elsewhere
+            shutil.move(temp_path, path)
+        return True
+
+    def _record(self, sha256, size, path, filename, stored, info):
+        """Append an entry to the manifest unless the same name was recorded for this content."""
+        entry = {
+            'sha256': sha256,
+            'size': size,
+            'blob': os.path.relpath(path, self.root),
+            'filename': filename,
+        }
+        entry.update(info)
+        key = (sha256, filename, entry.get('message'))
+        if key not in self._recorded:
+            entry['saved_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+            try:
+                with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._recorded.add(key)
+            except OSError as e:
+                logging.error(f"Error writing manifest {self.manifest_path}: {e}")
+        entry['stored'] = stored
+        return entry
+
+    def entries(self):
+        """
+        Read all manifest entries.
+
+        Returns:
+            list: Manifest entries as dicts, in the order they were saved
+        """
+        entries = []
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        logging.error(f"Skipping invalid manifest line in {self.manifest_path}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def find(self, filename):
+        """
+        Find the blobs stored under an original file name.
+
+        Args:
+            filename (str): Original file name
+
+        Returns:
+            list: Paths of the matching blobs, without duplicates
+        """
+        paths = []
+        for entry in self.entries():
+            if entry.get('filename') == filename:
+                path = os.path.join(self.root, entry['blob'])
+                if path not in paths:
+                    paths.append(path)
+        return paths
@@ -0,0 +1,157 @@
+"""
+A crash-safe journal of the messages downloaded to a local path.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import datetime
+import threading
+
+
+JOURNAL_FILE = ".download_journal.jsonl"
+
+
+class DownloadJournal:
+    """
+    Append-only record of every completed message of a remote folder.
+
+    Each completed message is one JSON line with its UID, target file, size and
+    SHA-256, written with a single append and flushed to disk, so a crash can
+    at most lose the line being written. A later run with the same folder and
+    UIDVALIDITY skips the UIDs in the journal whose file still has the recorded
+    size and checksum.
+    """
+
+    def __init__(self, local_path, remote_folder, uidvalidity, filename=JOURNAL_FILE, fsync=True):
+        """
+        Initialize the DownloadJournal and load the completed UIDs.
+
+        Args:
+            local_path (str): Local path the emails are saved to
+            remote_folder (str): Remote folder the UIDs belong to
+            uidvalidity (int): Current UIDVALIDITY of the folder
+            filename (str): Name of the journal file in local_path
+            fsync (bool): Flush every entry to disk before continuing
+        """
+        self.local_path = local_path
+        self.path = os.path.join(local_path, filename)
+        self.remote_folder = remote_folder
+        self.uidvalidity = uidvalidity
+        self.fsync = fsync
+        self.completed = set()
+        self._file = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def _is_complete(self, entry):
+        """Check that the file of an entry still exists with the recorded size and SHA-256."""
+        if entry.get('skipped'):
+            # Downloaded but deliberately not saved, e.g. outside the date filter
+            return True
+        if entry.get('file') is None:
+            return False
+        filepath = os.path.join(self.local_path, entry['file'])
+        try:
+            if os.path.getsize(filepath) != entry.get('size'):
+                return False
+            if entry.get('sha256') is None:
+                return True
+            digest = hashlib.sha256()
+            with open(filepath, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            return digest.hexdigest() == entry['sha256']
+        except OSError:
+            return False
+
+    def load(self):
+        """
+        Read the completed UIDs of this folder and UIDVALIDITY from the journal.
+        """
+        self.completed = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    if (entry.get('folder') == self.remote_folder
+                            and entry.get('uidvalidity') == self.uidvalidity
+                            and self._is_complete(entry)):
+                        self.completed.add(entry['uid'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Error reading download journal {self.path}: {e}")
+
+    def pending(self, uids):
+        """
+        Leave out the UIDs that were completed before.
+
+        Args:
+            uids (list): UIDs to download
+
+        Returns:
+            list: UIDs not in the journal, in the given order
+        """
+        return [uid for uid in uids if uid not in self.completed]
+
+    def record(self, uid, filepath=None, data=None, skipped=False):
+        """
+        Append a completed message to the journal.
+
+        Args:
+            uid (int): UID of the message
+            filepath (str, optional): Path of the saved file
+            data (bytes, optional): Content of the saved file, for its size and checksum
+            skipped (bool): The message was deliberately not saved, e.g. outside the
+                            date filter, and needs no retry
+
+        Returns:
+            bool: True if the entry was written, False otherwise
+        """
+        entry = {
+            'folder': self.remote_folder,
+            'uidvalidity': self.uidvalidity,
+            'uid': uid,
+            'file': os.path.relpath(filepath, self.local_path) if filepath else None,
+            'size': len(data) if filepath and data is not None else None,
+            'sha256': hashlib.sha256(data).hexdigest() if filepath and data is not None else None,
+            'completed_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        if skipped:
+            entry['skipped'] = True
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(self.local_path, exist_ok=True)
+                    self._file = open(self.path, 'ab', buffering=0)
+                # One write per line on an append-only file
+                self._file.write(line)
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self.completed.add(uid)
+                return True
+            except OSError as e:
+                logging.error(f"Error writing download journal {self.path}: {e}")
+                return False
+
+    def close(self):
+        """
+        Close the journal file.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,285 @@
+"""
+A reusable IMAP connection for several operations on one account.
+"""
+
+import time
+import select
+import imaplib
+import logging
+import threading
+from .connect import connect
+
+
+class IMAPSession:
+    """
+    One logged-in IMAP connection that is reused across folder operations.
+
+    The connection is opened on first use. A connection that was unused for
+    longer than keepalive seconds is checked with NOOP before it is handed out,
+    and reopened (and logged in again) if the server dropped it. A background
+    thread can keep it alive between operations (see start_keepalive).
+
+    All use of the connection must hold the session's lock; the methods of
+    the session and the download functions given a session do this.
+    """
+
+    def __init__(self, server, username, password, port=None, use_ssl=True, keepalive=300, reconnect_attempts=3):
+        """
+        Initialize the IMAPSession.
+
+        Args:
+            server (str): IMAP server address
+            username (str): Email username
+            password (str): Email password
+            port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+            use_ssl (bool): Connect over SSL/TLS
+            keepalive (float): Seconds a connection may be unused before it is checked with NOOP
+            reconnect_attempts (int): Number of connection attempts when (re)connecting
+        """
+        self.server = server
+        self.username = username
+        self.password = password
+        self.port = port
+        self.use_ssl = use_ssl
+        self.keepalive = keepalive
+        self.reconnect_attempts = reconnect_attempts
+        self.lock = threading.RLock()
+        self.reconnects = 0
+        self._mail = None
+        self._last_used = 0.0
+        self._keepalive_stop = None
+        self._keepalive_thread = None
+
+    def _open(self):
+        """Connect and log in, retrying with a short backoff."""
+        for attempt in range(1, self.reconnect_attempts + 1):
+            mail = connect(self.server, self.username, self.password, port=self.port, use_ssl=self.use_ssl)
+            if mail:
+                return mail
+            if attempt < self.reconnect_attempts:
+                time.sleep(min(2 ** (attempt - 1), 30))
+        return None
+
+    def _drop(self):
+        """Forget the current connection without talking to the server."""
+        if self._mail is not None:
+            try:
+                self._mail.shutdown()
+            except Exception:
+                pass
+        self._mail = None
+
+    def is_alive(self):
+        """
+        Check the connection with NOOP.
+
+        Returns:
+            bool: True if the server answered
+        """
+        with self.lock:
+            if self._mail is None:
+                return False
+            try:
+                status, _ = self._mail.noop()
+            except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError) as e:
+                logging.warning(f"Connection to {self.server} lost: {e}")
+                return False
+            self._last_used = time.monotonic()
+            return status == 'OK'
+
+    def connection(self):
+        """
+        Get the logged-in connection, reconnecting if it was dropped.
+
+        Returns:
+            imaplib.IMAP4: The connection, or None if the server cannot be reached
+        """
+        with self.lock:
+            if self._mail is not None and time.monotonic() - self._last_used > self.keepalive:
+                if not self.is_alive():
+                    self._drop()
+                    self.reconnects += 1
+                    logging.info(f"Reconnecting to {self.server} as {self.username}")
+            if self._mail is None:
+                self._mail = self._open()
+            self._last_used = time.monotonic()
+            return self._mail
+
+    def run(self, operation, *args, **kwargs):
+        """
+        Run an operation on the connection, once more after a reconnect if the connection dropped.
+
+        Args:
+            operation (callable): Called as operation(mail, *args, **kwargs)
+
+        Returns:
+            Any: Result of the operation, or None if the server cannot be reached
+        """
+        with self.lock:
+            for attempt in range(2):
+                mail = self.connection()
+                if mail is None:
+                    return None
+                try:
+                    return operation(mail, *args, **kwargs)
+                except (imaplib.IMAP4.abort, OSError) as e:
+                    if attempt:
+                        raise
+                    logging.warning(f"Connection to {self.server} dropped ({e}), reconnecting")
+                    self._drop()
+                    self.reconnects += 1
+
+    def download_emails(self, local_path, remote_folder, **kwargs):
+        """
+        Download emails over this session (see download_emails).
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        from .download_emails import download_emails
+        return self._download(download_emails, local_path, remote_folder, **kwargs)
+
+    def download_all_attachments_in_inbox(self, local_path, remote_folder, **kwargs):
+        """
+        Download attachments over this session (see download_all_attachments_in_inbox).
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        from .download_all_attachments_in_inbox import download_all_attachments_in_inbox
+        return self._download(download_all_attachments_in_inbox, local_path, remote_folder, **kwargs)
+
+    def _download(self, function, local_path, remote_folder, **kwargs):
+        """Run a download function on the session, once more if the connection dropped during it."""
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    return function(self.server, self.username, self.password, local_path, remote_folder,
+                                    port=self.port, use_ssl=self.use_ssl, session=self, **kwargs)
+                except (imaplib.IMAP4.abort, OSError) as e:
+                    self._drop()
+                    if attempt:
+                        logging.error(f"Connection to {self.server} dropped again during download: {e}")
+                        return False
+                    logging.warning(f"Connection to {self.server} dropped during download ({e}), retrying")
+                    self.reconnects += 1
+
+    def idle(self, remote_folder='INBOX', timeout=29 * 60):
+        """
+        Wait with IMAP IDLE (RFC 2177) until the server reports changes in a folder.
+
+        Args:
+            remote_folder (str): Folder to watch
+            timeout (float): Seconds to wait at most; servers end IDLE after 30 minutes
+
+        Returns:
+            list: Untagged responses received, e.g. [b"12 EXISTS"], empty on timeout,
+                  or None if the server does not support IDLE
+        """
+        with self.lock:
+            mail = self.connection()
+            if mail is None:
+                return None
+            if 'IDLE' not in mail.capabilities:
+                logging.error(f"{self.server} does not support IDLE")
+                return None
+            status, data = mail.select(remote_folder, readonly=True)
+            if status != 'OK':
+                logging.error(f"Error selecting folder {remote_folder}: {data}")
+                return None
+
+            tag = mail._new_tag()
+            mail.send(tag + b" IDLE\r\n")
+            line = mail.readline()
+            if not line.startswith(b"+"):
+                logging.error(f"Server refused IDLE: {line!r}")
+                return None
+
+            responses = []
+            deadline = time.monotonic() + timeout
+            while not responses:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # TLS may hold decrypted data the socket no longer signals
+                pending = getattr(mail.sock, 'pending', lambda: 0)()
+                if not pending and not select.select([mail.sock], [], [], min(remaining, 60))[0]:
+                    continue
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                if line.startswith(b"* "):
+                    responses.append(line[2:].rstrip(b"\r\n"))
+
+            mail.send(b"DONE\r\n")
+            # Collect what arrived before the server ended IDLE
+            while True:
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                if line.startswith(tag):
+                    break
+                if line.startswith(b"* "):
+                    responses.append(line[2:].rstrip(b"\r\n"))
+            mail.close()
+            self._last_used = time.monotonic()
+            return responses
+
+    def start_keepalive(self, interval=None):
+        """
+        Send NOOP from a background thread while the session is not in use.
+
+        Args:
+            interval (float, optional): Seconds between checks. Defaults to keepalive.
+        """
+        if self._keepalive_thread is not None:
+            return
+        interval = interval or self.keepalive
+        self._keepalive_stop = threading.Event()
+
+        def keep_alive(stop):
+            while not stop.wait(interval):
+                # Skip the round if an operation is using the connection
+                if not self.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if self._mail is not None and time.monotonic() - self._last_used >= interval:
+                        if not self.is_alive():
+                            self._drop()
+                finally:
+                    self.lock.release()
+
+        self._keepalive_thread = threading.Thread(target=keep_alive, args=(self._keepalive_stop,),
+                                                  name=f"imap-keepalive-{self.server}", daemon=True)
+        self._keepalive_thread.start()
+
+    def stop_keepalive(self):
+        """
+        Stop the keep-alive thread.
+        """
+        if self._keepalive_thread is None:
+            return
+        self._keepalive_stop.set()
+        self._keepalive_thread.join()
+        self._keepalive_thread = None
+
+    def close(self):
+        """
+        Stop the keep-alive thread and log out.
+        """
+        self.stop_keepalive()
+        with self.lock:
+            if self._mail is None:
+                return
+            try:
+                self._mail.logout()
+                logging.info(f"Closed connection to {self.server}")
+            except Exception as e:
+                logging.error(f"Error closing connection: {e}")
+            self._mail = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -5,5 +5,30 @@ Email handling utilities for the month project.
 from .connect import connect
 from .download_emails import download_emails
 from .download_all_attachments_in_inbox import download_all_attachments_in_inbox
+from .fetch_messages import fetch_messages, fetch_messages_async, parse_fetch_response
+from .search_messages import search_messages_by_date
+from .sync_state import SyncState
+from .plan_downloads import plan_downloads, fetch_headers
+from .bodystructure import MessagePart, parse_bodystructure, find_attachment_parts
+from .stream_part_to_file import stream_part_to_file, PartDecoder
+from .AttachmentStore import AttachmentStore
+from .DownloadJournal import DownloadJournal
+from .write_file_atomic import write_file_atomic
+from .download_emails_parallel import download_emails_parallel, ProgressCounter
+from .IMAPSession import IMAPSession
+from .metrics import Metrics, get_metrics
+from .reporters import ProgressReporter, QuietReporter, PeriodicReporter, LogReporter, JSONReporter
+from .sync_accounts import sync_accounts, load_accounts
+from .connect_async import connect_async, AsyncIMAPClient, ServerLimiter
+from .download_emails_async import download_emails_async
+from .download_all_attachments_in_inbox_async import download_all_attachments_in_inbox_async
 
-__all__ = ["connect", "download_emails", "download_all_attachments_in_inbox"]
+__all__ = ["connect", "IMAPSession", "download_emails", "download_all_attachments_in_inbox",
+           "download_emails_parallel", "ProgressCounter",
+           "ProgressReporter", "QuietReporter", "PeriodicReporter", "LogReporter", "JSONReporter", "Metrics", "get_metrics", "sync_accounts", "load_accounts",
+           "fetch_messages", "parse_fetch_response", "search_messages_by_date", "SyncState",
+           "plan_downloads", "fetch_headers",
+           "MessagePart", "parse_bodystructure", "find_attachment_parts",
+           "stream_part_to_file", "PartDecoder", "AttachmentStore", "DownloadJournal", "write_file_atomic",
+           "connect_async", "AsyncIMAPClient", "ServerLimiter", "fetch_messages_async",
+           "download_emails_async", "download_all_attachments_in_inbox_async"]
@@ -0,0 +1,254 @@
+"""
+Functions for finding attachments from a message's BODYSTRUCTURE without downloading it.
+"""
+
+import base64
+import binascii
+import quopri
+import logging
+import urllib.parse
+from email.header import decode_header
+
+
+_BASE64_ALPHABET = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")
+
+
+class MessagePart:
+    """
+    One non-multipart part of a message, as described by BODYSTRUCTURE.
+    """
+
+    def __init__(self, section, content_type, encoding=None, size=0, filename=None,
+                 disposition=None, params=None):
+        """
+        Initialize the MessagePart.
+
+        Args:
+            section (str): Section number for BODY[section], e.g. "2" or "1.3"
+            content_type (str): Lower-case MIME type, e.g. "application/pdf"
+            encoding (str): Lower-case Content-Transfer-Encoding, e.g. "base64"
+            size (int): Size of the encoded part in bytes
+            filename (str, optional): Decoded file name, if the part has one
+            disposition (str, optional): Lower-case Content-Disposition type
+            params (dict, optional): Content-Type parameters with lower-case names
+        """
+        self.section = section
+        self.content_type = content_type
+        self.encoding = encoding or '7bit'
+        self.size = size
+        self.filename = filename
+        self.disposition = disposition
+        self.params = params or {}
+
+    @property
+    def is_attachment(self):
+        """bool: True if the part is saved as an attachment (it has a file name)."""
+        return bool(self.filename)
+
+    def __repr__(self):
+        return (f"MessagePart(section={self.section!r}, content_type={self.content_type!r}, "
+                f"filename={self.filename!r}, size={self.size})")
+
+
+def _text(value):
+    """Turn a BODYSTRUCTURE string (str, bytes from a literal, or None) into str."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _param_dict(values):
+    """
+    Turn a BODYSTRUCTURE parameter list ["NAME", "x.pdf", ...] into a dict.
+
+    RFC 2231 parameters (name*, name*0, name*1*, ...) are joined and decoded.
+
+    Args:
+        values (list): Alternating names and values, or None
+
+    Returns:
+        dict: Lower-case parameter names to values
+    """
+    if not isinstance(values, list):
+        return {}
+    params = {}
+    extended = {}
+    for position in range(0, len(values) - 1, 2):
+        name = (_text(values[position]) or '').lower()
+        value = _text(values[position + 1]) or ''
+        if '*' in name:
+            base, _, index = name.partition('*')
+            encoded = index.endswith('*') or index == ''
+            index = index.rstrip('*')
+            extended.setdefault(base, []).append((int(index) if index.isdigit() else 0, value, encoded))
+        else:
+            params[name] = value
+    for base, pieces in extended.items():
+        pieces.sort()
+        charset = 'utf-8'
+        value = ""
+        for position, (index, piece, encoded) in enumerate(pieces):
+            if encoded and position == 0 and piece.count("'") >= 2:
+                charset, _, piece = piece.split("'", 2)
+                charset = charset or 'utf-8'
+            value += urllib.parse.unquote(piece, encoding=charset, errors='replace') if encoded else piece
+        params[base] = value
+    return params
+
+
+def decode_filename(filename):
+    """
+    Decode an RFC 2047 encoded file name, e.g. "=?utf-8?q?Rechnung=C3=BC.pdf?=".
+
+    Args:
+        filename (str): File name as found in the message
+
+    Returns:
+        str: Decoded file name
+    """
+    try:
+        decoded = []
+        for value, charset in decode_header(filename):
+            if isinstance(value, bytes):
+                value = value.decode(charset or 'utf-8', errors='replace')
+            decoded.append(value)
+        return "".join(decoded)
+    except Exception as e:
+        logging.error(f"Error decoding file name {filename}: {e}")
+        return filename
+
+
+def _parse_part(structure, section):
+    """
+    Collect the non-multipart parts of a (sub-)BODYSTRUCTURE.
+
+    Args:
+        structure (list): Parsed BODYSTRUCTURE of one body
+        section (str): Section number of this body ("" for the message itself)
+
+    Returns:
+        list: MessagePart objects
+    """
+    if not isinstance(structure, list) or not structure:
+        return []
+
+    # Multipart: the body parts come first, then the subtype
+    if isinstance(structure[0], list):
+        parts = []
+        index = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            index += 1
+            parts.extend(_parse_part(child, f"{section}.{index}" if section else str(index)))
+        return parts
+
+    # Single part: type, subtype, params, id, description, encoding, size, ...
+    maintype = (_text(structure[0]) or 'text').lower()
+    subtype = (_text(structure[1]) or 'plain').lower() if len(structure) > 1 else 'plain'
+    params = _param_dict(structure[2] if len(structure) > 2 else None)
+    encoding = (_text(structure[5]) or '7bit').lower() if len(structure) > 5 else '7bit'
+    size = structure[6] if len(structure) > 6 and isinstance(structure[6], int) else 0
+
+    # The extension data starts after the type-specific fields
+    if maintype == 'text':
+        extension = 8
+    elif maintype == 'message' and subtype == 'rfc822':
+        extension = 10
+    else:
+        extension = 7
+    disposition = None
+    disposition_params = {}
+    if len(structure) > extension + 1 and isinstance(structure[extension + 1], list):
+        disposition_list = structure[extension + 1]
+        disposition = (_text(disposition_list[0]) or '').lower() or None
+        if len(disposition_list) > 1:
+            disposition_params = _param_dict(disposition_list[1])
+
+    filename = disposition_params.get('filename') or params.get('name')
+    if filename:
+        filename = decode_filename(filename)
+    return [MessagePart(section or '1', f"{maintype}/{subtype}", encoding, size, filename, disposition, params)]
+
+
+def parse_bodystructure(structure):
+    """
+    List the non-multipart parts of a message from its parsed BODYSTRUCTURE.
+
+    Attached messages (message/rfc822) are listed as one part, not descended into.
+
+    Args:
+        structure (list): BODYSTRUCTURE value from parse_fetch_response
+
+    Returns:
+        list: MessagePart objects in section order
+    """
+    return _parse_part(structure, "")
+
+
+def attachment_matches(filename, content_type, mime_types=None, extensions=None):
+    """
+    Check an attachment against optional MIME type and extension filters.
+
+    Args:
+        filename (str): File name of the attachment
+        content_type (str): MIME type of the attachment
+        mime_types (list, optional): Accepted MIME types, e.g. ["application/pdf"];
+                                     "image/*" accepts a whole main type
+        extensions (list, optional): Accepted extensions, e.g. [".pdf"]
+
+    Returns:
+        bool: True if the attachment passes all given filters
+    """
+    if mime_types:
+        content_type = (content_type or '').lower()
+        if not any(content_type == mime.lower() or
+                   (mime.endswith('/*') and content_type.startswith(mime[:-1].lower()))
+                   for mime in mime_types):
+            return False
+    if extensions:
+        name = (filename or '').lower()
+        if not any(name.endswith(extension.lower()) for extension in extensions):
+            return False
+    return True
+
+
+def find_attachment_parts(structure, mime_types=None, extensions=None):
+    """
+    Find the attachments of a message from its BODYSTRUCTURE.
+
+    Args:
+        structure (list): BODYSTRUCTURE value from parse_fetch_response
+        mime_types (list, optional): Accepted MIME types (see attachment_matches)
+        extensions (list, optional): Accepted extensions, e.g. [".pdf"]
+
+    Returns:
+        list: MessagePart objects of the matching attachments
+    """
+    return [part for part in parse_bodystructure(structure)
+            if part.is_attachment and attachment_matches(part.filename, part.content_type, mime_types, extensions)]
+
+
+def decode_part(data, encoding):
+    """
+    Decode the content of a BODY[section] fetch.
+
+    Args:
+        data (bytes): Encoded part content
+        encoding (str): Content-Transfer-Encoding of the part
+
+    Returns:
+        bytes: Decoded content
+    """
+    encoding = (encoding or '7bit').lower()
+    if encoding == 'base64':
+        try:
+            return base64.b64decode(data)
+        except binascii.Error:
+            # Tolerate stray characters and broken padding like the email package does
+            cleaned = bytes(char for char in data if char in _BASE64_ALPHABET)
+            cleaned = cleaned[:len(cleaned) - (len(cleaned) % 4 == 1)]
+            return base64.b64decode(cleaned + b"=" * (-len(cleaned) % 4))
+    if encoding == 'quoted-printable':
+        return quopri.decodestring(data)
+    return data
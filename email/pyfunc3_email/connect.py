@@ -2,11 +2,13 @@
 Functions for connecting to email servers.
 """
 
+import time
 import imaplib
 import logging
+from .metrics import get_metrics
 
 
-def connect(server, username, password):
+def connect(server, username, password, port=None, use_ssl=True):
     """
     Connect to an IMAP email server.
     
@@ -14,21 +16,30 @@ def connect(server, username, password):
         server (str): IMAP server address
         username (str): Email username
         password (str): Email password
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
         
     Returns:
         imaplib.IMAP4_SSL: IMAP connection object or None if connection fails
     """
+    start = time.perf_counter()
     try:
         # Connect to the server
-        mail = imaplib.IMAP4_SSL(server)
+        if use_ssl:
+            mail = imaplib.IMAP4_SSL(server, port or imaplib.IMAP4_SSL_PORT)
+        else:
+            mail = imaplib.IMAP4(server, port or imaplib.IMAP4_PORT)
         
         # Login to the server
         mail.login(username, password)
         
         logging.info(f"Successfully connected to {server} as {username}")
+        get_metrics().observe('imap_connect_seconds', time.perf_counter() - start)
+        get_metrics().inc('imap_connections_total', status='ok')
         return mail
     except Exception as e:
         logging.error(f"Error connecting to email server: {e}")
+        get_metrics().inc('imap_connections_total', status='error')
         return None
 
 
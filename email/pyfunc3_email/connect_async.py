@@ -0,0 +1,308 @@
+"""
+Functions for connecting to email servers from asyncio code.
+"""
+
+import re
+import ssl
+import time
+import asyncio
+import imaplib
+import logging
+from .metrics import get_metrics
+
+
+_LITERAL = re.compile(rb'\{(\d+)\}\r\n$')
+_RESPONSE_CODE = re.compile(rb'\[(?P<code>[A-Z-]+)( (?P<value>[^\]]*))?\]')
+_UNTAGGED_NUMBER = re.compile(rb'^(\d+) ([A-Z-]+)(?: (.*))?$', re.DOTALL)
+
+
+def _quote(argument):
+    """Quote a command argument the way imaplib does when it needs quoting."""
+    if isinstance(argument, bytes):
+        argument = argument.decode()
+    if argument == "" or re.search(r'[\s(){%*"\\\]]', argument):
+        return '"' + argument.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return argument
+
+
+class AsyncIMAPClient:
+    """
+    Minimal asyncio IMAP4rev1 client with the calling conventions of imaplib.
+
+    Every command is a coroutine returning (status, data) like imaplib, and
+    FETCH data has the same shape (bytes and (header, literal) tuples), so it
+    can be parsed with parse_fetch_response.
+    """
+
+    def __init__(self, host, port=None, use_ssl=True, timeout=60):
+        """
+        Initialize the AsyncIMAPClient. Call open() to connect.
+
+        Args:
+            host (str): IMAP server address
+            port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+            use_ssl (bool): Connect over SSL/TLS
+            timeout (float): Seconds to wait for each server response line
+        """
+        self.host = host
+        self.port = port or (imaplib.IMAP4_SSL_PORT if use_ssl else imaplib.IMAP4_PORT)
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.state = 'LOGOUT'
+        self._reader = None
+        self._writer = None
+        self._tag = 0
+        self._codes = {}
+        self._lock = asyncio.Lock()
+
+    async def open(self):
+        """
+        Connect and read the server greeting.
+        """
+        context = ssl.create_default_context() if self.use_ssl else None
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context), self.timeout)
+        greeting = await self._read_line()
+        if not greeting.startswith(b'* OK') and not greeting.startswith(b'* PREAUTH'):
+            raise imaplib.IMAP4.error(f"Unexpected greeting: {greeting!r}")
+        self.state = 'NONAUTH'
+
+    async def _receive(self, read):
+        """Await a read from the server, raising imaplib.IMAP4.abort like imaplib if the connection is lost."""
+        try:
+            return await asyncio.wait_for(read, self.timeout)
+        except asyncio.IncompleteReadError:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+        except asyncio.TimeoutError:
+            raise imaplib.IMAP4.abort(f"socket error: no response within {self.timeout}s")
+
+    async def _read_line(self):
+        """Read one response line, including the CRLF, however long it is."""
+        parts = []
+        while True:
+            try:
+                parts.append(await self._receive(self._reader.readuntil(b"\r\n")))
+                return b"".join(parts)
+            except asyncio.LimitOverrunError as e:
+                # Longer than the buffer limit, e.g. a SEARCH response with many UIDs:
+                # take the part without the CRLF and read on
+                parts.append(await self._receive(self._reader.readexactly(e.consumed)))
+
+    async def _read_response(self):
+        """
+        Read one response with all its literals.
+
+        Returns:
+            list: bytes for a plain line, or (header, literal) tuples followed by
+                  the rest of the line, as imaplib stores them
+        """
+        parts = []
+        line = await self._read_line()
+        while True:
+            match = _LITERAL.search(line)
+            if not match:
+                parts.append(line[:-2])
+                return parts
+            literal = await self._receive(self._reader.readexactly(int(match.group(1))))
+            parts.append((line[:-2], literal))
+            line = await self._read_line()
+
+    async def _command(self, name, *arguments):
+        """
+        Send a command and collect its responses.
+
+        Args:
+            name (str): Command name, e.g. "FETCH"
+            *arguments: Command arguments, already in IMAP syntax
+
+        Returns:
+            tuple: (status, untagged responses by type, text of the tagged response)
+        """
+        async with self._lock:
+            self._tag += 1
+            tag = f"A{self._tag:04d}".encode()
+            command = b" ".join([tag, name.encode()] + [
+                argument if isinstance(argument, bytes) else str(argument).encode()
+                for argument in arguments if argument is not None
+            ])
+            self._writer.write(command + b"\r\n")
+            await self._writer.drain()
+
+            untagged = {}
+            while True:
+                parts = await self._read_response()
+                first = parts[0][0] if isinstance(parts[0], tuple) else parts[0]
+                if first.startswith(tag + b" "):
+                    status, _, text = first[len(tag) + 1:].partition(b" ")
+                    return status.decode(), untagged, text
+                if not first.startswith(b"* "):
+                    # Continuation requests are not used by these commands
+                    continue
+
+                # Untagged: "* TYPE data" or "* N TYPE data", stored like imaplib
+                first = first[2:]
+                if first.split(b" ", 1)[0] in (b"OK", b"NO", b"BAD", b"BYE", b"PREAUTH"):
+                    code = _RESPONSE_CODE.search(first)
+                    if code:
+                        self._codes.setdefault(code.group('code').decode(), []).append(code.group('value'))
+                match = _UNTAGGED_NUMBER.match(first)
+                if match:
+                    kind = match.group(2).decode()
+                    data = match.group(1) + (b" " + match.group(3) if match.group(3) else b"")
+                else:
+                    kind, _, data = first.partition(b" ")
+                    kind = kind.decode()
+                if isinstance(parts[0], tuple):
+                    parts[0] = (data, parts[0][1])
+                    untagged.setdefault(kind, []).extend(parts)
+                else:
+                    untagged.setdefault(kind, []).append(data)
+
+    def response(self, code):
+        """
+        Get and clear the values of a response code such as UIDVALIDITY, like imaplib.
+
+        Args:
+            code (str): Response code
+
+        Returns:
+            tuple: (code, list of values or [None])
+        """
+        return code, self._codes.pop(code.upper(), [None])
+
+    async def login(self, username, password):
+        """Log in with a plain-text password."""
+        status, untagged, text = await self._command('LOGIN', _quote(username), _quote(password))
+        if status != 'OK':
+            raise imaplib.IMAP4.error(text.decode(errors='replace'))
+        self.state = 'AUTH'
+        return status, [text]
+
+    async def select(self, mailbox='INBOX', readonly=False):
+        """Select a mailbox; data is [message count] like imaplib."""
+        self._codes.clear()
+        status, untagged, text = await self._command('EXAMINE' if readonly else 'SELECT', _quote(mailbox))
+        if status != 'OK':
+            return status, [text]
+        self.state = 'SELECTED'
+        return status, untagged.get('EXISTS', [None])[-1:]
+
+    async def search(self, charset, *criteria):
+        """Search the selected mailbox; data is [b"1 2 3"] like imaplib."""
+        arguments = (['CHARSET', charset] if charset else []) + list(criteria)
+        status, untagged, text = await self._command('SEARCH', *arguments)
+        return status, untagged.get('SEARCH', [b""]) if status == 'OK' else [text]
+
+    async def fetch(self, message_set, message_parts):
+        """Fetch message items; data has the same shape as imaplib's."""
+        status, untagged, text = await self._command('FETCH', message_set, message_parts)
+        return status, untagged.get('FETCH', [None]) if status == 'OK' else [text]
+
+    async def status(self, mailbox, names):
+        """Get the status items of a mailbox."""
+        status, untagged, text = await self._command('STATUS', _quote(mailbox), names)
+        return status, untagged.get('STATUS', [None]) if status == 'OK' else [text]
+
+    async def uid(self, command, *arguments):
+        """Run SEARCH or FETCH with UIDs instead of sequence numbers."""
+        command = command.upper()
+        if command == 'SEARCH' and arguments and arguments[0] is None:
+            arguments = arguments[1:]
+        status, untagged, text = await self._command('UID', command, *arguments)
+        if status != 'OK':
+            return status, [text]
+        return status, untagged.get(command, [b""] if command == 'SEARCH' else [None])
+
+    async def noop(self):
+        """Send NOOP, e.g. to keep the connection alive."""
+        status, untagged, text = await self._command('NOOP')
+        return status, [text]
+
+    async def close(self):
+        """Close the selected mailbox."""
+        status, untagged, text = await self._command('CLOSE')
+        self.state = 'AUTH'
+        return status, [text]
+
+    async def logout(self):
+        """Log out and close the connection."""
+        self.state = 'LOGOUT'
+        try:
+            status, untagged, text = await self._command('LOGOUT')
+            return 'BYE', untagged.get('BYE', [text])
+        finally:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+
+
+async def connect_async(server, username, password, port=None, use_ssl=True, timeout=60):
+    """
+    Connect to an IMAP email server from asyncio code.
+
+    Args:
+        server (str): IMAP server address
+        username (str): Email username
+        password (str): Email password
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        timeout (float): Seconds to wait for each server response line
+
+    Returns:
+        AsyncIMAPClient: Logged-in connection or None if connection fails
+    """
+    mail = AsyncIMAPClient(server, port, use_ssl, timeout)
+    start = time.perf_counter()
+    try:
+        await mail.open()
+        await mail.login(username, password)
+        logging.info(f"Successfully connected to {server} as {username}")
+        get_metrics().observe('imap_connect_seconds', time.perf_counter() - start)
+        get_metrics().inc('imap_connections_total', status='ok')
+        return mail
+    except Exception as e:
+        logging.error(f"Error connecting to email server: {e}")
+        get_metrics().inc('imap_connections_total', status='error')
+        if mail._writer is not None:
+            mail._writer.close()
+        return None
+
+
+class ServerLimiter:
+    """
+    Bounds the number of concurrent connections per IMAP server.
+
+    Mail servers limit simultaneous connections per account or client IP, so
+    when many accounts are synced from one event loop, connections to the same
+    server wait for a free slot while other servers keep working.
+    """
+
+    def __init__(self, per_server=4, limits=None):
+        """
+        Initialize the ServerLimiter.
+
+        Args:
+            per_server (int): Maximum concurrent connections to one server
+            limits (dict, optional): Different maximums for specific servers
+        """
+        self.per_server = per_server
+        # Server names are case-insensitive
+        self.limits = {server.lower(): limit for server, limit in (limits or {}).items()}
+        self._semaphores = {}
+
+    def slot(self, server):
+        """
+        Get the semaphore of a server, to use as `async with limiter.slot(server):`.
+
+        Args:
+            server (str): IMAP server address
+
+        Returns:
+            asyncio.Semaphore: Semaphore bounding connections to the server
+        """
+        key = server.lower()
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(max(1, self.limits.get(key, self.per_server)))
+        return self._semaphores[key]
@@ -4,15 +4,320 @@ Functions for downloading email attachments.
 
 import os
 import email
+import imaplib
 import logging
 from email.header import decode_header
 from .connect import connect
+from .fetch_messages import batches, fetch_batch_steps, get_item
+from .bodystructure import find_attachment_parts, attachment_matches, decode_part
+from .stream_part_to_file import stream_part_to_file_steps, DEFAULT_CHUNK_SIZE
+from .imap_steps import command, work, run_steps
+from .AttachmentStore import AttachmentStore
+from .write_file_atomic import write_file_atomic
 
 
-def download_all_attachments_in_inbox(server, username, password, local_path, remote_folder, limit=50):
+def _decode_subject(msg):
+    """
+    Get the decoded subject of a message for logging.
+    
+    Args:
+        msg (email.message.Message): Parsed message or headers
+        
+    Returns:
+        str: The subject, or "No Subject"
+    """
+    subject = msg.get('Subject')
+    if subject:
+        subject = decode_header(subject)[0][0]
+        if isinstance(subject, bytes):
+            subject = subject.decode(errors='replace')
+    else:
+        subject = "No Subject"
+    return subject
+
+
+def _clean_filename(filename):
+    """
+    Replace characters that are unsafe in file names.
+    
+    Args:
+        filename (str): Decoded file name
+        
+    Returns:
+        str: The cleaned file name
+    """
+    return "".join(c if c.isalnum() or c in '.-_' else '_' for c in filename)
+
+
+def _save_attachment(data, filename, local_path, store=None, **info):
+    """
+    Save an attachment under its cleaned file name, or in a content-addressed store.
+    
+    Args:
+        data (bytes): Decoded attachment
+        filename (str): Decoded file name
+        local_path (str): Local path to save attachments
+        store (AttachmentStore, optional): Store to save the attachment in instead
+        **info: Manifest fields for the store, e.g. message and subject
+        
+    Returns:
+        str: The cleaned file name, or the blob path in the store
+    """
+    if store is not None:
+        entry = store.put_bytes(data, filename, **info)
+        if not entry['stored']:
+            logging.info(f"Attachment {filename} already stored as {entry['blob']}")
+        return entry['blob']
+    
+    filename = _clean_filename(filename)
+    
+    # Save attachment
+    filepath = os.path.join(local_path, filename)
+    write_file_atomic(filepath, data)
+    return filename
+
+
+def _save_message_attachments(raw_email, number, local_path, mime_types=None, extensions=None, store=None):
+    """
+    Save the attachments of a downloaded message.
+    
+    Args:
+        raw_email (bytes): Full RFC822 message
+        number (int): Message number
+        local_path (str): Local path to save attachments
+        mime_types (list, optional): Accepted MIME types
+        extensions (list, optional): Accepted file extensions
+        store (AttachmentStore, optional): Content-addressed store to save attachments in
+        
+    Returns:
+        int: Number of saved attachments
+    """
+    # Parse the email
+    msg = email.message_from_bytes(raw_email)
+    
+    # Get email subject for logging
+    subject = _decode_subject(msg)
+    
+    # Process email parts
+    attachment_count = 0
+    for part in msg.walk():
+        # Skip multipart messages
+        if part.get_content_maintype() == 'multipart':
+            continue
+        
+        # Skip parts without filenames
+        filename = part.get_filename()
+        if not filename:
+            continue
+        
+        # Decode filename if needed
+        filename_parts = decode_header(filename)
+        if filename_parts[0][1] is not None:
+            filename = filename_parts[0][0].decode(filename_parts[0][1])
+        elif isinstance(filename_parts[0][0], bytes):
+            filename = filename_parts[0][0].decode()
+        else:
+            filename = filename_parts[0][0]
+        
+        if not attachment_matches(filename, part.get_content_type(), mime_types, extensions):
+            continue
+        
+        filename = _save_attachment(part.get_payload(decode=True), filename, local_path,
+                                    store, message=number, subject=subject)
+        logging.info(f"Downloaded attachment: {filename} from email: {subject}")
+        attachment_count += 1
+    return attachment_count
+
+
+class _PartPlan:
+    """
+    Attachment sections to download, collected from BODYSTRUCTURE responses.
+    """
+    
+    # Structure and subject of a message, without any body
+    ITEMS = '(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT)])'
+    
+    def __init__(self, mime_types=None, extensions=None, stream_chunk_size=None):
+        self.mime_types = mime_types
+        self.extensions = extensions
+        self.stream_chunk_size = stream_chunk_size
+        self.parts_by_number = {}
+        self.subjects = {}
+        self.layouts = {}
+        self.large_parts = []
+    
+    def add(self, number, msg_items):
+        """Record the attachment sections of one message."""
+        structure = msg_items.get('BODYSTRUCTURE') if msg_items else None
+        if structure is None:
+            logging.error(f"Error fetching message {number}: no BODYSTRUCTURE data")
+            return
+        parts = find_attachment_parts(structure, self.mime_types, self.extensions)
+        if not parts:
+            return
+        header = get_item(msg_items, 'BODY[HEADER')
+        self.subjects[number] = _decode_subject(email.message_from_bytes(header)) if header else "No Subject"
+        if self.stream_chunk_size:
+            self.large_parts.extend((number, part) for part in parts if part.size > self.stream_chunk_size)
+            parts = [part for part in parts if part.size <= self.stream_chunk_size]
+            if not parts:
+                return
+        self.parts_by_number[number] = parts
+        # Messages with the same attachment sections share one FETCH command
+        self.layouts.setdefault(tuple(part.section for part in parts), []).append(number)
+    
+    def groups(self):
+        """Get (FETCH items, message numbers) for the sections fetched as a whole."""
+        for sections, numbers in self.layouts.items():
+            yield "(" + " ".join(f"BODY.PEEK[{section}]" for section in sections) + ")", numbers
+    
+    def save(self, number, msg_items, local_path, store=None):
+        """Decode and save the fetched sections of one message; returns the number saved."""
+        if not msg_items:
+            logging.error(f"Error fetching attachments of message {number}")
+            return 0
+        attachment_count = 0
+        for part in self.parts_by_number[number]:
+            data = msg_items.get(f"BODY[{part.section}]")
+            if data is None:
+                logging.error(f"Error fetching section {part.section} of message {number}")
+                continue
+            filename = _save_attachment(decode_part(data, part.encoding), part.filename, local_path,
+                                        store, message=number, subject=self.subjects[number])
+            logging.info(f"Downloaded attachment: {filename} from email: {self.subjects[number]}")
+            attachment_count += 1
+        return attachment_count
+    
+    def stream_target(self, part, local_path, store=None):
+        """Get the path a large section is streamed to."""
+        if store is not None:
+            return store.temp_path()
+        return os.path.join(local_path, _clean_filename(part.filename))
+    
+    def streamed(self, number, part, filepath, store=None):
+        """Finish a streamed section, moving it into the store if there is one."""
+        filename = _clean_filename(part.filename)
+        if store is not None:
+            filename = store.put_file(filepath, part.filename, message=number,
+                                      subject=self.subjects[number])['blob']
+        logging.info(f"Downloaded attachment: {filename} from email: {self.subjects[number]}")
+
+
+def _download_attachment_parts_steps(numbers, local_path, batch_size=100, mime_types=None, extensions=None,
+                                     stream_chunk_size=None, store=None):
+    """
+    Download only the attachment sections of messages, found via BODYSTRUCTURE,
+    as workflow steps (see imap_steps).
+    
+    With stream_chunk_size, sections larger than one chunk are streamed to their
+    file (see stream_part_to_file) instead of being fetched as a whole.
+    
+    Args:
+        numbers (list): Message sequence numbers
+        local_path (str): Local path to save attachments
+        batch_size (int): Number of messages per FETCH command
+        mime_types (list, optional): Accepted MIME types
+        extensions (list, optional): Accepted file extensions
+        stream_chunk_size (int, optional): Stream sections larger than this many bytes
+        store (AttachmentStore, optional): Content-addressed store to save attachments in
+        
+    Returns:
+        int: Number of saved attachments
+    """
+    plan = _PartPlan(mime_types, extensions, stream_chunk_size)
+    for batch in batches(numbers, batch_size):
+        fetched = yield from fetch_batch_steps(batch, plan.ITEMS)
+        for i in batch:
+            plan.add(i, fetched.get(i))
+    
+    attachment_count = 0
+    for items, group in plan.groups():
+        for batch in batches(group, batch_size):
+            fetched = yield from fetch_batch_steps(batch, items)
+            for i in batch:
+                attachment_count += yield work(plan.save, i, fetched.get(i), local_path, store)
+    
+    # Large sections are written to disk piece by piece
+    for i, part in plan.large_parts:
+        filepath = plan.stream_target(part, local_path, store)
+        written = yield from stream_part_to_file_steps(i, part.section, part.encoding, filepath,
+                                                       stream_chunk_size, part.size)
+        if written is None:
+            continue
+        yield work(plan.streamed, i, part, filepath, store)
+        attachment_count += 1
+    return attachment_count
+
+
+def _download_attachments_steps(local_path, remote_folder, limit=50, batch_size=100, use_bodystructure=False,
+                                mime_types=None, extensions=None, stream=False,
+                                stream_chunk_size=DEFAULT_CHUNK_SIZE, store=None):
+    """
+    Download the attachments of the newest messages of a folder, as workflow steps (see imap_steps).
+    
+    Shared by download_all_attachments_in_inbox and its asyncio version, which
+    take the same arguments.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    # Select the remote folder
+    status, messages = yield command('select', remote_folder)
+    if status != 'OK':
+        logging.error(f"Error selecting folder {remote_folder}: {messages}")
+        return False
+    
+    # Get the number of emails in the folder
+    messages = int(messages[0])
+    logging.info(f"Found {messages} messages in {remote_folder}")
+    
+    # Limit the number of emails to process, newest first
+    lowest = max(messages - limit, 0) if limit > 0 else 0
+    numbers = range(messages, lowest, -1)
+    
+    # Download attachments
+    if use_bodystructure or stream:
+        attachment_count = yield from _download_attachment_parts_steps(numbers, local_path, batch_size,
+                                                                       mime_types, extensions,
+                                                                       stream_chunk_size if stream else None,
+                                                                       store)
+    else:
+        attachment_count = 0
+        for batch in batches(numbers, batch_size):
+            fetched = yield from fetch_batch_steps(batch, '(RFC822)')
+            for i in batch:
+                # The email was fetched as part of a batch
+                msg_items = fetched.get(i)
+                raw_email = get_item(msg_items, 'RFC822') if msg_items else None
+                if raw_email is None:
+                    logging.error(f"Error fetching message {i}: no RFC822 data")
+                    continue
+                attachment_count += yield work(_save_message_attachments, raw_email, i, local_path,
+                                               mime_types, extensions, store)
+    
+    logging.info(f"Downloaded {attachment_count} attachments from {remote_folder}")
+    return True
+
+
+def download_all_attachments_in_inbox(server, username, password, local_path, remote_folder, limit=50,
+                                      port=None, use_ssl=True, batch_size=100, use_bodystructure=False,
+                                      mime_types=None, extensions=None, stream=False,
+                                      stream_chunk_size=DEFAULT_CHUNK_SIZE, content_addressed=False, session=None):
     """
     Download all attachments from emails in a remote folder to a local path.
     
+    With use_bodystructure, only the BODYSTRUCTURE of each message is fetched
+    first, and then just the attachment sections (BODY.PEEK[n]) instead of
+    the full messages, so message texts and inline parts are never transferred.
+    
+    With stream, attachments larger than stream_chunk_size are fetched in pieces
+    and decoded straight into their file, so memory use does not grow with the
+    size of an attachment.
+    
+    With content_addressed, attachments are saved in an AttachmentStore under
+    local_path: each distinct content is written once, named by its SHA-256,
+    and manifest.jsonl records every original file name.
+    
     Args:
         server (str): IMAP server address
         username (str): Email username
@@ -20,6 +325,19 @@ def download_all_attachments_in_inbox(server, username, password, local_path, re
         local_path (str): Local path to save attachments
         remote_folder (str): Remote folder to download from
         limit (int): Maximum number of emails to process
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        batch_size (int): Number of messages fetched per FETCH command
+        use_bodystructure (bool): Fetch only the attachment sections of each message
+        mime_types (list, optional): Only download these MIME types, e.g. ["application/pdf"]
+        extensions (list, optional): Only download these file extensions, e.g. [".pdf"]
+        stream (bool): Stream large attachments to disk (implies use_bodystructure)
+        stream_chunk_size (int): Encoded bytes per partial FETCH when streaming
+        content_addressed (bool): Deduplicate attachments in an AttachmentStore
+        session (IMAPSession, optional): Reuse the connection of this session instead of
+                                         connecting and logging in (call through
+                                         IMAPSession.download_all_attachments_in_inbox,
+                                         which retries if the connection drops)
         
     Returns:
         bool: True if successful, False otherwise
@@ -30,82 +348,27 @@ def download_all_attachments_in_inbox(server, username, password, local_path, re
             os.makedirs(local_path)
             logging.info(f"Created directory: {local_path}")
         
-        # Connect to the server
-        mail = connect(server, username, password)
+        # Connect to the server, or reuse the session's connection
+        if session is not None:
+            mail = session.connection()
+        else:
+            mail = connect(server, username, password, port=port, use_ssl=use_ssl)
         if not mail:
             return False
         
-        # Select the remote folder
-        status, messages = mail.select(remote_folder)
-        if status != 'OK':
-            logging.error(f"Error selecting folder {remote_folder}: {messages}")
+        store = AttachmentStore(local_path) if content_addressed else None
+        if not run_steps(mail, _download_attachments_steps(local_path, remote_folder, limit, batch_size,
+                                                           use_bodystructure, mime_types, extensions, stream,
+                                                           stream_chunk_size, store)):
             return False
         
-        # Get the number of emails in the folder
-        messages = int(messages[0])
-        logging.info(f"Found {messages} messages in {remote_folder}")
-        
-        # Limit the number of emails to process
-        if limit > 0 and messages > limit:
-            messages = limit
-        
-        # Download attachments
-        attachment_count = 0
-        for i in range(messages, 0, -1):
-            # Fetch the email
-            status, msg_data = mail.fetch(str(i), '(RFC822)')
-            if status != 'OK':
-                logging.error(f"Error fetching message {i}: {msg_data}")
-                continue
-            
-            # Parse the email
-            raw_email = msg_data[0][1]
-            msg = email.message_from_bytes(raw_email)
-            
-            # Get email subject for logging
-            subject = msg.get('Subject')
-            if subject:
-                subject = decode_header(subject)[0][0]
-                if isinstance(subject, bytes):
-                    subject = subject.decode()
-            else:
-                subject = "No Subject"
-            
-            # Process email parts
-            for part in msg.walk():
-                # Skip multipart messages
-                if part.get_content_maintype() == 'multipart':
-                    continue
-                
-                # Skip parts without filenames
-                filename = part.get_filename()
-                if not filename:
-                    continue
-                
-                # Decode filename if needed
-                filename_parts = decode_header(filename)
-                if filename_parts[0][1] is not None:
-                    filename = filename_parts[0][0].decode(filename_parts[0][1])
-                elif isinstance(filename_parts[0][0], bytes):
-                    filename = filename_parts[0][0].decode()
-                else:
-                    filename = filename_parts[0][0]
-                
-                # Clean filename
-                filename = "".join(c if c.isalnum() or c in '.-_' else '_' for c in filename)
-                
-                # Save attachment
-                filepath = os.path.join(local_path, filename)
-                with open(filepath, 'wb') as f:
-                    f.write(part.get_payload(decode=True))
-                
-                logging.info(f"Downloaded attachment: {filename} from email: {subject}")
-                attachment_count += 1
-        
-        logging.info(f"Downloaded {attachment_count} attachments from {remote_folder}")
         mail.close()
-        mail.logout()
+        if session is None:
+            mail.logout()
         return True
     except Exception as e:
+        if session is not None and isinstance(e, (imaplib.IMAP4.abort, OSError)):
+            # The session reconnects and runs the download again
+            raise
         logging.error(f"Error downloading attachments: {e}")
         return False
@@ -0,0 +1,74 @@
+"""
+Functions for downloading email attachments from asyncio code.
+"""
+
+import os
+import logging
+from .connect_async import connect_async
+from .stream_part_to_file import DEFAULT_CHUNK_SIZE
+from .AttachmentStore import AttachmentStore
+from .download_all_attachments_in_inbox import _download_attachments_steps
+from .imap_steps import run_steps_async
+
+
+async def download_all_attachments_in_inbox_async(server, username, password, local_path, remote_folder, limit=50,
+                                                  port=None, use_ssl=True, batch_size=100, use_bodystructure=False,
+                                                  mime_types=None, extensions=None, stream=False,
+                                                  stream_chunk_size=DEFAULT_CHUNK_SIZE, content_addressed=False,
+                                                  limiter=None):
+    """
+    Download all attachments from emails in a remote folder over an asyncio connection.
+
+    Works like download_all_attachments_in_inbox, so many accounts can be
+    processed concurrently from one event loop. Decoding and writing files
+    runs in a worker thread.
+
+    Args:
+        server (str): IMAP server address
+        username (str): Email username
+        password (str): Email password
+        local_path (str): Local path to save attachments
+        remote_folder (str): Remote folder to download from
+        limit (int): Maximum number of emails to process
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        batch_size (int): Number of messages fetched per FETCH command
+        use_bodystructure (bool): Fetch only the attachment sections of each message
+        mime_types (list, optional): Only download these MIME types, e.g. ["application/pdf"]
+        extensions (list, optional): Only download these file extensions, e.g. [".pdf"]
+        stream (bool): Stream large attachments to disk (implies use_bodystructure)
+        stream_chunk_size (int): Encoded bytes per partial FETCH when streaming
+        content_addressed (bool): Deduplicate attachments in an AttachmentStore
+        limiter (ServerLimiter, optional): Bounds concurrent connections per server
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if limiter is not None:
+        async with limiter.slot(server):
+            return await download_all_attachments_in_inbox_async(
+                server, username, password, local_path, remote_folder, limit, port, use_ssl, batch_size,
+                use_bodystructure, mime_types, extensions, stream, stream_chunk_size, content_addressed)
+
+    try:
+        os.makedirs(local_path, exist_ok=True)
+
+        mail = await connect_async(server, username, password, port=port, use_ssl=use_ssl)
+        if not mail:
+            return False
+
+        store = AttachmentStore(local_path) if content_addressed else None
+        try:
+            return await run_steps_async(mail, _download_attachments_steps(local_path, remote_folder, limit,
+                                                                           batch_size, use_bodystructure,
+                                                                           mime_types, extensions, stream,
+                                                                           stream_chunk_size, store))
+        finally:
+            try:
+                await mail.close()
+                await mail.logout()
+            except Exception as e:
+                logging.error(f"Error closing connection: {e}")
+    except Exception as e:
+        logging.error(f"Error downloading attachments: {e}")
+        return False
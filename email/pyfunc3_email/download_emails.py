@@ -4,30 +4,514 @@ Functions for downloading emails.
 
 import os
 import email
+import imaplib
 import logging
 import time
 import datetime
+import threading
 from email.header import decode_header
 from .connect import connect
+from .fetch_messages import batches, fetch_batch_steps, get_item
+from .search_messages import select_message_numbers_steps
+from .plan_downloads import plan_downloads_steps
+from .sync_state import SyncState, get_uidvalidity_steps, select_new_uids_steps, synced_up_to
+from .imap_steps import command, work, run_steps
+from .write_file_atomic import write_file_atomic
+from .DownloadJournal import DownloadJournal
+from .reporters import LogReporter, get_reporter
+from .metrics import get_metrics
 
 
-def download_emails(server, username, password, local_path, remote_folder, limit=50, month=0, year=0):
+# Reports saved messages when save_message is called without a reporter
+_message_log = LogReporter()
+
+
+def save_message(raw_email, number, local_path, month=0, year=0, msg_info=None, reporter=None):
+    """
+    Parse a downloaded message, filter it by date and save it as an .eml file.
+    
+    Args:
+        raw_email (bytes): Full RFC822 message
+        number (int): Message number used in the filename
+        local_path (str): Local path to save the email
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        msg_info (str, optional): Prefix for log messages
+        reporter (ProgressReporter, optional): Reporter to report the message to.
+                                               Defaults to logging every saved message.
+        
+    Returns:
+        str: Path of the saved file, None if the date filter skipped the message,
+             or False if it could not be written
+    """
+    if msg_info is None:
+        msg_info = f"Message {number}"
+    if reporter is None:
+        reporter = _message_log
+    metrics = get_metrics()
+    
+    # Parse the email
+    with metrics.time('message_parse_seconds'):
+        msg = email.message_from_bytes(raw_email)
+    
+    # Get email date
+    date = None
+    date_str = msg.get('Date', 'No Date')
+    logging.debug("%s - Date: %s", msg_info, date_str)
+    
+    if date_str != 'No Date':
+        try:
+            # Parse the date
+            date_tuple = email.utils.parsedate_tz(date_str)
+            if date_tuple:
+                date = datetime.datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
+                logging.debug("%s - Parsed date: %s", msg_info, date)
+                
+                # Filter by month and year if specified
+                if month > 0 and date.month != month:
+                    logging.debug("%s - Skipping (wrong month: %s != %s)", msg_info, date.month, month)
+                    reporter.message(number, 'skipped', msg_info, reason='month', date=date_str)
+                    metrics.inc('messages_total', status='skipped')
+                    return None
+                if year > 0 and date.year != year:
+                    logging.debug("%s - Skipping (wrong year: %s != %s)", msg_info, date.year, year)
+                    reporter.message(number, 'skipped', msg_info, reason='year', date=date_str)
+                    metrics.inc('messages_total', status='skipped')
+                    return None
+        except Exception as e:
+            logging.error(f"{msg_info} - Error parsing date {date_str}: {e}", exc_info=True)
+    
+    # Get email subject and from
+    subject = msg.get('Subject', 'No Subject')
+    from_ = msg.get('From', 'Unknown Sender')
+    logging.debug("%s - From: %s", msg_info, from_)
+    
+    if subject:
+        subject = decode_header(subject)[0][0]
+        if isinstance(subject, bytes):
+            try:
+                subject = subject.decode('utf-8', errors='replace')
+            except Exception as e:
+                logging.error(f"{msg_info} - Error decoding subject: {e}")
+                subject = 'Decode_Error'
+    
+    # Clean subject for filename
+    clean_subject = "".join(c if c.isalnum() or c in ' -_' else '_' for c in subject)
+    clean_subject = clean_subject[:50]  # Limit subject length
+    
+    # Generate filename with date and subject
+    if date is not None:
+        date_prefix = date.strftime('%Y%m%d_%H%M%S_')
+    else:
+        date_prefix = ''
+        
+    filename = f"{date_prefix}{number:04d}_{clean_subject}.eml"
+    filepath = os.path.join(local_path, filename)
+    
+    # Save the email under a temporary name first, so no partial file appears
+    try:
+        with metrics.time('message_write_seconds'):
+            write_file_atomic(filepath, raw_email)
+        logging.debug("%s - Saved to: %s", msg_info, filepath)
+    except Exception as e:
+        logging.error(f"{msg_info} - Error saving email: {e}", exc_info=True)
+        reporter.message(number, 'failed', msg_info, reason=str(e))
+        metrics.inc('messages_total', status='failed')
+        return False
+    
+    # The reporter formats the details only if it reports them
+    reporter.message(number, 'saved', msg_info, path=filepath, size=len(raw_email),
+                     subject=subject, sender=from_, date=date_str)
+    metrics.inc('messages_total', status='saved')
+    metrics.inc('message_bytes_total', len(raw_email))
+    return filepath
+
+
+def write_summary(local_path, username, remote_folder, month, year, processed, count, skipped, duration):
+    """
+    Log the download summary and save it to download_summary.txt.
+    
+    Args:
+        local_path (str): Local path the emails were saved to
+        username (str): Email username
+        remote_folder (str): Remote folder downloaded from
+        month (int): Month filter (0 for all)
+        year (int): Year filter (0 for all)
+        processed (int): Number of processed messages
+        count (int): Number of saved messages
+        skipped (int): Number of skipped messages
+        duration (float): Duration of the download in seconds
+        
+    Returns:
+        str: The summary text
+    """
+    hours, rem = divmod(duration, 3600)
+    minutes, seconds = divmod(rem, 60)
+    
+    summary = (
+        f"\n{'='*80}\n"
+        f"DOWNLOAD SUMMARY\n"
+        f"{'='*80}\n"
+        f"{'Account:':<20} {username}\n"
+        f"{'Folder:':<20} {remote_folder}\n"
+        f"{'Time period:':<20} {month or 'All'}/{year or 'All'}\n"
+        f"{'Local path:':<20} {os.path.abspath(local_path)}\n"
+        f"{'='*80}\n"
+        f"{'Total processed:':<20} {processed}\n"
+        f"{'Successfully saved:':<20} {count}\n"
+        f"{'Skipped:':<20} {skipped}\n"
+        f"{'Success rate:':<20} {(count/processed*100 if processed > 0 else 0):.1f}%\n"
+        f"{'='*80}\n"
+        f"{'Duration:':<20} {int(hours):02d}h {int(minutes):02d}m {int(seconds):02d}s\n"
+        f"{'Avg time per msg:':<20} {(duration/processed if processed > 0 else 0):.2f} seconds\n"
+        f"{'Messages per hour:':<20} {(processed/duration*3600 if duration > 0 else 0):.1f}\n"
+        f"{'='*80}"
+    )
+    logging.info(summary)
+    
+    # Save summary to file
+    try:
+        summary_file = os.path.join(local_path, 'download_summary.txt')
+        with open(summary_file, 'w') as f:
+            f.write(summary)
+        logging.info(f"Summary saved to: {summary_file}")
+    except Exception as e:
+        logging.error(f"Failed to save summary file: {e}")
+    
+    return summary
+
+
+class ProgressCounter:
+    """
+    Thread-safe counters shared by the download workers.
+    """
+
+    def __init__(self, total=0):
+        """
+        Initialize the ProgressCounter.
+
+        Args:
+            total (int): Number of messages to process
+        """
+        self.total = total
+        self.processed = 0
+        self.saved = 0
+        self.skipped = 0
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def add(self, saved):
+        """
+        Record one processed message.
+
+        Args:
+            saved (bool): Whether the message was saved (False counts it as skipped)
+        """
+        with self._lock:
+            self.processed += 1
+            if saved:
+                self.saved += 1
+            else:
+                self.skipped += 1
+
+    def fail(self, number):
+        """
+        Record one message that could not be fetched or saved (counted as skipped).
+
+        Args:
+            number (int): Sequence number or UID of the message
+        """
+        with self._lock:
+            self.processed += 1
+            self.skipped += 1
+            self.failed.append(number)
+
+    def snapshot(self):
+        """
+        Get a consistent copy of the counters.
+
+        Returns:
+            tuple: (processed, saved, skipped)
+        """
+        with self._lock:
+            return self.processed, self.saved, self.skipped
+
+
+class _FolderDownload:
+    """
+    One download of a remote folder, shared by download_emails,
+    download_emails_parallel and download_emails_async: choosing the messages,
+    handling each fetched message, and the summary and sync state at the end.
+    """
+
+    def __init__(self, local_path, remote_folder, limit=50, month=0, year=0, date_search="internal",
+                 incremental=False, two_phase=False, max_size=None, resume=False, reporter=None, progress=None):
+        """
+        Initialize the _FolderDownload (see download_emails for the arguments).
+
+        Args:
+            progress (ProgressCounter, optional): Counter to report progress into
+        """
+        self.local_path = local_path
+        self.remote_folder = remote_folder
+        self.limit = limit
+        self.month = month
+        self.year = year
+        self.date_search = date_search
+        self.incremental = incremental
+        self.two_phase = two_phase
+        self.max_size = max_size
+        self.resume = resume
+        self.reporter = reporter if reporter is not None else get_reporter(None)
+        self.progress = progress if progress is not None else ProgressCounter()
+        # UIDs identify messages across runs, sequence numbers do not
+        self.use_uid = incremental or resume
+        self.uidvalidity = None
+        self.sync_state = None
+        self.last_uid = 0
+        self.numbers = []
+        self.selected = []
+        self.planned_skips = 0
+        self.resumed = 0
+        self.journal = None
+        self.start_time = None
+
+    def plan(self):
+        """
+        Select the folder and choose the messages to download, as workflow steps (see imap_steps).
+
+        Returns:
+            bool: True if the folder was selected, False otherwise
+        """
+        logging.info(f"Selecting folder: {self.remote_folder}")
+        status, messages = yield command('select', self.remote_folder)
+        if status != 'OK':
+            logging.error(f"Error selecting folder {self.remote_folder}: {messages}")
+            return False
+        
+        # Get the number of emails in the folder
+        messages = int(messages[0])
+        logging.info(f"Found {messages} messages in {self.remote_folder}")
+        
+        if self.use_uid:
+            self.uidvalidity = yield from get_uidvalidity_steps(self.remote_folder)
+            if self.uidvalidity is None:
+                logging.warning("Server did not report UIDVALIDITY, syncing without saving state")
+        
+        if self.incremental:
+            # Continue after the highest UID of the last run
+            self.sync_state = SyncState(self.local_path)
+            self.last_uid = self.sync_state.last_uid(self.remote_folder, self.uidvalidity, self.month, self.year)
+            self.numbers = yield from select_new_uids_steps(self.last_uid, self.limit, self.month, self.year,
+                                                            self.date_search)
+        else:
+            # Choose the emails to download, newest first, filtering by date on the server
+            self.numbers = yield from select_message_numbers_steps(messages, self.limit, self.month, self.year,
+                                                                   self.date_search, use_uid=self.use_uid)
+        
+        # Decide from the headers which messages to download in full
+        selected = self.numbers
+        if self.two_phase or self.max_size:
+            selected = yield from plan_downloads_steps(self.numbers, self.month, self.year, self.max_size,
+                                                       use_uid=self.use_uid)
+        # Messages left out by the header plan count as processed and skipped
+        self.planned_skips = len(self.numbers) - len(selected)
+        
+        # Leave out the messages an interrupted run already completed
+        if self.resume and self.uidvalidity is not None:
+            self.journal = DownloadJournal(self.local_path, self.remote_folder, self.uidvalidity)
+            pending = self.journal.pending(selected)
+            self.resumed = len(selected) - len(pending)
+            selected = pending
+            if self.resumed:
+                logging.info(f"Resuming: {self.resumed} messages were completed by an earlier run")
+        self.selected = selected
+        self.progress.total = len(selected)
+        return True
+
+    def start(self, server, username):
+        """
+        Report the start of the download of the selected messages.
+
+        Args:
+            server (str): IMAP server address
+            username (str): Email username
+        """
+        self.reporter.start(len(self.selected), server=server, folder=self.remote_folder, username=username)
+        self.start_time = time.time()
+
+    def handle(self, number, msg_items, msg_info=None):
+        """
+        Save one fetched message, record it in the journal and count it.
+
+        Safe to call from several threads at once.
+
+        Args:
+            number (int): Sequence number (or UID) of the message
+            msg_items (dict): Fetched items of the message, None if it could not be fetched
+            msg_info (str, optional): Prefix for log messages
+        """
+        label = msg_info or f"Message {number}"
+        try:
+            # The email was fetched as part of a batch
+            raw_email = get_item(msg_items, 'RFC822') if msg_items else None
+            if raw_email is None:
+                logging.error(f"{label} - Error fetching: no RFC822 data")
+                self.reporter.message(number, 'failed', msg_info, reason="no RFC822 data")
+                self.progress.fail(number)
+                return
+            filepath = save_message(raw_email, number, self.local_path, self.month, self.year,
+                                    msg_info, self.reporter)
+            if filepath is False:
+                # A failed write is not complete and must be retried by the next run
+                self.progress.fail(number)
+                return
+            self.progress.add(bool(filepath))
+            if self.journal is not None:
+                self.journal.record(number, filepath, raw_email, skipped=filepath is None)
+        except Exception as e:
+            logging.error(f"{label} - Error processing message: {e}", exc_info=True)
+            self.progress.fail(number)
+
+    def download(self, server, username, batch_size=100, log_messages=True):
+        """
+        Plan and download the folder over one connection, as workflow steps (see imap_steps).
+
+        Args:
+            server (str): IMAP server address
+            username (str): Email username
+            batch_size (int): Number of messages fetched per FETCH command
+            log_messages (bool): Build a log prefix for every message
+
+        Returns:
+            bool: Result of the download (see finish), False if the folder could not be selected
+        """
+        if not (yield from self.plan()):
+            return False
+        self.start(server, username)
+        total = len(self.selected)
+        position = 0
+        for batch in batches(self.selected, batch_size):
+            fetched = yield from fetch_batch_steps(batch, '(RFC822)', self.use_uid)
+            for number in batch:
+                position += 1
+                # Only build the log prefix if something may log it
+                msg_info = f"[{position}/{total}] Message {number}" if log_messages else None
+                yield work(self.handle, number, fetched.get(number), msg_info)
+                self.reporter.progress(*self.progress.snapshot())
+        return (yield work(self.finish, username))
+
+    def finish(self, username, unprocessed=()):
+        """
+        Write the summary and, for an incremental download, the sync state.
+
+        Args:
+            username (str): Email username
+            unprocessed (iterable): Selected messages that were never fetched
+
+        Returns:
+            bool: For an incremental download, True if no message failed;
+                  otherwise True if a message was saved or resumed and none
+                  was left unfetched
+        """
+        processed, saved, skipped = self.progress.snapshot()
+        # Messages no connection could take count as skipped
+        skipped += self.progress.total - processed
+        duration = time.time() - self.start_time
+        get_metrics().observe('folder_download_seconds', duration)
+        write_summary(self.local_path, username, self.remote_folder, self.month, self.year,
+                      processed + self.planned_skips, saved, skipped + self.planned_skips, duration)
+        self.reporter.finish(processed + self.planned_skips, saved, skipped + self.planned_skips, duration)
+        
+        if self.incremental:
+            # Messages that were not synced stop the stored UID
+            failed = set(self.progress.failed)
+            failed.update(unprocessed)
+            if self.uidvalidity is not None:
+                self.sync_state.update(self.remote_folder, self.uidvalidity,
+                                       synced_up_to(self.numbers, failed, self.last_uid), self.month, self.year)
+                self.sync_state.save()
+            # Nothing new is not an error for a sync
+            return not failed
+        if unprocessed:
+            logging.error(f"{len(unprocessed)} messages were not downloaded, no connection could fetch them")
+            return False
+        return saved > 0 or self.resumed > 0
+
+    def close(self):
+        """
+        Close the journal, if any.
+        """
+        if self.journal is not None:
+            self.journal.close()
+
+
+def download_emails(server, username, password, local_path, remote_folder, limit=50, month=0, year=0,
+                    port=None, use_ssl=True, pool_size=1, batch_size=100, date_search="internal",
+                    incremental=False, two_phase=False, max_size=None, session=None, resume=False,
+                    reporter=None):
     """
     Download emails from a remote folder to a local path.
     
+    In two-phase mode the size and the Date, Subject and From headers of all
+    candidate messages are fetched first (see plan_downloads), and full bodies
+    are only downloaded for the messages that pass the filters.
+    
+    In incremental mode the folder's UIDVALIDITY and highest synced UID are kept
+    in a state file under local_path (see SyncState), later runs fetch only
+    messages with higher UIDs, and files are named by UID instead of sequence
+    number so they stay stable between runs.
+    
+    In resume mode every completed message is recorded in a journal under
+    local_path (see DownloadJournal), and a run after a crash or network drop
+    skips the messages completed before. Files are named by UID as well.
+    
     Args:
         server (str): IMAP server address
         username (str): Email username
         password (str): Email password
         local_path (str): Local path to save emails
         remote_folder (str): Remote folder to download from
-        limit (int): Maximum number of emails to download
+        limit (int): Maximum number of emails to download, newest first
         month (int): Month to filter emails (1-12, 0 for all)
         year (int): Year to filter emails (0 for all)
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        pool_size (int): Number of parallel IMAP connections (see download_emails_parallel)
+        batch_size (int): Number of messages fetched per FETCH command
+        date_search (str): How to apply the month/year filter before downloading:
+                           "internal" (SEARCH on arrival date), "sent" (SEARCH on Date
+                           header), "headers" (fetch Date headers only), or None to
+                           download the newest `limit` messages and filter afterwards
+        incremental (bool): Only download messages added since the last incremental run.
+                            `limit` then caps the new messages taken per run, oldest first.
+        two_phase (bool): Fetch headers first and download only the selected messages
+        max_size (int, optional): Skip messages larger than this many bytes (implies two_phase)
+        session (IMAPSession, optional): Reuse the connection of this session instead of
+                                         connecting and logging in (call through
+                                         IMAPSession.download_emails, which retries if the
+                                         connection drops). Ignored if pool_size > 1.
+        resume (bool): Skip messages completed by an earlier, interrupted run
+        reporter (str or ProgressReporter, optional): How to report progress: "log" (default,
+                                                      every saved message and periodic progress),
+                                                      "periodic", "json", "quiet" or a reporter object
         
     Returns:
         bool: True if successful, False otherwise
     """
+    if pool_size > 1:
+        from .download_emails_parallel import download_emails_parallel
+        return download_emails_parallel(server, username, password, local_path, remote_folder,
+                                        limit=limit, month=month, year=year,
+                                        port=port, use_ssl=use_ssl, pool_size=pool_size,
+                                        chunk_size=batch_size, date_search=date_search,
+                                        incremental=incremental, two_phase=two_phase,
+                                        max_size=max_size, resume=resume, reporter=reporter)
+    
+    reporter = get_reporter(reporter)
+    # Per-message log prefixes are only needed if a reporter or debug logging uses them
+    log_messages = isinstance(reporter, LogReporter) or logging.getLogger().isEnabledFor(logging.DEBUG)
+    
     start_time = datetime.datetime.now()
     logging.info(f"{'='*50}")
     logging.info(f"Starting email download process at {start_time}")
@@ -43,201 +527,35 @@ def download_emails(server, username, password, local_path, remote_folder, limit
         else:
             logging.info(f"Using existing directory: {local_path}")
         
-        # Connect to the server
+        # Connect to the server, or reuse the session's connection
         logging.info(f"Connecting to {server} as {username}...")
-        mail = connect(server, username, password)
+        if session is not None:
+            mail = session.connection()
+        else:
+            mail = connect(server, username, password, port=port, use_ssl=use_ssl)
         if not mail:
             logging.error("Failed to connect to the mail server")
             return False
         logging.info("Successfully connected to the mail server")
+        folder = _FolderDownload(local_path, remote_folder, limit, month, year, date_search, incremental,
+                                 two_phase, max_size, resume, reporter)
         
         try:
-            # Select the remote folder
-            logging.info(f"Selecting folder: {remote_folder}")
-            status, messages = mail.select(remote_folder)
-            if status != 'OK':
-                logging.error(f"Error selecting folder {remote_folder}: {messages}")
-                return False
-            
-            # Get the number of emails in the folder
-            messages = int(messages[0])
-            logging.info(f"Found {messages} messages in {remote_folder}")
-            
-            # Limit the number of emails to download
-            if limit > 0 and messages > limit:
-                logging.info(f"Limiting download to {limit} most recent messages")
-                messages = limit
-            
-            # Download emails
-            count = 0
-            skipped = 0
-            processed = 0
-            last_log_time = time.time()
-            log_interval = 30  # Log progress every 30 seconds
-            processed_since_last_log = 0
-            
-            logging.info(f"Starting to process {messages} messages...")
-            logging.info("-" * 80)
-            logging.info("PROGRESS:  0% |" + " " * 50 + "| 0/{messages} (0 skipped)")
-            start_time = time.time()
-            
-            for i in range(messages, 0, -1):
-                current_time = time.time()
-                processed += 1
-                processed_since_last_log += 1
-                
-                # Log progress every N messages or every N seconds
-                if processed % 100 == 0 or (current_time - last_log_time) >= log_interval:
-                    progress = (processed / messages) * 100
-                    progress_bar = "=" * int(progress // 2) + ">" + " " * (50 - int(progress // 2) - 1)
-                    elapsed = current_time - start_time
-                    msgs_per_sec = processed_since_last_log / (current_time - last_log_time) if (current_time - last_log_time) > 0 else 0
-                    
-                    logging.info(
-                        f"PROGRESS: {progress:3.0f}% |{progress_bar}| "
-                        f"{processed}/{messages} ({skipped} skipped) | "
-                        f"{msgs_per_sec:.1f} msg/s | "
-                        f"Elapsed: {elapsed//60:.0f}m {elapsed%60:.0f}s"
-                    )
-                    last_log_time = current_time
-                    processed_since_last_log = 0
-                
-                msg_info = f"[{processed}/{messages}] Message {i}"
-                
-                try:
-                    # Fetch the email
-                    logging.debug(f"{msg_info} - Fetching...")
-                    status, msg_data = mail.fetch(str(i), '(RFC822)')
-                    if status != 'OK':
-                        logging.error(f"{msg_info} - Error fetching: {msg_data}")
-                        skipped += 1
-                        continue
-                    
-                    # Parse the email
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
-                    
-                    # Get email date
-                    date_str = msg.get('Date', 'No Date')
-                    logging.debug(f"{msg_info} - Date: {date_str}")
-                    
-                    if date_str != 'No Date':
-                        try:
-                            # Parse the date
-                            date_tuple = email.utils.parsedate_tz(date_str)
-                            if date_tuple:
-                                date = datetime.datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
-                                logging.debug(f"{msg_info} - Parsed date: {date}")
-                                
-                                # Filter by month and year if specified
-                                if month > 0 and date.month != month:
-                                    logging.debug(f"{msg_info} - Skipping (wrong month: {date.month} != {month})")
-                                    skipped += 1
-                                    continue
-                                if year > 0 and date.year != year:
-                                    logging.debug(f"{msg_info} - Skipping (wrong year: {date.year} != {year})")
-                                    skipped += 1
-                                    continue
-                        except Exception as e:
-                            logging.error(f"{msg_info} - Error parsing date {date_str}: {e}", exc_info=True)
-                    
-                    # Get email subject and from
-                    subject = msg.get('Subject', 'No Subject')
-                    from_ = msg.get('From', 'Unknown Sender')
-                    logging.debug(f"{msg_info} - From: {from_}")
-                    
-                    if subject:
-                        subject = decode_header(subject)[0][0]
-                        if isinstance(subject, bytes):
-                            try:
-                                subject = subject.decode('utf-8', errors='replace')
-                            except Exception as e:
-                                logging.error(f"{msg_info} - Error decoding subject: {e}")
-                                subject = 'Decode_Error'
-                    
-                    # Clean subject for filename
-                    clean_subject = "".join(c if c.isalnum() or c in ' -_' else '_' for c in subject)
-                    clean_subject = clean_subject[:50]  # Limit subject length
-                    
-                    # Generate filename with date and subject
-                    if date_str != 'No Date' and 'date' in locals():
-                        date_prefix = date.strftime('%Y%m%d_%H%M%S_')
-                    else:
-                        date_prefix = ''
-                        
-                    filename = f"{date_prefix}{i:04d}_{clean_subject}.eml"
-                    filepath = os.path.join(local_path, filename)
-                    
-                    # Log message info
-                    msg_log = (
-                        f"{msg_info} - Subject: {subject[:100]}{'...' if len(subject) > 100 else ''} | "
-                        f"From: {from_[:50]}{'...' if len(from_) > 50 else ''} | "
-                        f"Date: {date_str}"
-                    )
-                    logging.info(msg_log)
-                    
-                    # Save the email
-                    try:
-                        with open(filepath, 'wb') as f:
-                            f.write(raw_email)
-                        count += 1
-                        logging.debug(f"{msg_info} - Saved to: {filepath}")
-                    except Exception as e:
-                        logging.error(f"{msg_info} - Error saving email: {e}", exc_info=True)
-                        skipped += 1
-                        continue
-                        
-                except Exception as e:
-                    logging.error(f"{msg_info} - Error processing message: {e}", exc_info=True)
-                    skipped += 1
-                    continue
-            
-            # Log summary
-            duration = time.time() - start_time
-            hours, rem = divmod(duration, 3600)
-            minutes, seconds = divmod(rem, 60)
-            
-            summary = (
-                f"\n{'='*80}\n"
-                f"DOWNLOAD SUMMARY\n"
-                f"{'='*80}\n"
-                f"{'Account:':<20} {username}\n"
-                f"{'Folder:':<20} {remote_folder}\n"
-                f"{'Time period:':<20} {month or 'All'}/{year or 'All'}\n"
-                f"{'Local path:':<20} {os.path.abspath(local_path)}\n"
-                f"{'='*80}\n"
-                f"{'Total processed:':<20} {processed}\n"
-                f"{'Successfully saved:':<20} {count}\n"
-                f"{'Skipped:':<20} {skipped}\n"
-                f"{'Success rate:':<20} {(count/processed*100 if processed > 0 else 0):.1f}%\n"
-                f"{'='*80}\n"
-                f"{'Duration:':<20} {int(hours):02d}h {int(minutes):02d}m {int(seconds):02d}s\n"
-                f"{'Avg time per msg:':<20} {(duration/processed if processed > 0 else 0):.2f} seconds\n"
-                f"{'Messages per hour:':<20} {(processed/duration*3600 if duration > 0 else 0):.1f}\n"
-                f"{'='*80}"
-            )
-            logging.info(summary)
-            
-            # Save summary to file
-            try:
-                summary_file = os.path.join(local_path, 'download_summary.txt')
-                with open(summary_file, 'w') as f:
-                    f.write(summary)
-                logging.info(f"Summary saved to: {summary_file}")
-            except Exception as e:
-                logging.error(f"Failed to save summary file: {e}")
-            
-            return count > 0
-            
+            return run_steps(mail, folder.download(server, username, batch_size, log_messages))
         finally:
-            # Always close the connection
+            folder.close()
+            # Always close the connection, the session keeps its own open
             try:
                 mail.close()
-                mail.logout()
-                logging.info("Closed connection to mail server")
+                if session is None:
+                    mail.logout()
+                    logging.info("Closed connection to mail server")
             except Exception as e:
                 logging.error(f"Error closing connection: {e}", exc_info=True)
     
     except Exception as e:
+        if session is not None and isinstance(e, (imaplib.IMAP4.abort, OSError)):
+            # The session reconnects and runs the download again
+            raise
         logging.error(f"Critical error in download_emails: {e}", exc_info=True)
         return False
@@ -0,0 +1,77 @@
+"""
+Functions for downloading emails from asyncio code.
+"""
+
+import os
+import logging
+from .connect_async import connect_async
+from .download_emails import _FolderDownload
+from .imap_steps import run_steps_async
+from .reporters import get_reporter
+
+
+async def download_emails_async(server, username, password, local_path, remote_folder, limit=50, month=0, year=0,
+                                port=None, use_ssl=True, batch_size=100, date_search="internal",
+                                incremental=False, two_phase=False, max_size=None, resume=False, reporter=None,
+                                limiter=None):
+    """
+    Download emails from a remote folder to a local path over an asyncio connection.
+
+    Works like download_emails, so many accounts can be synced concurrently
+    from one event loop, e.g. with asyncio.gather. Files are written in a
+    worker thread so the event loop keeps serving other connections.
+
+    Args:
+        server (str): IMAP server address
+        username (str): Email username
+        password (str): Email password
+        local_path (str): Local path to save emails
+        remote_folder (str): Remote folder to download from
+        limit (int): Maximum number of emails to download, newest first
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        batch_size (int): Number of messages fetched per FETCH command
+        date_search (str): How to apply the month/year filter before downloading (see download_emails)
+        incremental (bool): Only download messages added since the last incremental run
+        two_phase (bool): Fetch headers first and download only the selected messages
+        max_size (int, optional): Skip messages larger than this many bytes (implies two_phase)
+        resume (bool): Skip messages completed by an earlier, interrupted run (see download_emails)
+        reporter (str or ProgressReporter, optional): How to report progress (see download_emails)
+        limiter (ServerLimiter, optional): Bounds concurrent connections per server
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if limiter is not None:
+        async with limiter.slot(server):
+            return await download_emails_async(server, username, password, local_path, remote_folder,
+                                               limit, month, year, port, use_ssl, batch_size, date_search,
+                                               incremental, two_phase, max_size, resume, reporter)
+
+    reporter = get_reporter(reporter)
+    logging.info(f"Starting async email download: {server}, Folder: {remote_folder}, User: {username}")
+    try:
+        os.makedirs(local_path, exist_ok=True)
+
+        mail = await connect_async(server, username, password, port=port, use_ssl=use_ssl)
+        if not mail:
+            logging.error("Failed to connect to the mail server")
+            return False
+
+        folder = _FolderDownload(local_path, remote_folder, limit, month, year, date_search, incremental,
+                                 two_phase, max_size, resume, reporter)
+        try:
+            return await run_steps_async(mail, folder.download(server, username, batch_size))
+        finally:
+            folder.close()
+            try:
+                await mail.close()
+                await mail.logout()
+            except Exception as e:
+                logging.error(f"Error closing connection: {e}")
+
+    except Exception as e:
+        logging.error(f"Critical error in download_emails_async: {e}", exc_info=True)
+        return False
@@ -0,0 +1,175 @@
+"""
+Functions for downloading emails over a pool of IMAP connections.
+"""
+
+import os
+import queue
+import imaplib
+import logging
+import threading
+from .connect import connect
+from .fetch_messages import fetch_messages
+from .download_emails import ProgressCounter, _FolderDownload
+from .imap_steps import run_steps
+from .reporters import get_reporter
+
+
+def _worker(server, username, password, remote_folder, port, use_ssl, chunks, folder):
+    """
+    Download message chunks from the queue over one IMAP connection.
+
+    Args:
+        server (str): IMAP server address
+        username (str): Email username
+        password (str): Email password
+        remote_folder (str): Remote folder to download from
+        port (int): Server port
+        use_ssl (bool): Connect over SSL/TLS
+        chunks (queue.Queue): Lists of message sequence numbers (or UIDs) to download
+        folder (_FolderDownload): The planned download the messages belong to
+    """
+    name = threading.current_thread().name
+    mail = connect(server, username, password, port=port, use_ssl=use_ssl)
+    if not mail:
+        logging.error(f"{name} - Could not connect, leaving work to other connections")
+        return
+    try:
+        status, messages = mail.select(remote_folder)
+        if status != 'OK':
+            logging.error(f"{name} - Error selecting folder {remote_folder}: {messages}")
+            return
+
+        while True:
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                return
+            # Each chunk is fetched with a single FETCH command
+            done = 0
+            try:
+                for i, msg_items in fetch_messages(mail, chunk, '(RFC822)', batch_size=len(chunk),
+                                                   use_uid=folder.use_uid):
+                    folder.handle(i, msg_items, f"[{name}] Message {i}")
+                    done += 1
+            except (imaplib.IMAP4.abort, OSError) as e:
+                # Hand the rest of the chunk to the healthy connections
+                logging.error(f"{name} - Connection lost ({e}), leaving {len(chunk) - done} messages "
+                              f"to other connections")
+                chunks.put(chunk[done:])
+                return
+            except Exception as e:
+                logging.error(f"{name} - Error fetching messages: {e}")
+                for i in chunk[done:]:
+                    folder.progress.fail(i)
+                return
+    finally:
+        try:
+            mail.close()
+            mail.logout()
+        except Exception as e:
+            logging.error(f"{name} - Error closing connection: {e}")
+
+
+def download_emails_parallel(server, username, password, local_path, remote_folder, limit=50, month=0, year=0,
+                             port=None, use_ssl=True, pool_size=4, chunk_size=50, progress=None,
+                             date_search="internal", incremental=False, two_phase=False,
+                             max_size=None, resume=False, reporter=None):
+    """
+    Download emails over several authenticated IMAP connections at once.
+
+    The newest `limit` matching messages are split into chunks of sequence numbers that
+    the connections take from a shared queue, so round trips to the server
+    overlap instead of running one after another. Each connection writes its
+    messages directly to `local_path`.
+
+    Args:
+        server (str): IMAP server address
+        username (str): Email username
+        password (str): Email password
+        local_path (str): Local path to save emails
+        remote_folder (str): Remote folder to download from
+        limit (int): Maximum number of emails to download (0 for all)
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        port (int, optional): Server port. Defaults to 993 with SSL, 143 without.
+        use_ssl (bool): Connect over SSL/TLS
+        pool_size (int): Number of parallel IMAP connections
+        chunk_size (int): Number of messages a connection takes from the queue and
+                          fetches with one FETCH command
+        progress (ProgressCounter, optional): Counter to report progress into,
+                                              e.g. to monitor it from another thread
+        date_search (str): How to apply the month/year filter before downloading
+                           (see download_emails)
+        incremental (bool): Only download messages added since the last incremental
+                            run (see download_emails)
+        two_phase (bool): Fetch headers first and download only the selected messages
+        max_size (int, optional): Skip messages larger than this many bytes (implies two_phase)
+        resume (bool): Skip messages completed by an earlier, interrupted run
+                       (see download_emails)
+        reporter (str or ProgressReporter, optional): How to report progress (see download_emails)
+
+    Returns:
+        bool: True if at least one email was saved, False otherwise
+    """
+    reporter = get_reporter(reporter)
+    logging.info(f"Starting parallel email download with {pool_size} connections")
+    logging.info(f"Server: {server}, Folder: {remote_folder}, User: {username}")
+
+    folder = _FolderDownload(local_path, remote_folder, limit, month, year, date_search, incremental,
+                             two_phase, max_size, resume, reporter, progress)
+    try:
+        os.makedirs(local_path, exist_ok=True)
+
+        # Choose the messages over a first connection
+        mail = connect(server, username, password, port=port, use_ssl=use_ssl)
+        if not mail:
+            logging.error("Failed to connect to the mail server")
+            return False
+        try:
+            if not run_steps(mail, folder.plan()):
+                return False
+        finally:
+            try:
+                mail.close()
+                mail.logout()
+            except Exception as e:
+                logging.error(f"Error closing connection: {e}")
+
+        # Split the messages into chunks
+        selected = folder.selected
+        chunks = queue.Queue()
+        # Smaller chunks when needed so every connection gets work
+        chunk_size = max(1, min(chunk_size, -(-len(selected) // max(1, pool_size))))
+        for position in range(0, len(selected), chunk_size):
+            chunks.put(selected[position:position + chunk_size])
+
+        threads = [
+            threading.Thread(
+                target=_worker,
+                name=f"imap-{index + 1}",
+                args=(server, username, password, remote_folder, port, use_ssl, chunks, folder),
+                daemon=True,
+            )
+            for index in range(max(1, min(pool_size, chunks.qsize())))
+        ]
+        folder.start(server, username)
+        for thread in threads:
+            thread.start()
+
+        # Report progress until all connections are done
+        poll_interval = 1
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=poll_interval / len(threads))
+            reporter.progress(*folder.progress.snapshot())
+
+        # Chunks no connection could take were not synced either
+        unprocessed = []
+        while not chunks.empty():
+            unprocessed.extend(chunks.get_nowait())
+        return folder.finish(username, unprocessed)
+    except Exception as e:
+        logging.error(f"Critical error in download_emails_parallel: {e}", exc_info=True)
+        return False
+    finally:
+        folder.close()
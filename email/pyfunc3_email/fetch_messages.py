@@ -0,0 +1,317 @@
+"""
+Functions for fetching many messages per IMAP round trip.
+"""
+
+import re
+import time
+import imaplib
+import logging
+from .imap_steps import command, run_steps, run_steps_async
+from .metrics import get_metrics
+
+
+class _Literal:
+    """Placeholder for a literal ({n} followed by n bytes) in a response."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _lex(text):
+    """
+    Split response text into tokens: '(', ')', quoted strings, and atoms.
+
+    Atoms keep bracketed sections whole, e.g. BODY[HEADER.FIELDS (DATE FROM)]<0>.
+    A trailing literal marker {n} is dropped since the literal follows separately.
+
+    Args:
+        text (bytes): Response text
+
+    Returns:
+        list: Tokens as str, or (str,) tuples for quoted strings
+    """
+    text = text.decode('utf-8', errors='replace')
+    text = re.sub(r'\{\d+\}$', '', text)
+    tokens = []
+    position = 0
+    size = len(text)
+    while position < size:
+        char = text[position]
+        if char in ' \r\n':
+            position += 1
+        elif char in '()':
+            tokens.append(char)
+            position += 1
+        elif char == '"':
+            end = position + 1
+            value = []
+            while end < size and text[end] != '"':
+                if text[end] == '\\' and end + 1 < size:
+                    end += 1
+                value.append(text[end])
+                end += 1
+            tokens.append(("".join(value),))
+            position = end + 1
+        else:
+            end = position
+            depth = 0
+            while end < size:
+                char = text[end]
+                if char == '[':
+                    depth += 1
+                elif char == ']':
+                    depth -= 1
+                elif depth == 0 and char in ' ()':
+                    break
+                end += 1
+            tokens.append(text[position:end])
+            position = end
+    return tokens
+
+
+def _tokens(data):
+    """
+    Turn imaplib response data into one token stream with literal placeholders.
+
+    Args:
+        data (list): Response data of imaplib (bytes and (bytes, literal) tuples)
+
+    Returns:
+        generator: Tokens and _Literal objects
+    """
+    for element in data:
+        if element is None:
+            continue
+        if isinstance(element, tuple):
+            for token in _lex(element[0]):
+                yield token
+            yield _Literal(element[1])
+        else:
+            for token in _lex(element):
+                yield token
+
+
+def _parse_value(tokens, position):
+    """
+    Parse one value (atom, number, NIL, string, literal or list) from a token list.
+
+    Args:
+        tokens (list): Tokens
+        position (int): Index of the value
+
+    Returns:
+        tuple: (value, index after the value)
+    """
+    token = tokens[position]
+    if isinstance(token, _Literal):
+        return token.data, position + 1
+    if isinstance(token, tuple):
+        return token[0], position + 1
+    if token == '(':
+        values = []
+        position += 1
+        while position < len(tokens) and tokens[position] != ')':
+            value, position = _parse_value(tokens, position)
+            values.append(value)
+        return values, position + 1
+    if token.upper() == 'NIL':
+        return None, position + 1
+    if token.isdigit():
+        return int(token), position + 1
+    return token, position + 1
+
+
+def parse_fetch_response(data):
+    """
+    Parse the data of a FETCH command into one entry per message.
+
+    Works for any number of messages and items per response, including
+    several literals per message. Entries for the same message (e.g. an
+    unsolicited FLAGS update) are merged.
+
+    Args:
+        data (list): Response data returned by imaplib's fetch or uid('FETCH', ...)
+
+    Returns:
+        list: (sequence_number, items) tuples in response order, where items maps
+              upper-cased item names (BODY.PEEK is reported as BODY) to values
+    """
+    tokens = list(_tokens(data))
+    messages = []
+    by_number = {}
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        if not (isinstance(token, str) and token.isdigit()) or position + 1 >= len(tokens) or tokens[position + 1] != '(':
+            position += 1
+            continue
+        number = int(token)
+        position += 2
+        items = by_number.get(number)
+        if items is None:
+            items = {}
+            by_number[number] = items
+            messages.append((number, items))
+        while position < len(tokens) and tokens[position] != ')':
+            name = tokens[position]
+            if not isinstance(name, str):
+                position += 1
+                continue
+            value, position = _parse_value(tokens, position + 1)
+            items[name.upper()] = value
+        position += 1
+    return messages
+
+
+def get_item(items, prefix):
+    """
+    Get a fetched item by name prefix, e.g. "BODY[HEADER" for a header-fields section.
+
+    Args:
+        items (dict): Items of one message from parse_fetch_response
+        prefix (str): Upper-case item name or name prefix
+
+    Returns:
+        Any: The item value, or None if not present
+    """
+    if prefix in items:
+        return items[prefix]
+    for name, value in items.items():
+        if name.startswith(prefix):
+            return value
+    return None
+
+
+def message_set(numbers):
+    """
+    Build a compact IMAP message set, e.g. [1, 2, 3, 7] -> "1:3,7".
+
+    Args:
+        numbers (list): Sequence numbers or UIDs
+
+    Returns:
+        str: IMAP message set
+    """
+    ranges = []
+    for number in sorted(set(numbers)):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ",".join(str(start) if start == end else f"{start}:{end}" for start, end in ranges)
+
+
+def _items_by_number(data, use_uid=False):
+    """
+    Map the messages of a FETCH response to their items.
+
+    Args:
+        data (list): Response data of a FETCH command
+        use_uid (bool): Key by UID instead of sequence number
+
+    Returns:
+        dict: Number (or UID) to items
+    """
+    fetched = {}
+    for sequence_number, message_items in parse_fetch_response(data):
+        key = message_items.get('UID') if use_uid else sequence_number
+        if key is not None:
+            fetched.setdefault(key, {}).update(message_items)
+    return fetched
+
+
+def batches(numbers, batch_size):
+    """
+    Split message numbers into batches for one FETCH command each.
+
+    Args:
+        numbers (iterable): Sequence numbers or UIDs
+        batch_size (int): Maximum number of messages per batch
+
+    Returns:
+        generator: Lists of numbers, in the given order
+    """
+    batch_size = max(1, batch_size)
+    numbers = list(numbers)
+    for start in range(0, len(numbers), batch_size):
+        yield numbers[start:start + batch_size]
+
+
+def fetch_batch_steps(batch, items='(RFC822)', use_uid=False):
+    """
+    Fetch one batch of messages with a single FETCH command, as workflow steps (see imap_steps).
+
+    Args:
+        batch (list): Sequence numbers (or UIDs if use_uid) to fetch
+        items (str): FETCH items, e.g. "(RFC822)"
+        use_uid (bool): Treat numbers as UIDs and use UID FETCH
+
+    Returns:
+        dict: Number (or UID) to items, empty if the FETCH failed
+    """
+    fetch_start = time.perf_counter()
+    try:
+        if use_uid:
+            status, data = yield command('uid', 'FETCH', message_set(batch), items)
+        else:
+            status, data = yield command('fetch', message_set(batch), items)
+    except imaplib.IMAP4.abort:
+        # The connection is lost, callers reconnect or give up
+        raise
+    except imaplib.IMAP4.error as e:
+        logging.error(f"Error fetching messages {message_set(batch)}: {e}")
+        status, data = 'NO', [str(e).encode()]
+    get_metrics().observe('imap_fetch_seconds', time.perf_counter() - fetch_start)
+    if status != 'OK':
+        logging.error(f"Error fetching messages {message_set(batch)}: {data}")
+        get_metrics().inc('imap_fetch_errors_total')
+        return {}
+
+    fetched = _items_by_number(data, use_uid)
+    get_metrics().inc('imap_fetched_messages_total', len(fetched))
+    return fetched
+
+
+def fetch_messages(mail, numbers, items='(RFC822)', batch_size=100, use_uid=False):
+    """
+    Fetch messages in batches, one FETCH command per batch.
+
+    Memory use is bounded by the batch: only one batch of responses is held
+    at a time.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        numbers (list): Sequence numbers (or UIDs if use_uid) to fetch, in the order to yield them
+        items (str): FETCH items, e.g. "(RFC822)"
+        batch_size (int): Maximum number of messages per FETCH command
+        use_uid (bool): Treat numbers as UIDs and use UID FETCH
+
+    Returns:
+        generator: (number, items) for each requested number, items None if the
+                   message could not be fetched
+    """
+    for batch in batches(numbers, batch_size):
+        fetched = run_steps(mail, fetch_batch_steps(batch, items, use_uid))
+        for number in batch:
+            yield number, fetched.get(number)
+
+
+async def fetch_messages_async(mail, numbers, items='(RFC822)', batch_size=100, use_uid=False):
+    """
+    Fetch messages in batches over an AsyncIMAPClient (see fetch_messages).
+
+    Args:
+        mail (AsyncIMAPClient): Connection with a selected folder
+        numbers (list): Sequence numbers (or UIDs if use_uid) to fetch, in the order to yield them
+        items (str): FETCH items, e.g. "(RFC822)"
+        batch_size (int): Maximum number of messages per FETCH command
+        use_uid (bool): Treat numbers as UIDs and use UID FETCH
+
+    Returns:
+        async generator: (number, items) for each requested number, items None if
+                         the message could not be fetched
+    """
+    for batch in batches(numbers, batch_size):
+        fetched = await run_steps_async(mail, fetch_batch_steps(batch, items, use_uid))
+        for number in batch:
+            yield number, fetched.get(number)
@@ -0,0 +1,130 @@
+"""
+Functions for running one IMAP workflow over imaplib or over AsyncIMAPClient.
+
+A workflow is written once as a generator of steps: it yields the IMAP
+commands (see command) and the blocking local work, such as parsing and
+writing files (see work), that it needs, and receives each result back, or
+the exception it raised. Workflows nest with `yield from`.
+
+run_steps executes a workflow over a blocking imaplib connection.
+run_steps_async awaits the commands of an AsyncIMAPClient and runs the
+local work in the default executor, so the event loop keeps serving other
+connections.
+"""
+
+import asyncio
+import inspect
+import functools
+
+
+class _Command:
+    """An IMAP command: a method of the connection and its arguments."""
+
+    __slots__ = ('method', 'args')
+
+    def __init__(self, method, args):
+        self.method = method
+        self.args = args
+
+
+class _Work:
+    """Blocking local work: a function and its arguments."""
+
+    __slots__ = ('function', 'args')
+
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+
+
+def command(method, *args):
+    """
+    Build the step running an IMAP command, e.g. `status, data = yield command('select', 'INBOX')`.
+
+    Args:
+        method (str): Name of the connection method, as in imaplib, e.g. "uid"
+        *args: Arguments of the method
+
+    Returns:
+        _Command: Step to yield
+    """
+    return _Command(method, args)
+
+
+def work(function, *args):
+    """
+    Build the step running blocking local work, e.g. writing a file.
+
+    Args:
+        function (callable): Function to call
+        *args: Arguments of the function
+
+    Returns:
+        _Work: Step to yield
+    """
+    return _Work(function, args)
+
+
+def _advance(steps, value, error):
+    """Send the result of the last step into a workflow and get its next step."""
+    if error is not None:
+        return steps.throw(error)
+    return steps.send(value)
+
+
+def run_steps(mail, steps):
+    """
+    Run a workflow over a blocking connection.
+
+    Args:
+        mail (imaplib.IMAP4): Connection to run the IMAP commands on
+        steps (generator): Workflow yielding command and work steps
+
+    Returns:
+        Any: Return value of the workflow
+    """
+    value = error = None
+    while True:
+        try:
+            step = _advance(steps, value, error)
+        except StopIteration as stop:
+            return stop.value
+        value = error = None
+        try:
+            if isinstance(step, _Command):
+                value = getattr(mail, step.method)(*step.args)
+            else:
+                value = step.function(*step.args)
+        except Exception as e:
+            error = e
+
+
+async def run_steps_async(mail, steps):
+    """
+    Run a workflow over an AsyncIMAPClient, with its local work in the default executor.
+
+    Args:
+        mail (AsyncIMAPClient): Connection to run the IMAP commands on
+        steps (generator): Workflow yielding command and work steps
+
+    Returns:
+        Any: Return value of the workflow
+    """
+    loop = asyncio.get_running_loop()
+    value = error = None
+    while True:
+        try:
+            step = _advance(steps, value, error)
+        except StopIteration as stop:
+            return stop.value
+        value = error = None
+        try:
+            if isinstance(step, _Command):
+                value = getattr(mail, step.method)(*step.args)
+                # Methods that only read the last response, e.g. response(), are not coroutines
+                if inspect.isawaitable(value):
+                    value = await value
+            else:
+                value = await loop.run_in_executor(None, functools.partial(step.function, *step.args))
+        except Exception as e:
+            error = e
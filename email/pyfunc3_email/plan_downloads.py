@@ -0,0 +1,114 @@
+"""
+Functions for deciding which messages to download from their headers alone.
+"""
+
+import email
+import logging
+from .fetch_messages import batches, fetch_batch_steps, fetch_messages, get_item
+from .imap_steps import run_steps
+from .search_messages import date_matches
+
+
+# Everything save_message needs to filter and name a message
+HEADER_ITEMS = '(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (DATE SUBJECT FROM)])'
+
+
+def fetch_headers(mail, numbers, batch_size=500, use_uid=False):
+    """
+    Fetch the size and the Date, Subject and From headers of messages.
+
+    One FETCH command covers a whole batch and no message body is transferred.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        numbers (list): Sequence numbers (or UIDs if use_uid)
+        batch_size (int): Number of messages per FETCH command
+        use_uid (bool): Treat numbers as UIDs
+
+    Returns:
+        generator: Dicts with number, size, date, subject and from (None where
+                   unknown), in the given order
+    """
+    for number, items in fetch_messages(mail, numbers, HEADER_ITEMS, batch_size, use_uid):
+        yield _header_info(number, items)
+
+
+def _header_info(number, items):
+    """Turn the fetched HEADER_ITEMS of a message into a dict."""
+    info = {'number': number, 'size': None, 'date': None, 'subject': None, 'from': None}
+    if items:
+        info['size'] = items.get('RFC822.SIZE')
+        header = get_item(items, 'BODY[HEADER')
+        if header:
+            msg = email.message_from_bytes(header)
+            info['date'] = msg.get('Date')
+            info['subject'] = msg.get('Subject')
+            info['from'] = msg.get('From')
+    return info
+
+
+class _Plan:
+    """Collects the planning decisions and logs them."""
+
+    def __init__(self, month, year, max_size):
+        self.month = month
+        self.year = year
+        self.max_size = max_size
+        self.selected = []
+        self.too_large = 0
+        self.wrong_date = 0
+
+    def add(self, info):
+        number = info['number']
+        if self.max_size and info['size'] is not None and info['size'] > self.max_size:
+            logging.debug(f"Message {number} - Skipping (size {info['size']} > {self.max_size})")
+            self.too_large += 1
+        elif (self.month or self.year) and not date_matches(info['date'], self.month, self.year):
+            logging.debug(f"Message {number} - Skipping (date {info['date']} outside {self.month}/{self.year})")
+            self.wrong_date += 1
+        else:
+            self.selected.append(number)
+
+    def result(self, total):
+        logging.info(
+            f"Planned {len(self.selected)} of {total} messages "
+            f"({self.wrong_date} outside the date filter, {self.too_large} too large)"
+        )
+        return self.selected
+
+
+def plan_downloads_steps(numbers, month=0, year=0, max_size=None, batch_size=500, use_uid=False):
+    """
+    Choose the messages worth downloading, as workflow steps (see plan_downloads).
+
+    Returns:
+        list: Selected numbers, in the given order
+    """
+    plan = _Plan(month, year, max_size)
+    for batch in batches(numbers, batch_size):
+        fetched = yield from fetch_batch_steps(batch, HEADER_ITEMS, use_uid)
+        for number in batch:
+            plan.add(_header_info(number, fetched.get(number)))
+    return plan.result(len(numbers))
+
+
+def plan_downloads(mail, numbers, month=0, year=0, max_size=None, batch_size=500, use_uid=False):
+    """
+    Choose the messages worth downloading in full, based on their headers.
+
+    Messages whose headers could not be fetched are kept, so the full
+    download can still decide about them.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        numbers (list): Sequence numbers (or UIDs if use_uid) to consider
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        max_size (int, optional): Skip messages larger than this many bytes
+        batch_size (int): Number of messages per header FETCH command
+        use_uid (bool): Treat numbers as UIDs
+
+    Returns:
+        list: Selected numbers, in the given order
+    """
+    return run_steps(mail, plan_downloads_steps(numbers, month, year, max_size, batch_size, use_uid))
@@ -0,0 +1,206 @@
+"""
+Progress reporters for the email download loops.
+
+The download loops only pass raw values to a reporter; formatting happens in
+the reporter and only for what it actually emits, so a quiet or periodic
+reporter costs next to nothing per message.
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+
+
+def _shorten(text, length):
+    """Cut text to length characters, marking the cut with "..."."""
+    text = str(text)
+    return text if len(text) <= length else text[:length] + "..."
+
+
+class ProgressReporter:
+    """
+    Base reporter that reports nothing. Subclasses override the events they need.
+
+    All methods may be called from several download threads at once.
+    """
+
+    def start(self, total, **info):
+        """
+        Report the start of a download.
+
+        Args:
+            total (int): Number of messages that will be fetched
+            **info: Server, folder and username of the download
+        """
+
+    def message(self, number, status, msg_info=None, **details):
+        """
+        Report one handled message.
+
+        Args:
+            number (int): Sequence number or UID of the message
+            status (str): "saved", "skipped" or "failed"
+            msg_info (str, optional): Prefix for log messages, e.g. "[3/40] Message 12"
+            **details: Values such as path, subject, sender, date or reason
+        """
+
+    def progress(self, processed, saved, skipped):
+        """
+        Report the counters after a message. Called for every message, so it must be cheap.
+
+        Args:
+            processed (int): Number of processed messages
+            saved (int): Number of saved messages
+            skipped (int): Number of skipped messages
+        """
+
+    def finish(self, processed, saved, skipped, duration):
+        """
+        Report the end of a download.
+
+        Args:
+            processed (int): Number of processed messages
+            saved (int): Number of saved messages
+            skipped (int): Number of skipped messages
+            duration (float): Duration of the download in seconds
+        """
+
+
+class QuietReporter(ProgressReporter):
+    """
+    Reports nothing; errors are still logged by the download functions.
+    """
+
+
+class PeriodicReporter(ProgressReporter):
+    """
+    Logs a progress line every `every` messages or `interval` seconds.
+    """
+
+    def __init__(self, interval=30, every=100, logger=None):
+        """
+        Initialize the PeriodicReporter.
+
+        Args:
+            interval (float): Seconds between progress lines
+            every (int): Messages between progress lines (0 to only use interval)
+            logger (logging.Logger, optional): Logger to write to. Defaults to the root logger.
+        """
+        self.interval = interval
+        self.every = every
+        self.logger = logger or logging.getLogger()
+        self.total = 0
+        self._start_time = None
+        self._last_time = None
+        self._last_processed = 0
+        self._lock = threading.Lock()
+
+    def start(self, total, **info):
+        self.total = total
+        self._start_time = self._last_time = time.monotonic()
+        self._last_processed = 0
+        self.logger.info("Starting to process %d messages...", total)
+
+    def progress(self, processed, saved, skipped):
+        now = time.monotonic()
+        if not (self.every and processed % self.every == 0) and now - self._last_time < self.interval:
+            return
+        with self._lock:
+            if now - self._last_time <= 0:
+                return
+            rate = (processed - self._last_processed) / (now - self._last_time)
+            self._last_time = now
+            self._last_processed = processed
+        percent = processed / self.total * 100 if self.total else 100
+        elapsed = now - self._start_time
+        bar = "=" * int(percent // 2) + ">" + " " * (50 - int(percent // 2) - 1)
+        self.logger.info("PROGRESS: %3.0f%% |%s| %d/%d (%d skipped) | %.1f msg/s | Elapsed: %.0fm %.0fs",
+                         percent, bar, processed, self.total, skipped, rate, elapsed // 60, elapsed % 60)
+
+
+class LogReporter(PeriodicReporter):
+    """
+    Logs every saved message with its subject, sender and date, plus periodic progress lines.
+    """
+
+    def message(self, number, status, msg_info=None, **details):
+        if status != 'saved' or not self.logger.isEnabledFor(logging.INFO):
+            return
+        self.logger.info("%s - Subject: %s | From: %s | Date: %s", msg_info or f"Message {number}",
+                         _shorten(details.get('subject'), 100), _shorten(details.get('sender'), 50),
+                         details.get('date'))
+
+
+class JSONReporter(ProgressReporter):
+    """
+    Writes one JSON object per event and message, for log shippers and dashboards.
+
+    Events are "start", "message" and "finish", each with a Unix "time".
+    """
+
+    def __init__(self, stream=None, messages=True):
+        """
+        Initialize the JSONReporter.
+
+        Args:
+            stream (file or str, optional): File object or path to append the events to.
+                                            Defaults to stderr.
+            messages (bool): Write an event for every message, not only start and finish
+        """
+        self._owns_stream = isinstance(stream, str)
+        self.stream = open(stream, 'a', encoding='utf-8') if self._owns_stream else (stream or sys.stderr)
+        self.messages = messages
+        self._lock = threading.Lock()
+
+    def _write(self, event, **fields):
+        line = json.dumps(dict(event=event, time=round(time.time(), 3), **fields), ensure_ascii=False, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def start(self, total, **info):
+        self._write('start', total=total, **info)
+
+    def message(self, number, status, msg_info=None, **details):
+        if self.messages:
+            self._write('message', number=number, status=status, **details)
+
+    def finish(self, processed, saved, skipped, duration):
+        self._write('finish', processed=processed, saved=saved, skipped=skipped, duration=round(duration, 3))
+
+    def close(self):
+        """
+        Close the stream if the reporter opened it.
+        """
+        if self._owns_stream:
+            self.stream.close()
+
+
+REPORTERS = {
+    'quiet': QuietReporter,
+    'periodic': PeriodicReporter,
+    'log': LogReporter,
+    'json': JSONReporter,
+}
+
+
+def get_reporter(reporter=None):
+    """
+    Get a reporter by name, or return a reporter object unchanged.
+
+    Args:
+        reporter (str or ProgressReporter, optional): "quiet", "periodic", "log"
+                                                      or "json". Defaults to "log".
+
+    Returns:
+        ProgressReporter: The reporter
+    """
+    if reporter is None:
+        return LogReporter()
+    if isinstance(reporter, str):
+        if reporter not in REPORTERS:
+            raise ValueError(f"Unknown reporter {reporter!r}, expected one of {', '.join(REPORTERS)}")
+        return REPORTERS[reporter]()
+    return reporter
@@ -0,0 +1,269 @@
+"""
+Functions for selecting messages on the server instead of downloading and discarding them.
+"""
+
+import email.utils
+import imaplib
+import logging
+import datetime
+from .fetch_messages import batches, fetch_batch_steps, get_item
+from .imap_steps import command, run_steps
+
+
+# IMAP dates use English month abbreviations regardless of the locale
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def imap_date(date):
+    """
+    Format a date for IMAP SEARCH, e.g. 01-May-2023.
+
+    Args:
+        date (datetime.date): Date to format
+
+    Returns:
+        str: IMAP date
+    """
+    return f"{date.day:02d}-{_MONTHS[date.month - 1]}-{date.year}"
+
+
+def date_range(month=0, year=0):
+    """
+    Get the date range covered by a month/year filter.
+
+    Args:
+        month (int): Month (1-12, 0 for all)
+        year (int): Year (0 for all)
+
+    Returns:
+        tuple: (first_day, day_after_last_day) as datetime.date, or None if the
+               filter cannot be expressed as one range (no year given)
+    """
+    if not year:
+        return None
+    if month:
+        since = datetime.date(year, month, 1)
+        before = datetime.date(year + (month == 12), month % 12 + 1, 1)
+    else:
+        since = datetime.date(year, 1, 1)
+        before = datetime.date(year + 1, 1, 1)
+    return since, before
+
+
+def date_matches(date_str, month=0, year=0):
+    """
+    Check whether a Date header falls into a month/year filter.
+
+    Uses the same local-time interpretation as download_emails. Messages with
+    a missing or unparseable date are kept, like download_emails does.
+
+    Args:
+        date_str (str): Value of the Date header
+        month (int): Month (1-12, 0 for all)
+        year (int): Year (0 for all)
+
+    Returns:
+        bool: True if the message should be kept
+    """
+    date_tuple = email.utils.parsedate_tz(date_str) if date_str else None
+    if not date_tuple:
+        return True
+    try:
+        date = datetime.datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
+    except (OverflowError, ValueError, OSError):
+        return True
+    if month > 0 and date.month != month:
+        return False
+    if year > 0 and date.year != year:
+        return False
+    return True
+
+
+_DATE_HEADER_ITEMS = '(BODY.PEEK[HEADER.FIELDS (DATE)])'
+
+
+def _header_date_matches(items, month=0, year=0):
+    """Check the fetched Date header of a message; messages without one are kept."""
+    header = get_item(items, 'BODY[HEADER') if items else None
+    if header is None:
+        # Keep it and let the full download decide
+        return True
+    return date_matches(email.message_from_bytes(header).get('Date'), month, year)
+
+
+def _search_criteria(month=0, year=0, mode="internal"):
+    """
+    Build the SEARCH criteria for a month/year filter.
+
+    Returns:
+        list: Criteria, or None if the mode or filter needs a header scan
+    """
+    period = date_range(month, year)
+    if mode not in ("internal", "sent") or not period:
+        return None
+    since, before = period
+    if mode == "internal":
+        return ['SINCE', imap_date(since - datetime.timedelta(days=1)),
+                'BEFORE', imap_date(before + datetime.timedelta(days=1))]
+    return ['SENTSINCE', imap_date(since), 'SENTBEFORE', imap_date(before)]
+
+
+def _search_result(data):
+    """Turn SEARCH response data into sorted numbers."""
+    return sorted(int(number) for number in b" ".join(data).split())
+
+
+def search_by_headers_steps(numbers, month=0, year=0, batch_size=500, use_uid=False):
+    """
+    Filter messages by their Date header, as workflow steps (see search_by_headers).
+
+    Returns:
+        list: Matching numbers, in the given order
+    """
+    matching = []
+    for batch in batches(numbers, batch_size):
+        fetched = yield from fetch_batch_steps(batch, _DATE_HEADER_ITEMS, use_uid)
+        matching.extend(number for number in batch if _header_date_matches(fetched.get(number), month, year))
+    return matching
+
+
+def search_by_headers(mail, numbers, month=0, year=0, batch_size=500, use_uid=False):
+    """
+    Filter messages by their Date header, fetching only that header.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        numbers (list): Sequence numbers (or UIDs if use_uid) to check
+        month (int): Month (1-12, 0 for all)
+        year (int): Year (0 for all)
+        batch_size (int): Number of headers fetched per FETCH command
+        use_uid (bool): Treat numbers as UIDs
+
+    Returns:
+        list: Matching numbers, in the given order
+    """
+    return run_steps(mail, search_by_headers_steps(numbers, month, year, batch_size, use_uid))
+
+
+def search_messages_by_date_steps(month=0, year=0, mode="internal", message_count=None,
+                                  batch_size=500, use_uid=False):
+    """
+    Find the messages of a month/year, as workflow steps (see search_messages_by_date).
+
+    Returns:
+        list: Matching sequence numbers (or UIDs), ascending
+    """
+    criteria = _search_criteria(month, year, mode)
+    if criteria:
+        try:
+            if use_uid:
+                status, data = yield command('uid', 'SEARCH', None, *criteria)
+            else:
+                status, data = yield command('search', None, *criteria)
+            if status == 'OK':
+                numbers = _search_result(data)
+                logging.info(f"Server search {' '.join(criteria)} matched {len(numbers)} messages")
+                return numbers
+            logging.warning(f"Server search {' '.join(criteria)} failed: {data}, filtering by headers")
+        except imaplib.IMAP4.abort:
+            raise
+        except imaplib.IMAP4.error as e:
+            logging.warning(f"Server search {' '.join(criteria)} failed: {e}, filtering by headers")
+
+    # Header-only scan of the whole folder
+    if use_uid:
+        status, data = yield command('uid', 'SEARCH', None, 'ALL')
+        numbers = _search_result(data) if status == 'OK' else []
+    elif message_count is None:
+        status, data = yield command('search', None, 'ALL')
+        numbers = _search_result(data) if status == 'OK' else []
+    else:
+        numbers = list(range(1, message_count + 1))
+    matching = yield from search_by_headers_steps(numbers, month, year, batch_size, use_uid)
+    logging.info(f"Header filter matched {len(matching)} of {len(numbers)} messages")
+    return matching
+
+
+def search_messages_by_date(mail, month=0, year=0, mode="internal", message_count=None,
+                            batch_size=500, use_uid=False):
+    """
+    Find the messages of a month/year on the server.
+
+    Modes:
+        "internal": SEARCH SINCE/BEFORE on the arrival date (INTERNALDATE), widened
+                    by one day on each side to absorb time zones; download_emails
+                    still checks the Date header exactly.
+        "sent": SEARCH SENTSINCE/SENTBEFORE on the Date header, for servers whose
+                INTERNALDATE is wrong (e.g. imported mail).
+        "headers": fetch only the Date header of every message and filter locally.
+
+    "internal" and "sent" fall back to "headers" if the server rejects the search
+    or the filter has a month but no year.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        month (int): Month (1-12, 0 for all)
+        year (int): Year (0 for all)
+        mode (str): "internal", "sent" or "headers"
+        message_count (int, optional): Number of messages in the folder, needed for "headers"
+        batch_size (int): Number of headers fetched per FETCH command in "headers" mode
+        use_uid (bool): Return UIDs instead of sequence numbers
+
+    Returns:
+        list: Matching sequence numbers (or UIDs), ascending
+    """
+    return run_steps(mail, search_messages_by_date_steps(month, year, mode, message_count, batch_size, use_uid))
+
+
+def select_message_numbers_steps(message_count, limit=50, month=0, year=0, date_search="internal",
+                                 batch_size=500, use_uid=False):
+    """
+    Choose the messages to download, as workflow steps (see select_message_numbers).
+
+    Returns:
+        list: Sequence numbers (or UIDs), newest first
+    """
+    if (month or year) and date_search:
+        numbers = yield from search_messages_by_date_steps(month, year, date_search, message_count,
+                                                           batch_size, use_uid)
+    elif use_uid:
+        status, data = yield command('uid', 'SEARCH', None, 'ALL')
+        numbers = _search_result(data) if status == 'OK' else []
+    else:
+        numbers = list(range(1, message_count + 1))
+    return _newest(numbers, limit)
+
+
+def select_message_numbers(mail, message_count, limit=50, month=0, year=0, date_search="internal",
+                           batch_size=500, use_uid=False):
+    """
+    Choose the messages to download, newest first.
+
+    With a month/year filter the messages are selected on the server first (see
+    search_messages_by_date), so `limit` applies to the matching messages.
+    Without a filter, or with date_search=None, the newest `limit` messages are
+    taken and the filter is only applied after downloading.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        message_count (int): Number of messages in the folder
+        limit (int): Maximum number of messages (0 for all)
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        date_search (str): "internal", "sent", "headers", or None to filter after downloading
+        batch_size (int): Number of headers fetched per FETCH command in "headers" mode
+        use_uid (bool): Return UIDs instead of sequence numbers
+
+    Returns:
+        list: Sequence numbers (or UIDs), newest first
+    """
+    return run_steps(mail, select_message_numbers_steps(message_count, limit, month, year, date_search,
+                                                        batch_size, use_uid))
+
+
+def _newest(numbers, limit):
+    """Keep the newest `limit` of ascending numbers and return them newest first."""
+    if limit > 0 and len(numbers) > limit:
+        logging.info(f"Limiting download to {limit} most recent messages")
+        numbers = numbers[-limit:]
+    return numbers[::-1]
@@ -0,0 +1,161 @@
+"""
+Functions for downloading a message part to a file in fixed-size pieces.
+"""
+
+import os
+import imaplib
+import binascii
+import logging
+from .imap_steps import command, run_steps
+
+
+# Bytes that are not part of base64 data (line breaks, stray characters)
+_NOT_BASE64 = bytes(set(range(256)) - set(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="))
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class PartDecoder:
+    """
+    Incremental Content-Transfer-Encoding decoder.
+
+    Data can be fed in pieces of any size; only an incomplete base64 quantum
+    or quoted-printable line is kept between calls.
+    """
+
+    def __init__(self, encoding):
+        """
+        Initialize the PartDecoder.
+
+        Args:
+            encoding (str): Content-Transfer-Encoding, e.g. "base64"
+        """
+        self.encoding = (encoding or '7bit').lower()
+        self._pending = b""
+
+    def feed(self, data):
+        """
+        Decode the next piece of encoded data.
+
+        Args:
+            data (bytes): Encoded data
+
+        Returns:
+            bytes: Decoded data that is complete so far
+        """
+        if self.encoding == 'base64':
+            data = self._pending + data.translate(None, _NOT_BASE64)
+            # Padding ends the data; anything after it is ignored
+            padding = data.find(b"=")
+            if padding >= 0:
+                data = data[:padding]
+            usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            return binascii.a2b_base64(data[:usable]) if usable else b""
+        if self.encoding == 'quoted-printable':
+            data = self._pending + data
+            # Escapes and soft line breaks never span lines
+            end = data.rfind(b"\n") + 1
+            self._pending = data[end:]
+            return binascii.a2b_qp(data[:end]) if end else b""
+        return data
+
+    def flush(self):
+        """
+        Decode what is left at the end of the data.
+
+        Returns:
+            bytes: Remaining decoded data
+        """
+        pending, self._pending = self._pending, b""
+        if not pending:
+            return b""
+        if self.encoding == 'base64':
+            # Tolerate a truncated last quantum like the email package does
+            pending = pending[:len(pending) - (len(pending) % 4 == 1)]
+            return binascii.a2b_base64(pending + b"=" * (-len(pending) % 4)) if pending else b""
+        if self.encoding == 'quoted-printable':
+            return binascii.a2b_qp(pending)
+        return pending
+
+
+def _first_literal(data):
+    """Get the literal of a single-item FETCH response, b"" if there is none."""
+    return next((element[1] for element in data if isinstance(element, tuple)), b"")
+
+
+def stream_part_to_file_steps(number, section, encoding, filepath, chunk_size=DEFAULT_CHUNK_SIZE,
+                              size=None, use_uid=False):
+    """
+    Download one section of a message to a file, as workflow steps (see stream_part_to_file).
+
+    Returns:
+        int: Number of decoded bytes written, or None if the download failed
+    """
+    decoder = PartDecoder(encoding)
+    temp_path = f"{filepath}.part"
+    offset = 0
+    written = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            while True:
+                item = f"(BODY.PEEK[{section}]<{offset}.{chunk_size}>)"
+                if use_uid:
+                    status, data = yield command('uid', 'FETCH', str(number), item)
+                else:
+                    status, data = yield command('fetch', str(number), item)
+                if status != 'OK':
+                    logging.error(f"Error fetching section {section} of message {number}: {data}")
+                    return None
+
+                piece = _first_literal(data)
+                decoded = decoder.feed(piece)
+                f.write(decoded)
+                written += len(decoded)
+                offset += len(piece)
+                if len(piece) < chunk_size or (size and offset >= size):
+                    break
+            decoded = decoder.flush()
+            f.write(decoded)
+            written += len(decoded)
+        os.replace(temp_path, filepath)
+        return written
+    except imaplib.IMAP4.abort:
+        raise
+    except Exception as e:
+        logging.error(f"Error streaming section {section} of message {number}: {e}")
+        return None
+    finally:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def stream_part_to_file(mail, number, section, encoding, filepath, chunk_size=DEFAULT_CHUNK_SIZE,
+                        size=None, use_uid=False):
+    """
+    Download one section of a message to a file, decoding it on the way.
+
+    The section is fetched with partial fetches (BODY.PEEK[section]<offset.length>)
+    and decoded piece by piece, so memory use depends on chunk_size and not on
+    the size of the part. The file is written under a temporary name and only
+    renamed to filepath when complete.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        number (int): Sequence number (or UID if use_uid) of the message
+        section (str): Section number, e.g. "2"
+        encoding (str): Content-Transfer-Encoding of the section
+        filepath (str): Path of the file to write
+        chunk_size (int): Number of encoded bytes per FETCH command
+        size (int, optional): Encoded size of the section from BODYSTRUCTURE, to
+                              avoid a last empty fetch
+        use_uid (bool): Treat number as a UID
+
+    Returns:
+        int: Number of decoded bytes written, or None if the download failed
+    """
+    return run_steps(mail, stream_part_to_file_steps(number, section, encoding, filepath, chunk_size,
+                                                     size, use_uid))
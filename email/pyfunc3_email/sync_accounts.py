@@ -0,0 +1,225 @@
+"""
+Functions for syncing all configured email accounts at once.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .download_emails_parallel import download_emails_parallel, ProgressCounter
+from .metrics import get_metrics
+
+
+def load_accounts(folder="/.cfo/", key="emails"):
+    """
+    Read account definitions from the config file (see pyfunc3_config.get_config).
+
+    The config value can be a list of accounts or a dict of accounts by name.
+    Each account needs server, username and password, and can set name, port,
+    use_ssl, local_path and folders (or folder, default "INBOX").
+
+    Args:
+        folder (str): Path to the folder containing the config file
+        key (str): Key of the account list in the config file
+
+    Returns:
+        list: Account dicts, each with a name, or [] if none could be read
+    """
+    try:
+        from pyfunc3_config import get_config
+    except ImportError:
+        logging.error("pyfunc3-config is required to read accounts from the config file")
+        return []
+
+    config = get_config(folder=folder, key=key)
+    if not config:
+        return []
+    if isinstance(config, dict):
+        config = [dict(account, name=account.get('name', name)) for name, account in config.items()]
+
+    accounts = []
+    for account in config:
+        missing = [field for field in ('server', 'username', 'password') if not account.get(field)]
+        if missing:
+            logging.error(f"Skipping account {account.get('name') or account.get('username')}: "
+                          f"missing {', '.join(missing)}")
+            continue
+        accounts.append(dict(account, name=account.get('name') or account['username']))
+    return accounts
+
+
+def _account_jobs(accounts, local_root):
+    """Split accounts into one job per folder, each with its own local path."""
+    jobs = []
+    for account in accounts:
+        folders = account.get('folders') or [account.get('folder', 'INBOX')]
+        local_path = account.get('local_path') or os.path.join(local_root or '.', account['name'])
+        for remote_folder in folders:
+            # Several folders of one account must not share state and file names
+            path = local_path if len(folders) == 1 else os.path.join(local_path, remote_folder.replace('/', '_'))
+            jobs.append((account, remote_folder, path))
+    return jobs
+
+
+class _ServerSlots:
+    """Bounds the number of accounts synced concurrently per server."""
+
+    def __init__(self, per_server, limits=None):
+        self.per_server = per_server
+        # Server names are case-insensitive
+        self.limits = {server.lower(): limit for server, limit in (limits or {}).items()}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def slot(self, server):
+        with self._lock:
+            key = server.lower()
+            if key not in self._semaphores:
+                self._semaphores[key] = threading.Semaphore(max(1, self.limits.get(key, self.per_server)))
+            return self._semaphores[key]
+
+
+def _sync_job(account, remote_folder, local_path, slots, retries, backoff, options):
+    """
+    Sync one folder of one account, retrying failed attempts with exponential backoff.
+
+    Returns:
+        dict: Result of the job for the combined summary
+    """
+    result = {
+        'name': account['name'], 'server': account['server'], 'folder': remote_folder,
+        'local_path': local_path, 'ok': False, 'attempts': 0,
+        'processed': 0, 'saved': 0, 'skipped': 0, 'duration': 0.0,
+    }
+    start_time = time.time()
+    for attempt in range(1, retries + 2):
+        result['attempts'] = attempt
+        progress = ProgressCounter()
+        try:
+            with slots.slot(account['server']):
+                ok = download_emails_parallel(account['server'], account['username'], account['password'],
+                                              local_path, remote_folder,
+                                              port=account.get('port'), use_ssl=account.get('use_ssl', True),
+                                              progress=progress, **options)
+        except Exception as e:
+            # Counts as a failed attempt, so the job is retried and still reported
+            logging.error(f"{account['name']}/{remote_folder} - Error syncing: {e}", exc_info=True)
+            ok = False
+        result['processed'], result['saved'], result['skipped'] = progress.snapshot()
+        if ok:
+            result['ok'] = True
+            break
+        if attempt <= retries:
+            # Exponential backoff with jitter so retries to one server spread out
+            delay = backoff * 2 ** (attempt - 1)
+            delay += random.uniform(0, delay / 2)
+            logging.warning(f"{account['name']}/{remote_folder} - Attempt {attempt} failed, "
+                            f"retrying in {delay:.1f}s")
+            time.sleep(delay)
+    result['duration'] = time.time() - start_time
+    get_metrics().inc('sync_jobs_total', status='ok' if result['ok'] else 'failed')
+    get_metrics().inc('sync_retries_total', result['attempts'] - 1)
+    return result
+
+
+def write_sync_summary(results, local_root=None):
+    """
+    Log the combined summary of a multi-account sync and save it to sync_summary.txt.
+
+    Args:
+        results (list): Job results from sync_accounts
+        local_root (str, optional): Folder to save the summary file in
+
+    Returns:
+        str: The summary text
+    """
+    lines = [f"\n{'='*80}", "SYNC SUMMARY", f"{'='*80}",
+             f"{'Account':<24} {'Folder':<16} {'Status':<8} {'Saved':>7} {'Skipped':>8} {'Tries':>6} {'Time':>8}"]
+    for result in results:
+        lines.append(
+            f"{result['name'][:24]:<24} {result['folder'][:16]:<16} {'OK' if result['ok'] else 'FAILED':<8} "
+            f"{result['saved']:>7} {result['skipped']:>8} {result['attempts']:>6} {result['duration']:>7.1f}s"
+        )
+    failed = [result for result in results if not result['ok']]
+    lines += [
+        f"{'='*80}",
+        f"{'Accounts synced:':<20} {len(results) - len(failed)}/{len(results)}",
+        f"{'Total saved:':<20} {sum(result['saved'] for result in results)}",
+        f"{'Total skipped:':<20} {sum(result['skipped'] for result in results)}",
+        f"{'='*80}",
+    ]
+    summary = "\n".join(lines)
+    logging.info(summary)
+
+    if local_root:
+        try:
+            os.makedirs(local_root, exist_ok=True)
+            summary_file = os.path.join(local_root, 'sync_summary.txt')
+            with open(summary_file, 'w') as f:
+                f.write(summary)
+            logging.info(f"Summary saved to: {summary_file}")
+        except Exception as e:
+            logging.error(f"Failed to save summary file: {e}")
+    return summary
+
+
+def sync_accounts(accounts=None, local_root=None, max_workers=8, per_server=2, server_limits=None,
+                  retries=2, backoff=5.0, config_folder="/.cfo/", config_key="emails", **options):
+    """
+    Sync many email accounts in parallel.
+
+    Every folder of every account is synced by download_emails_parallel in its
+    own worker thread. Accounts on the same server wait for a free slot, so a
+    provider's connection limit is not exceeded, while other servers keep
+    working. Failed syncs are retried with exponential backoff. Use
+    incremental=True so that a folder without new messages counts as synced.
+
+    Args:
+        accounts (list, optional): Account dicts (see load_accounts). Read from the
+                                   config file if not given.
+        local_root (str, optional): Folder for accounts without a local_path (one
+                                    subfolder per account), for sync_summary.txt and
+                                    for sync_metrics.json (see get_metrics)
+        max_workers (int): Maximum number of folders synced at once
+        per_server (int): Maximum number of accounts synced at once per server
+        server_limits (dict, optional): Different maximums for specific servers
+        retries (int): Number of retries of a failed sync
+        backoff (float): Seconds to wait before the first retry, doubled for each one
+        config_folder (str): Config folder to read accounts from
+        config_key (str): Config key of the account list
+        **options: Passed to download_emails_parallel, e.g. month, year, limit,
+                   incremental, two_phase or pool_size (connections per account)
+
+    Returns:
+        list: One result dict per synced folder with name, server, folder,
+              local_path, ok, attempts, processed, saved, skipped and duration
+    """
+    if accounts is None:
+        accounts = load_accounts(config_folder, config_key)
+    else:
+        accounts = [dict(account, name=account.get('name') or account['username']) for account in accounts]
+    jobs = _account_jobs(accounts, local_root)
+    if not jobs:
+        logging.error("No accounts to sync")
+        return []
+
+    options.setdefault('pool_size', 1)
+    slots = _ServerSlots(per_server, server_limits)
+    logging.info(f"Syncing {len(jobs)} folders of {len(accounts)} accounts with {max_workers} workers")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix='sync') as executor:
+        futures = [
+            executor.submit(_sync_job, account, remote_folder, local_path, slots, retries, backoff, options)
+            for account, remote_folder, local_path in jobs
+        ]
+        results = [future.result() for future in futures]
+
+    write_sync_summary(results, local_root)
+    if local_root:
+        try:
+            get_metrics().write(os.path.join(local_root, 'sync_metrics.json'))
+        except Exception as e:
+            logging.error(f"Failed to save metrics file: {e}")
+    return results
@@ -0,0 +1,221 @@
+"""
+Functions for incremental mailbox sync based on UIDs and UIDVALIDITY.
+"""
+
+import os
+import json
+import imaplib
+import logging
+import datetime
+from .search_messages import search_messages_by_date_steps
+from .imap_steps import command, run_steps
+
+
+SYNC_STATE_FILE = ".sync_state.json"
+
+
+class SyncState:
+    """
+    Highest synced UID per remote folder, stored as JSON under the local path.
+
+    A UID is only meaningful together with the folder's UIDVALIDITY: if the
+    server reports a different UIDVALIDITY, the stored UID is discarded and the
+    folder is synced from the start. The same happens when the month/year
+    filter changes, since messages outside the old filter were never fetched.
+    """
+
+    def __init__(self, local_path, filename=SYNC_STATE_FILE):
+        """
+        Initialize the SyncState and load the state file if it exists.
+
+        Args:
+            local_path (str): Local path the emails are saved to
+            filename (str): Name of the state file in local_path
+        """
+        self.path = os.path.join(local_path, filename)
+        self.folders = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the state file. A missing or unreadable file gives an empty state.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.folders = json.load(f)
+        except FileNotFoundError:
+            self.folders = {}
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading sync state {self.path}: {e}, starting a full sync")
+            self.folders = {}
+
+    def save(self):
+        """
+        Write the state file atomically.
+
+        Returns:
+            bool: True if the state was saved, False otherwise
+        """
+        temp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.folders, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+            return True
+        except OSError as e:
+            logging.error(f"Error saving sync state {self.path}: {e}")
+            return False
+
+    def last_uid(self, remote_folder, uidvalidity, month=0, year=0):
+        """
+        Get the highest synced UID of a folder.
+
+        Args:
+            remote_folder (str): Remote folder
+            uidvalidity (int): Current UIDVALIDITY of the folder
+            month (int): Month filter of this run (0 for all)
+            year (int): Year filter of this run (0 for all)
+
+        Returns:
+            int: Highest synced UID, 0 if the folder was never synced or its
+                 UIDVALIDITY or filter changed
+        """
+        entry = self.folders.get(remote_folder)
+        if not entry:
+            return 0
+        if entry.get('uidvalidity') != uidvalidity:
+            logging.warning(
+                f"UIDVALIDITY of {remote_folder} changed "
+                f"({entry.get('uidvalidity')} -> {uidvalidity}), starting a full sync"
+            )
+            return 0
+        if entry.get('month', 0) != month or entry.get('year', 0) != year:
+            logging.warning(f"Date filter of {remote_folder} changed, starting a full sync")
+            return 0
+        return int(entry.get('last_uid', 0))
+
+    def update(self, remote_folder, uidvalidity, last_uid, month=0, year=0):
+        """
+        Record the highest synced UID of a folder.
+
+        Args:
+            remote_folder (str): Remote folder
+            uidvalidity (int): UIDVALIDITY the UID belongs to
+            last_uid (int): Highest synced UID
+            month (int): Month filter the folder was synced with (0 for all)
+            year (int): Year filter the folder was synced with (0 for all)
+        """
+        self.folders[remote_folder] = {
+            'uidvalidity': uidvalidity,
+            'last_uid': last_uid,
+            'month': month,
+            'year': year,
+            'synced_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+
+
+def get_uidvalidity_steps(remote_folder):
+    """
+    Get the UIDVALIDITY of the selected folder, as workflow steps (see get_uidvalidity).
+
+    Returns:
+        int: UIDVALIDITY, or None if the server did not report it
+    """
+    status, data = yield command('response', 'UIDVALIDITY')
+    if data and data[0]:
+        return int(data[0])
+    try:
+        status, data = yield command('status', remote_folder, '(UIDVALIDITY)')
+        if status == 'OK' and data and data[0]:
+            tokens = data[0].decode(errors='replace').replace('(', ' ').replace(')', ' ').split()
+            return int(tokens[tokens.index('UIDVALIDITY') + 1])
+    except imaplib.IMAP4.abort:
+        raise
+    except (imaplib.IMAP4.error, ValueError, IndexError) as e:
+        logging.error(f"Error reading UIDVALIDITY of {remote_folder}: {e}")
+    return None
+
+
+def get_uidvalidity(mail, remote_folder):
+    """
+    Get the UIDVALIDITY of the selected folder.
+
+    Args:
+        mail (imaplib.IMAP4): Connection right after selecting remote_folder
+        remote_folder (str): The selected folder
+
+    Returns:
+        int: UIDVALIDITY, or None if the server did not report it
+    """
+    return run_steps(mail, get_uidvalidity_steps(remote_folder))
+
+
+def select_new_uids_steps(last_uid, limit=50, month=0, year=0, date_search="internal"):
+    """
+    Find the UIDs added since the last sync, as workflow steps (see select_new_uids).
+
+    Returns:
+        list: New UIDs, ascending
+    """
+    if (month or year) and date_search:
+        uids = yield from search_messages_by_date_steps(month, year, date_search, use_uid=True)
+    else:
+        # "n:*" always matches the highest UID, even if it is below n
+        status, data = yield command('uid', 'SEARCH', None, 'UID', f"{last_uid + 1}:*")
+        if status != 'OK':
+            logging.error(f"Error searching new messages: {data}")
+            return []
+        uids = sorted(int(uid) for uid in b" ".join(data).split())
+    return _next_uids(uids, last_uid, limit)
+
+
+def select_new_uids(mail, last_uid, limit=50, month=0, year=0, date_search="internal"):
+    """
+    Find the UIDs added to the selected folder since the last sync.
+
+    New messages are returned oldest first and `limit` keeps the oldest ones,
+    so repeated runs catch up without leaving gaps below the stored UID.
+
+    Args:
+        mail (imaplib.IMAP4): Connection with a selected folder
+        last_uid (int): Highest synced UID (0 for a full sync)
+        limit (int): Maximum number of messages (0 for all)
+        month (int): Month to filter emails (1-12, 0 for all)
+        year (int): Year to filter emails (0 for all)
+        date_search (str): Server-side date filter mode (see search_messages_by_date)
+
+    Returns:
+        list: New UIDs, ascending
+    """
+    return run_steps(mail, select_new_uids_steps(last_uid, limit, month, year, date_search))
+
+
+def _next_uids(uids, last_uid, limit):
+    """Keep the UIDs above last_uid, at most `limit` of them, oldest first."""
+    uids = [uid for uid in uids if uid > last_uid]
+    logging.info(f"Found {len(uids)} new messages since UID {last_uid}")
+    if limit > 0 and len(uids) > limit:
+        logging.info(f"Limiting sync to the next {limit} new messages")
+        uids = uids[:limit]
+    return uids
+
+
+def synced_up_to(uids, failed, last_uid):
+    """
+    Get the highest UID below which every message was synced.
+
+    Args:
+        uids (list): UIDs that were processed, ascending
+        failed (iterable): UIDs that could not be fetched
+        last_uid (int): Highest synced UID before this run
+
+    Returns:
+        int: New highest synced UID
+    """
+    failed = set(failed)
+    for uid in uids:
+        if uid in failed:
+            break
+        last_uid = uid
+    return last_uid
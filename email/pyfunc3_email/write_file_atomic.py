@@ -0,0 +1,40 @@
+"""
+Functions for writing files so that partial files never appear.
+"""
+
+import os
+import tempfile
+
+
+def write_file_atomic(filepath, data, fsync=False):
+    """
+    Write a file under a temporary name in the same folder and rename it when complete.
+
+    A crash while writing leaves at most a hidden .tmp file behind, never a
+    truncated file under the final name. Every call gets its own temporary
+    file, so concurrent writers of the same name cannot clobber each other.
+
+    Args:
+        filepath (str): Path of the file to write
+        data (bytes): File content
+        fsync (bool): Flush the data to disk before renaming
+
+    Returns:
+        str: filepath
+    """
+    folder, name = os.path.split(filepath)
+    fd, temp_path = tempfile.mkstemp(dir=folder or None, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    finally:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    return filepath
@@ -0,0 +1,117 @@
+"""
+Benchmarks of the per-message cost of the progress reporters.
+
+Run from the email directory with: python -m tests.benchmark_reporters [messages]
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+from .fake_imap_server import FakeIMAPServer, make_message
+from pyfunc3_email.download_emails import download_emails
+from pyfunc3_email.reporters import JSONReporter, REPORTERS
+
+
+def benchmark_reporters(messages=2000, body_size=2048, reporters=tuple(REPORTERS), repeat=5, log_level=logging.INFO):
+    """
+    Download the same folder from a local fake server with each reporter.
+
+    The CPU time of the downloading thread is measured, so the fake server,
+    which runs in other threads, does not count. Log records and JSON events
+    are written to os.devnull, so the cost of building and formatting them is
+    measured but not that of a terminal. The fastest of `repeat` rounds counts
+    for each reporter.
+
+    Args:
+        messages (int): Number of messages in the folder
+        body_size (int): Approximate size of each message body in bytes
+        reporters (tuple): Names of the reporters to compare (see REPORTERS)
+        repeat (int): Rounds of runs with every reporter
+        log_level (int): Level of the root logger during the runs
+
+    Returns:
+        dict: Per reporter, wall-clock seconds, CPU seconds of the download and
+              CPU microseconds per message more than the "quiet" reporter (if it
+              was measured)
+    """
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    results = {}
+    with open(os.devnull, 'w') as devnull, tempfile.TemporaryDirectory() as tmp, FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(i, body_size=body_size) for i in range(messages)])
+        root.handlers = [logging.StreamHandler(devnull)]
+        root.setLevel(log_level)
+        try:
+            # Alternate the reporters in every round so drift of the machine affects all alike
+            for run in range(repeat):
+                for name in reporters:
+                    reporter = JSONReporter(devnull) if name == 'json' else name
+                    start, cpu_start = time.perf_counter(), time.thread_time()
+                    download_emails(server.host, server.username, server.password,
+                                    os.path.join(tmp, f"{name}-{run}"), "INBOX", limit=0,
+                                    port=server.port, use_ssl=False, batch_size=200, reporter=reporter)
+                    cpu_seconds = time.thread_time() - cpu_start
+                    seconds = time.perf_counter() - start
+                    result = results.setdefault(name, {'seconds': seconds, 'cpu_seconds': cpu_seconds})
+                    result['seconds'] = min(result['seconds'], seconds)
+                    result['cpu_seconds'] = min(result['cpu_seconds'], cpu_seconds)
+        finally:
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+
+    baseline = results.get('quiet', {}).get('cpu_seconds')
+    for result in results.values():
+        if baseline is not None:
+            result['overhead_us_per_message'] = (result['cpu_seconds'] - baseline) / messages * 1e6
+    return results
+
+
+def benchmark_reporter_calls(messages=100000, reporters=tuple(REPORTERS), log_level=logging.INFO):
+    """
+    Time only the calls the download loop makes to a reporter for each message.
+
+    Network, parsing and disk noise of benchmark_reporters is left out, so
+    this shows the reporting overhead itself.
+
+    Args:
+        messages (int): Number of simulated messages
+        reporters (tuple): Names of the reporters to compare (see REPORTERS)
+        log_level (int): Level of the root logger during the runs
+
+    Returns:
+        dict: Microseconds per message for each reporter
+    """
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    subject = "Invoice 2023/05 for services rendered - please find the attached PDF document"
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        root.handlers = [logging.StreamHandler(devnull)]
+        root.setLevel(log_level)
+        try:
+            for name in reporters:
+                reporter = JSONReporter(devnull) if name == 'json' else REPORTERS[name]()
+                reporter.start(messages, server="imap.example.com", folder="INBOX", username="user")
+                start = time.perf_counter()
+                for number in range(1, messages + 1):
+                    reporter.message(number, 'saved', f"[{number}/{messages}] Message {number}",
+                                     path=f"/mail/{number}.eml", size=4096, subject=subject,
+                                     sender="Billing <billing@example.com>", date="Mon, 1 May 2023 10:00:00 +0200")
+                    reporter.progress(number, number, 0)
+                results[name] = (time.perf_counter() - start) / messages * 1e6
+        finally:
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, result in benchmark_reporters(count).items():
+        print(f"{name:<10} {result['seconds']:7.3f} s  CPU {result['cpu_seconds']:7.3f} s  "
+              f"{result.get('overhead_us_per_message', 0):+7.1f} us/message")
+    print("Reporter calls only:")
+    for name, microseconds in benchmark_reporter_calls().items():
+        print(f"{name:<10} {microseconds:7.2f} us/message")
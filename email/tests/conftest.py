@@ -0,0 +1,61 @@
+"""
+Fixtures running the download drivers against a FakeIMAPServer.
+"""
+
+import asyncio
+import importlib
+import pytest
+from pyfunc3_email import download_emails, download_emails_async
+from .fake_imap_server import FakeIMAPServer, make_message
+
+MESSAGES = 8
+# Sequence number (and UID) of the message whose write fails
+FAILING = 3
+
+
+@pytest.fixture
+def server():
+    """A fake server with MESSAGES messages in INBOX."""
+    with FakeIMAPServer() as fake:
+        fake.add_messages("INBOX", [make_message(number) for number in range(1, MESSAGES + 1)])
+        yield fake
+
+
+@pytest.fixture(params=["sequential", "parallel", "async"])
+def download(request, server, tmp_path):
+    """Download INBOX of the fake server into tmp_path with one of the drivers."""
+
+    def run(**options):
+        args = ("127.0.0.1", server.username, server.password, str(tmp_path), "INBOX")
+        options = dict(limit=0, port=server.port, use_ssl=False, batch_size=3, reporter="quiet", **options)
+        if request.param == "async":
+            return asyncio.run(download_emails_async(*args, **options))
+        return download_emails(*args, pool_size=3 if request.param == "parallel" else 1, **options)
+
+    return run
+
+
+@pytest.fixture
+def failing_write(monkeypatch):
+    """Make writing message FAILING raise, until the returned function is called."""
+    module = importlib.import_module("pyfunc3_email.download_emails")
+    write_file_atomic = module.write_file_atomic
+
+    def write(path, data):
+        if f"Subject: Message {FAILING}\n".encode() in data:
+            raise OSError("No space left on device")
+        return write_file_atomic(path, data)
+
+    monkeypatch.setattr(module, "write_file_atomic", write)
+    return lambda: monkeypatch.setattr(module, "write_file_atomic", write_file_atomic)
+
+
+def saved_subjects(path):
+    """Subjects of the .eml files in a directory."""
+    subjects = set()
+    for eml in path.glob("*.eml"):
+        for line in eml.read_bytes().splitlines():
+            if line.startswith(b"Subject: "):
+                subjects.add(line[len(b"Subject: "):].decode())
+                break
+    return subjects
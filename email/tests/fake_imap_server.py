@@ -0,0 +1,567 @@
+"""
+A small in-process IMAP server for testing and benchmarking without a real mail server.
+"""
+
+import re
+import time
+import select
+import socket
+import email
+import email.utils
+import datetime
+import threading
+import socketserver
+import urllib.parse
+
+
+class FakeMessage:
+    """
+    A message stored in the FakeIMAPServer.
+    """
+
+    def __init__(self, uid, raw, internaldate=None):
+        """
+        Initialize the FakeMessage.
+
+        Args:
+            uid (int): Unique identifier of the message in its folder
+            raw (bytes): Full RFC822 message
+            internaldate (datetime.datetime, optional): Arrival date. Defaults to the Date header.
+        """
+        self.uid = uid
+        self.raw = raw
+        self.message = email.message_from_bytes(raw)
+        self.date = None
+        date_tuple = email.utils.parsedate_tz(self.message.get('Date', ''))
+        if date_tuple:
+            self.date = datetime.datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
+        self.internaldate = internaldate or self.date or datetime.datetime.now()
+        self._sections = {}
+
+    def section(self, section):
+        """
+        Get the encoded body of a section such as "2" or "1.3", cached for partial fetches.
+
+        Args:
+            section (str): Section number
+
+        Returns:
+            bytes: The section body
+        """
+        if section not in self._sections:
+            self._sections[section] = _section_body(self.message, section)
+        return self._sections[section]
+
+
+def make_message(number, date=None, subject=None, sender="sender@example.com",
+                 body_size=1024, attachments=None):
+    """
+    Build a simple RFC822 message for the fake server.
+
+    Args:
+        number (int): Number used in the default subject and body
+        date (datetime.datetime, optional): Date header. Defaults to now.
+        subject (str, optional): Subject header. Defaults to "Message <number>".
+        sender (str): From header
+        body_size (int): Approximate size of the text body in bytes
+        attachments (list, optional): (filename, content_type, data) tuples
+
+    Returns:
+        bytes: The message
+    """
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg['Subject'] = subject if subject is not None else f"Message {number}"
+    msg['From'] = sender
+    msg['To'] = "user@example.com"
+    msg['Date'] = email.utils.format_datetime((date or datetime.datetime.now()).astimezone())
+    line = f"Line of message {number}.\n"
+    msg.set_content(line * max(1, body_size // len(line)))
+    for filename, content_type, data in attachments or []:
+        maintype, subtype = content_type.split('/', 1)
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=filename)
+    return msg.as_bytes()
+
+
+class _IMAPHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one client connection of the FakeIMAPServer.
+    """
+
+    # Buffer responses and flush once per command, like a real server
+    wbufsize = -1
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.folder = None
+        self.authenticated = False
+
+    def send(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.wfile.write(data)
+
+    def handle(self):
+        server = self.server.fake
+        with server.lock:
+            server.connections += 1
+        self.send("* OK [CAPABILITY IMAP4rev1 IDLE] FakeIMAPServer ready\r\n")
+        while True:
+            self.wfile.flush()
+            line = self.rfile.readline()
+            if not line:
+                return
+            line = line.rstrip(b"\r\n").decode('utf-8', errors='replace')
+            if not line:
+                continue
+            tag, _, rest = line.partition(' ')
+            command, _, args = rest.partition(' ')
+            command = command.upper()
+            if server.latency:
+                time.sleep(server.latency)
+            with server.lock:
+                server.commands.append(command if command != 'UID' else f"UID {args.split(' ', 1)[0].upper()}")
+                if server.commands[-1] in ('FETCH', 'UID FETCH'):
+                    server.fetch_commands += 1
+                    if server.fetch_commands in server.drops:
+                        # Close the connection without answering, like a network drop
+                        return
+            try:
+                if not self.dispatch(tag, command, args):
+                    return
+            except Exception as e:
+                self.send(f"{tag} BAD {e}\r\n")
+
+    def dispatch(self, tag, command, args):
+        server = self.server.fake
+        if command == 'CAPABILITY':
+            self.send("* CAPABILITY IMAP4rev1 IDLE\r\n")
+        elif command == 'LOGIN':
+            username, password = [_unquote(token) for token in _tokenize(args)[:2]]
+            if (username, password) != (server.username, server.password):
+                self.send(f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials\r\n")
+                return True
+            self.authenticated = True
+        elif command == 'LOGOUT':
+            self.send("* BYE logging out\r\n")
+            self.send(f"{tag} OK LOGOUT completed\r\n")
+            return False
+        elif command == 'NOOP':
+            pass
+        elif not self.authenticated:
+            self.send(f"{tag} NO Not authenticated\r\n")
+            return True
+        elif command in ('SELECT', 'EXAMINE'):
+            name = _unquote(args.strip())
+            if name not in server.folders:
+                self.send(f"{tag} NO Folder not found\r\n")
+                return True
+            self.folder = name
+            messages = server.folders[name]
+            self.send(f"* {len(messages)} EXISTS\r\n* 0 RECENT\r\n")
+            self.send(f"* OK [UIDVALIDITY {server.uidvalidity[name]}] UIDs valid\r\n")
+            next_uid = (messages[-1].uid + 1) if messages else 1
+            self.send(f"* OK [UIDNEXT {next_uid}] Predicted next UID\r\n")
+        elif command == 'CLOSE':
+            self.folder = None
+        elif self.folder is None:
+            self.send(f"{tag} NO No folder selected\r\n")
+            return True
+        elif command == 'IDLE':
+            self.idle()
+        elif command == 'FETCH':
+            self.fetch(args, use_uid=False)
+        elif command == 'SEARCH':
+            self.search(args, use_uid=False)
+        elif command == 'UID':
+            subcommand, _, args = args.partition(' ')
+            subcommand = subcommand.upper()
+            if subcommand == 'FETCH':
+                self.fetch(args, use_uid=True)
+            elif subcommand == 'SEARCH':
+                self.search(args, use_uid=True)
+            else:
+                self.send(f"{tag} BAD Unsupported UID command\r\n")
+                return True
+        else:
+            self.send(f"{tag} BAD Unsupported command\r\n")
+            return True
+        self.send(f"{tag} OK {command} completed\r\n")
+        return True
+
+    def messages(self):
+        return self.server.fake.folders[self.folder]
+
+    def idle(self):
+        """Report new messages in the selected folder until the client sends DONE."""
+        self.send("+ idling\r\n")
+        self.wfile.flush()
+        known = len(self.messages())
+        while not select.select([self.connection], [], [], 0.05)[0]:
+            count = len(self.messages())
+            if count != known:
+                known = count
+                self.send(f"* {count} EXISTS\r\n")
+                self.wfile.flush()
+        self.rfile.readline()
+
+    def select_messages(self, message_set, use_uid):
+        """Get (sequence_number, message) pairs matching an IMAP message set."""
+        messages = self.messages()
+        if not messages:
+            return []
+        maximum = messages[-1].uid if use_uid else len(messages)
+        wanted = _parse_message_set(message_set, maximum)
+        selected = []
+        for number, message in enumerate(messages, 1):
+            key = message.uid if use_uid else number
+            if key in wanted:
+                selected.append((number, message))
+        return selected
+
+    def fetch(self, args, use_uid):
+        message_set, _, items = args.partition(' ')
+        items = items.strip()
+        if items.startswith('(') and items.endswith(')'):
+            items = items[1:-1]
+        items = _split_fetch_items(items)
+        if use_uid and 'UID' not in [item.upper() for item in items]:
+            items = ['UID'] + items
+        for number, message in self.select_messages(message_set, use_uid):
+            self.send(f"* {number} FETCH (")
+            for position, item in enumerate(items):
+                if position:
+                    self.send(" ")
+                self.fetch_item(message, item)
+            self.send(")\r\n")
+            with self.server.fake.lock:
+                self.server.fake.fetched_messages += 1
+
+    def fetch_item(self, message, item):
+        upper = item.upper()
+        if upper == 'UID':
+            self.send(f"UID {message.uid}")
+        elif upper == 'FLAGS':
+            self.send("FLAGS ()")
+        elif upper == 'RFC822.SIZE':
+            self.send(f"RFC822.SIZE {len(message.raw)}")
+        elif upper == 'INTERNALDATE':
+            self.send(f'INTERNALDATE "{message.internaldate.astimezone().strftime("%d-%b-%Y %H:%M:%S %z")}"')
+        elif upper in ('RFC822', 'BODY[]', 'BODY.PEEK[]'):
+            name = 'RFC822' if upper == 'RFC822' else 'BODY[]'
+            self.send_literal(name, message.raw)
+        elif upper.startswith('BODY.PEEK[HEADER.FIELDS') or upper.startswith('BODY[HEADER.FIELDS'):
+            fields = re.search(r'\((.*?)\)', item).group(1).split()
+            lines = []
+            for field in fields:
+                for value in message.message.get_all(field, []):
+                    lines.append(f"{field.title()}: {value}\r\n")
+            data = ("".join(lines) + "\r\n").encode('utf-8')
+            self.send_literal(f"BODY[HEADER.FIELDS ({' '.join(field.upper() for field in fields)})]", data)
+        elif upper in ('BODY.PEEK[HEADER]', 'BODY[HEADER]', 'RFC822.HEADER'):
+            header, _, _ = message.raw.partition(b"\r\n\r\n" if b"\r\n\r\n" in message.raw else b"\n\n")
+            name = 'RFC822.HEADER' if upper == 'RFC822.HEADER' else 'BODY[HEADER]'
+            self.send_literal(name, header + b"\r\n\r\n")
+        elif upper == 'BODYSTRUCTURE':
+            self.send(f"BODYSTRUCTURE {_bodystructure(message.message)}")
+        elif _SECTION_ITEM.match(upper):
+            match = _SECTION_ITEM.match(upper)
+            data = message.section(match.group(1))
+            name = f"BODY[{match.group(1)}]"
+            if match.group(2) is not None:
+                # Partial fetch <offset.length>, answered as BODY[n]<offset>
+                offset = int(match.group(2))
+                length = int(match.group(3)) if match.group(3) is not None else len(data)
+                data = data[offset:offset + length]
+                name = f"{name}<{offset}>"
+            self.send_literal(name, data)
+        else:
+            raise ValueError(f"Unsupported FETCH item {item}")
+
+    def send_literal(self, name, data):
+        self.send(f"{name} {{{len(data)}}}\r\n")
+        self.send(data)
+        with self.server.fake.lock:
+            self.server.fake.bytes_sent += len(data)
+
+    def search(self, args, use_uid):
+        tokens = _tokenize(args)
+        if tokens and tokens[0].upper() == 'CHARSET':
+            tokens = tokens[2:]
+        messages = self.messages()
+        max_uid = messages[-1].uid if messages else 0
+        result = []
+        for number, message in enumerate(messages, 1):
+            if _matches_search(tokens, number, message, len(messages), max_uid):
+                result.append(message.uid if use_uid else number)
+        self.send("* SEARCH" + "".join(f" {key}" for key in result) + "\r\n")
+
+
+def _tokenize(args):
+    return re.findall(r'"(?:[^"\\]|\\.)*"|\([^)]*\)|\S+', args)
+
+
+def _unquote(token):
+    if len(token) >= 2 and token[0] == token[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', token[1:-1])
+    return token
+
+
+_SECTION_ITEM = re.compile(r'^BODY(?:\.PEEK)?\[(\d+(?:\.\d+)*)\](?:<(\d+)(?:\.(\d+))?>)?$')
+
+
+def _quote(value):
+    """Quote a string for an IMAP response, NIL for None."""
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _param_list(part, header='content-type'):
+    """Format the parameters of a header as a BODYSTRUCTURE parameter list."""
+    params = part.get_params(header=header) or []
+    values = []
+    for name, value in params[1:]:
+        if isinstance(value, tuple):
+            # RFC 2231 values are sent encoded, like in the message
+            charset, language, value = value
+            name = f"{name}*"
+            value = f"{charset or ''}'{language or ''}'{urllib.parse.quote(value, safe='', encoding='latin-1')}"
+        values.append(f"{_quote(name.upper())} {_quote(value)}")
+    return f"({' '.join(values)})" if values else "NIL"
+
+
+def _disposition(part):
+    """Format the Content-Disposition of a part for BODYSTRUCTURE."""
+    disposition = part.get_content_disposition()
+    if not disposition:
+        return "NIL"
+    return f"({_quote(disposition.upper())} {_param_list(part, 'content-disposition')})"
+
+
+def _part_body(part):
+    """Get the encoded body of a part, as BODY[section] returns it."""
+    if part.get_content_type() == 'message/rfc822':
+        return part.get_payload(0).as_bytes()
+    payload = part.get_payload()
+    if isinstance(payload, str):
+        return payload.encode('ascii', 'surrogateescape')
+    return payload or b""
+
+
+def _bodystructure(part):
+    """Build the BODYSTRUCTURE of a message or part."""
+    if part.is_multipart() and part.get_content_maintype() == 'multipart':
+        children = "".join(_bodystructure(child) for child in part.get_payload())
+        return (f"({children} {_quote(part.get_content_subtype().upper())} "
+                f"{_param_list(part)} {_disposition(part)} NIL NIL)")
+    body = _part_body(part)
+    lines = body.count(b"\n")
+    fields = (f"{_quote(part.get_content_maintype().upper())} {_quote(part.get_content_subtype().upper())} "
+              f"{_param_list(part)} NIL NIL {_quote(part.get('Content-Transfer-Encoding', '7BIT').upper())} "
+              f"{len(body)}")
+    if part.get_content_maintype() == 'text':
+        fields += f" {lines}"
+    elif part.get_content_type() == 'message/rfc822':
+        fields += f" NIL {_bodystructure(part.get_payload(0))} {lines}"
+    return f"({fields} NIL {_disposition(part)} NIL NIL)"
+
+
+def _section_body(message, section):
+    """Get the encoded body of a section such as "2" or "1.3"."""
+    part = message
+    for index in section.split('.'):
+        index = int(index)
+        if part.get_content_type() == 'message/rfc822':
+            part = part.get_payload(0)
+        if part.is_multipart():
+            part = part.get_payload()[index - 1]
+        elif index != 1:
+            raise ValueError(f"No section {section}")
+    return _part_body(part)
+
+
+def _split_fetch_items(items):
+    """Split FETCH items on spaces outside brackets."""
+    result = []
+    depth = 0
+    current = ""
+    for char in items:
+        if char in '[(':
+            depth += 1
+        elif char in '])':
+            depth -= 1
+        if char == ' ' and depth == 0:
+            if current:
+                result.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        result.append(current)
+    return result
+
+
+def _parse_message_set(message_set, maximum):
+    """Expand an IMAP message set such as "1:5,7,9:*" into a set of numbers."""
+    wanted = set()
+    for part in message_set.split(','):
+        if ':' in part:
+            start, end = part.split(':', 1)
+            start = maximum if start == '*' else int(start)
+            end = maximum if end == '*' else int(end)
+            if start > end:
+                start, end = end, start
+            wanted.update(range(start, end + 1))
+        else:
+            wanted.add(maximum if part == '*' else int(part))
+    return wanted
+
+
+def _parse_search_date(value):
+    return datetime.datetime.strptime(_unquote(value), "%d-%b-%Y").date()
+
+
+def _matches_search(tokens, number, message, count, max_uid):
+    """Evaluate the subset of SEARCH criteria used by this package."""
+    position = 0
+    while position < len(tokens):
+        key = tokens[position].upper()
+        if key == 'ALL':
+            position += 1
+            continue
+        if key in ('SINCE', 'BEFORE', 'ON', 'SENTSINCE', 'SENTBEFORE', 'SENTON'):
+            value = _parse_search_date(tokens[position + 1])
+            position += 2
+            date = message.date if key.startswith('SENT') else message.internaldate
+            if date is None:
+                return False
+            date = date.date()
+            if key.endswith('SINCE') and not date >= value:
+                return False
+            if key.endswith('BEFORE') and not date < value:
+                return False
+            if key.endswith('ON') and not date == value:
+                return False
+            continue
+        if key == 'UID':
+            wanted = _parse_message_set(tokens[position + 1], max_uid)
+            position += 2
+            if message.uid not in wanted:
+                return False
+            continue
+        # A bare message set
+        if re.match(r'^[\d\*:,]+$', key):
+            position += 1
+            if number not in _parse_message_set(key, count):
+                return False
+            continue
+        raise ValueError(f"Unsupported SEARCH key {key}")
+    return True
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Many clients may connect at once, e.g. an asyncio sync of many accounts
+    request_queue_size = 128
+
+
+class FakeIMAPServer:
+    """
+    Plain-text IMAP4rev1 server running in a background thread.
+
+    It implements the subset of the protocol used by pyfunc3_email (LOGIN,
+    SELECT, FETCH, SEARCH and their UID variants) over in-memory folders, and
+    can add a fixed latency per command to simulate a remote server.
+
+    Usage:
+        with FakeIMAPServer() as server:
+            server.add_messages("INBOX", [make_message(i) for i in range(100)])
+            download_emails("127.0.0.1", server.username, server.password, "out", "INBOX",
+                            port=server.port, use_ssl=False)
+    """
+
+    def __init__(self, username="user", password="password", latency=0.0, host="127.0.0.1", port=0):
+        """
+        Initialize the FakeIMAPServer.
+
+        Args:
+            username (str): Accepted login name
+            password (str): Accepted password
+            latency (float): Seconds to wait before answering each command
+            host (str): Address to listen on
+            port (int): Port to listen on (0 picks a free port)
+        """
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.host = host
+        self.folders = {"INBOX": []}
+        self.uidvalidity = {"INBOX": 1}
+        self.lock = threading.Lock()
+        self.commands = []
+        self.connections = 0
+        self.fetched_messages = 0
+        self.bytes_sent = 0
+        self.fetch_commands = 0
+        self.drops = set()
+        self._server = _ThreadingServer((host, port), _IMAPHandler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    def add_messages(self, folder, messages):
+        """
+        Append messages to a folder, creating it if needed.
+
+        Args:
+            folder (str): Folder name
+            messages (list): Raw RFC822 messages (bytes), or (bytes, internaldate) tuples
+        """
+        with self.lock:
+            stored = self.folders.setdefault(folder, [])
+            self.uidvalidity.setdefault(folder, 1)
+            next_uid = (stored[-1].uid + 1) if stored else 1
+            for message in messages:
+                raw, internaldate = message if isinstance(message, tuple) else (message, None)
+                stored.append(FakeMessage(next_uid, raw, internaldate))
+                next_uid += 1
+
+    def drop_connection(self, fetch):
+        """
+        Close the connection that sends a given FETCH command, without answering it.
+
+        Args:
+            fetch (int): Number of the FETCH or UID FETCH command, counted from 1 over all
+                         connections since the server started
+        """
+        with self.lock:
+            self.drops.add(fetch)
+
+    def reset_stats(self):
+        """Clear the recorded commands and counters."""
+        with self.lock:
+            self.commands = []
+            self.connections = 0
+            self.fetched_messages = 0
+            self.bytes_sent = 0
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,56 @@
+import os
+import email
+import pytest
+from pyfunc3_email import connect, fetch_messages
+from pyfunc3_email.bodystructure import _param_dict, decode_part, find_attachment_parts
+from .fake_imap_server import FakeIMAPServer, make_message
+
+SPLIT_FILENAME = ["FILENAME*0*", "utf-8''Rechnung%20M%C3%A4rz%20", "FILENAME*1*", "f%C3%BCr%20Zubeh%C3%B6r",
+                  "FILENAME*2", ".pdf", "SIZE", "100"]
+
+
+def test_rfc2231_filename_split_over_parameters():
+    assert _param_dict(SPLIT_FILENAME) == {"filename": "Rechnung März für Zubehör.pdf", "size": "100"}
+    # Continuations may come in any order
+    shuffled = SPLIT_FILENAME[4:6] + SPLIT_FILENAME[2:4] + SPLIT_FILENAME[:2]
+    assert _param_dict(shuffled) == {"filename": "Rechnung März für Zubehör.pdf"}
+
+
+def test_rfc2231_filename_matches_the_email_package():
+    header = "; ".join(f"{name.lower()}={value}" for name, value in zip(SPLIT_FILENAME[::2], SPLIT_FILENAME[1::2]))
+    msg = email.message_from_string(f"Content-Disposition: attachment; {header}\n\nbody")
+    assert _param_dict(SPLIT_FILENAME)["filename"] == msg.get_filename()
+
+
+def test_rfc2231_charset_and_plain_parameters():
+    assert _param_dict(["NAME*", "iso-8859-1'de'Gr%FC%DFe.txt", "CHARSET", "us-ascii"]) == {
+        "name": "Grüße.txt", "charset": "us-ascii"}
+    assert _param_dict(None) == {}
+
+
+@pytest.mark.parametrize("encoding", ["base64", "quoted-printable", "7bit"])
+def test_decode_part_matches_the_email_package(encoding):
+    msg = email.message.EmailMessage()
+    if encoding == "base64":
+        msg.set_content(os.urandom(3001), maintype="application", subtype="octet-stream", cte="base64")
+    else:
+        msg.set_content("Grüße " * 100 if encoding != "7bit" else "plain text\n", cte=encoding)
+    assert decode_part(msg.get_payload().encode(), encoding) == msg.get_payload(decode=True)
+
+
+def test_decode_part_tolerates_broken_base64():
+    assert decode_part(b"SGVsbG8gV29y\r\nbGQ*", "base64") == b"Hello World"
+
+
+def test_attachment_parts_from_the_server():
+    name = "Rechnung März 2023 für die Lieferung von Büromaterial und Zubehör.pdf"
+    raw = make_message(1, attachments=[(name, "application/pdf", b"%PDF-1.4"), ("notes.txt", "text/plain", b"x")])
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [raw])
+        mail = connect("127.0.0.1", server.username, server.password, port=server.port, use_ssl=False)
+        mail.select("INBOX")
+        (_, items), = fetch_messages(mail, [1], "(BODYSTRUCTURE)")
+        mail.logout()
+    parts = find_attachment_parts(items["BODYSTRUCTURE"], extensions=[".pdf"])
+    assert [(part.section, part.filename, part.content_type) for part in parts] == [
+        ("2", name, "application/pdf")]
@@ -0,0 +1,35 @@
+from pyfunc3_email import download_emails
+from .fake_imap_server import FakeIMAPServer, make_message
+
+MESSAGES = 300
+
+
+def download(server, path):
+    return download_emails("127.0.0.1", server.username, server.password, str(path), "INBOX", limit=0,
+                           port=server.port, use_ssl=False, pool_size=3, batch_size=10, reporter="quiet")
+
+
+def test_parallel_download_saves_every_message(tmp_path):
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number, body_size=64) for number in range(MESSAGES)])
+        assert download(server, tmp_path)
+    assert len(list(tmp_path.glob("*.eml"))) == MESSAGES
+
+
+def test_dropped_connection_leaves_work_to_the_others(tmp_path):
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number, body_size=64) for number in range(MESSAGES)])
+        server.drop_connection(2)
+        assert download(server, tmp_path)
+        # Each chunk is fetched once, the dropped one twice
+        assert server.fetch_commands == MESSAGES // 10 + 1
+    assert len(list(tmp_path.glob("*.eml"))) == MESSAGES
+
+
+def test_all_connections_dropped_is_a_failure(tmp_path):
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number, body_size=64) for number in range(MESSAGES)])
+        for fetch in range(1, 4):
+            server.drop_connection(fetch)
+        assert not download(server, tmp_path)
+    assert not list(tmp_path.glob("*.eml"))
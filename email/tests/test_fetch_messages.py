@@ -0,0 +1,43 @@
+import asyncio
+import imaplib
+import pytest
+from pyfunc3_email import connect, connect_async, fetch_messages, fetch_messages_async
+from .fake_imap_server import FakeIMAPServer, make_message
+
+
+@pytest.fixture
+def server():
+    with FakeIMAPServer() as fake:
+        fake.add_messages("INBOX", [make_message(number) for number in range(1, 11)])
+        yield fake
+
+
+def test_fetch_messages_in_batches(server):
+    mail = connect("127.0.0.1", server.username, server.password, port=server.port, use_ssl=False)
+    mail.select("INBOX")
+    fetched = list(fetch_messages(mail, list(range(1, 11)), batch_size=4))
+    mail.logout()
+    assert [number for number, _ in fetched] == list(range(1, 11))
+    assert all(items for _, items in fetched)
+    assert server.commands.count("FETCH") == 3
+
+
+def test_dropped_connection_raises(server):
+    server.drop_connection(2)
+    mail = connect("127.0.0.1", server.username, server.password, port=server.port, use_ssl=False)
+    mail.select("INBOX")
+    with pytest.raises((imaplib.IMAP4.abort, OSError)):
+        list(fetch_messages(mail, list(range(1, 11)), batch_size=4))
+
+
+def test_dropped_connection_raises_async(server):
+    server.drop_connection(2)
+
+    async def fetch():
+        mail = await connect_async("127.0.0.1", server.username, server.password, port=server.port,
+                                   use_ssl=False)
+        await mail.select("INBOX")
+        return [item async for item in fetch_messages_async(mail, list(range(1, 11)), batch_size=4)]
+
+    with pytest.raises(imaplib.IMAP4.abort):
+        asyncio.run(fetch())
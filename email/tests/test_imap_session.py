@@ -0,0 +1,45 @@
+from pyfunc3_email import IMAPSession
+from .fake_imap_server import FakeIMAPServer, make_message
+
+MESSAGES = 20
+
+
+def session_for(server):
+    return IMAPSession("127.0.0.1", server.username, server.password, port=server.port, use_ssl=False)
+
+
+def test_download_retries_after_a_drop_midway(tmp_path):
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number) for number in range(MESSAGES)])
+        server.drop_connection(3)
+        with session_for(server) as session:
+            assert session.download_emails(str(tmp_path), "INBOX", limit=0, batch_size=5, resume=True,
+                                           reporter="quiet")
+            assert session.reconnects == 1
+        # Two batches before the drop, the remaining two batches after it
+        assert server.fetched_messages == MESSAGES
+    assert len(list(tmp_path.glob("*.eml"))) == MESSAGES
+
+
+def test_download_fails_if_the_retry_drops_too(tmp_path):
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number) for number in range(MESSAGES)])
+        server.drop_connection(2)
+        server.drop_connection(3)
+        with session_for(server) as session:
+            assert not session.download_emails(str(tmp_path), "INBOX", limit=0, batch_size=5,
+                                               reporter="quiet")
+            # The session still works afterwards
+            assert session.download_emails(str(tmp_path), "INBOX", limit=0, batch_size=5, reporter="quiet")
+    assert len(list(tmp_path.glob("*.eml"))) == MESSAGES
+
+
+def test_attachment_download_retries_after_a_drop(tmp_path):
+    attachment = [("invoice.pdf", "application/pdf", b"%PDF-1.4 invoice")]
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(number, attachments=attachment) for number in range(4)])
+        server.drop_connection(2)
+        with session_for(server) as session:
+            assert session.download_all_attachments_in_inbox(str(tmp_path), "INBOX", limit=0, batch_size=2)
+            assert session.reconnects == 1
+    assert list(tmp_path.iterdir())
@@ -0,0 +1,32 @@
+import asyncio
+from pyfunc3_email import download_emails_async
+from .fake_imap_server import FakeIMAPServer
+from .conftest import MESSAGES, FAILING, make_message, saved_subjects
+
+
+def test_incremental_fetches_only_new_messages(download, server, tmp_path):
+    assert download(incremental=True)
+    server.add_messages("INBOX", [make_message(MESSAGES + 1)])
+    server.reset_stats()
+    assert download(incremental=True)
+    assert server.fetched_messages == 1
+    assert len(saved_subjects(tmp_path)) == MESSAGES + 1
+
+
+def test_failed_write_stops_the_watermark(download, failing_write, tmp_path):
+    assert not download(incremental=True)
+    assert f"Message {FAILING}" not in saved_subjects(tmp_path)
+    failing_write()
+    assert download(incremental=True)
+    assert saved_subjects(tmp_path) == {f"Message {number}" for number in range(1, MESSAGES + 1)}
+
+
+def test_async_incremental_reads_long_search_responses(tmp_path):
+    # The UID SEARCH response lists every UID on one line, longer than the stream buffer limit
+    count = 15000
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [make_message(0, body_size=64)] * count)
+        options = dict(limit=20, port=server.port, use_ssl=False, reporter="quiet", incremental=True)
+        assert asyncio.run(download_emails_async("127.0.0.1", server.username, server.password,
+                                                 str(tmp_path), "INBOX", **options))
+    assert len(list(tmp_path.glob("*.eml"))) == 20
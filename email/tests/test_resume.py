@@ -0,0 +1,44 @@
+from .conftest import MESSAGES, FAILING, saved_subjects
+from pyfunc3_email import DownloadJournal, write_file_atomic
+
+
+def test_resume_skips_completed_messages(download, server, tmp_path):
+    assert download(resume=True)
+    server.reset_stats()
+    assert download(resume=True)
+    assert server.fetched_messages == 0
+    assert len(saved_subjects(tmp_path)) == MESSAGES
+
+
+def test_failed_write_is_not_journaled(download, server, failing_write, tmp_path):
+    download(resume=True)
+    assert f"Message {FAILING}" not in saved_subjects(tmp_path)
+    with DownloadJournal(str(tmp_path), "INBOX", server.uidvalidity["INBOX"]) as journal:
+        assert journal.completed == set(range(1, MESSAGES + 1)) - {FAILING}
+
+
+def test_resume_retries_failed_write(download, failing_write, tmp_path):
+    download(resume=True)
+    failing_write()
+    assert download(resume=True)
+    assert saved_subjects(tmp_path) == {f"Message {number}" for number in range(1, MESSAGES + 1)}
+
+
+def test_resume_downloads_corrupted_file_again(download, server, tmp_path):
+    assert download(resume=True)
+    target = sorted(tmp_path.glob("*.eml"))[0]
+    data = target.read_bytes()
+    # Same size, different content
+    target.write_bytes(data[:-1] + (b"x" if data[-1:] != b"x" else b"y"))
+    server.reset_stats()
+    assert download(resume=True)
+    assert server.fetched_messages == 1
+    assert target.read_bytes() == data
+
+
+def test_write_file_atomic_leaves_no_temporary_files(tmp_path):
+    target = tmp_path / "message.eml"
+    write_file_atomic(str(target), b"first")
+    write_file_atomic(str(target), b"second")
+    assert target.read_bytes() == b"second"
+    assert [path.name for path in tmp_path.iterdir()] == ["message.eml"]
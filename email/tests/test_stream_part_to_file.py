@@ -0,0 +1,75 @@
+import os
+import email
+import quopri
+import pytest
+from pyfunc3_email import connect, stream_part_to_file, PartDecoder, download_all_attachments_in_inbox
+from .fake_imap_server import FakeIMAPServer, make_message
+
+DATA = os.urandom(10007)
+
+
+def feed_in_pieces(encoding, encoded, size):
+    decoder = PartDecoder(encoding)
+    pieces = [decoder.feed(encoded[start:start + size]) for start in range(0, len(encoded), size)]
+    return b"".join(pieces) + decoder.flush()
+
+
+def attachment_part(raw):
+    return [part for part in email.message_from_bytes(raw).walk() if part.get_filename()][0]
+
+
+@pytest.mark.parametrize("size", [1, 3, 5, 77, 1001, 4097])
+def test_base64_in_pieces_matches_the_email_package(size):
+    part = attachment_part(make_message(1, attachments=[("data.bin", "application/octet-stream", DATA)]))
+    encoded = part.get_payload().encode()
+    assert feed_in_pieces("base64", encoded, size) == part.get_payload(decode=True) == DATA
+
+
+def test_quoted_printable_soft_line_break_across_pieces():
+    text = ("Grüße aus München, " * 20).encode('utf-8') + b"\r\nzweite Zeile = ende\r\n"
+    encoded = quopri.encodestring(text)
+    soft_break = encoded.index(b"=\r\n")
+    assert soft_break > 0
+    # Split before the "=", after it and between CR and LF
+    for split in (soft_break, soft_break + 1, soft_break + 2):
+        decoder = PartDecoder("quoted-printable")
+        decoded = decoder.feed(encoded[:split]) + decoder.feed(encoded[split:]) + decoder.flush()
+        assert decoded == quopri.decodestring(encoded)
+    for size in (1, 2, 3, 10, 75, 76):
+        assert feed_in_pieces("quoted-printable", encoded, size) == quopri.decodestring(encoded)
+
+
+def test_quoted_printable_part_matches_the_email_package():
+    msg = email.message.EmailMessage()
+    msg.set_content(("Straße " * 40 + "\n") * 5, cte="quoted-printable")
+    encoded = msg.get_payload().encode()
+    for size in (1, 7, 76):
+        assert feed_in_pieces("quoted-printable", encoded, size) == msg.get_payload(decode=True)
+
+
+def test_stream_part_to_file_with_odd_chunk_size(tmp_path):
+    raw = make_message(1, attachments=[("data.bin", "application/octet-stream", DATA)])
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [raw])
+        mail = connect("127.0.0.1", server.username, server.password, port=server.port, use_ssl=False)
+        mail.select("INBOX")
+        target = tmp_path / "data.bin"
+        written = stream_part_to_file(mail, 1, "2", "base64", str(target), chunk_size=1001)
+        mail.logout()
+        # One FETCH per chunk of the encoded part
+        assert server.commands.count("FETCH") == -(-len(attachment_part(raw).get_payload()) // 1001)
+    assert written == len(DATA)
+    assert target.read_bytes() == attachment_part(raw).get_payload(decode=True)
+
+
+def test_streamed_attachment_download(tmp_path):
+    name = "Rechnung März 2023 für die Lieferung von Büromaterial und Zubehör.pdf"
+    raw = make_message(1, attachments=[(name, "application/pdf", DATA)])
+    with FakeIMAPServer() as server:
+        server.add_messages("INBOX", [raw])
+        assert download_all_attachments_in_inbox("127.0.0.1", server.username, server.password, str(tmp_path),
+                                                 "INBOX", limit=0, port=server.port, use_ssl=False,
+                                                 use_bodystructure=True, stream=True, stream_chunk_size=1001)
+    files = list(tmp_path.iterdir())
+    assert [path.name for path in files] == [name.replace(" ", "_")]
+    assert files[0].read_bytes() == DATA
@@ -20,10 +20,7 @@ def extract_text_from_pdf(pdf_path):
     """
     try:
         reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return "".join(page.extract_text() + "\n" for page in reader.pages)
     except Exception as e:
         logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
         return ""
@@ -5,6 +5,7 @@ Class for managing company lists for OCR processing.
 import os
 import csv
 import logging
+from .CompanyMatcher import CompanyMatcher
 
 
 class CompanyList:
@@ -109,3 +110,16 @@ class CompanyList:
             list: Sorted list of company names
         """
         return sorted(self.companies, key=len, reverse=True)
+    
+    def compile_matcher(self, whole_word=False, longest_match=False):
+        """
+        Build a matcher that finds all companies of this list in one pass over a text.
+        
+        Args:
+            whole_word (bool): Only match names not surrounded by letters or digits
+            longest_match (bool): Among overlapping matches keep only the longest
+            
+        Returns:
+            CompanyMatcher: Reusable matcher over the company names
+        """
+        return CompanyMatcher(self.companies, whole_word=whole_word, longest_match=longest_match)
@@ -0,0 +1,205 @@
+"""
+Class for finding many company names in text in a single pass.
+"""
+
+
+class CompanyMatcher:
+    """
+    Aho-Corasick automaton over a list of company names.
+
+    The automaton is built once and can be reused across documents. Matching
+    is case-insensitive, like the substring scan of get_company_from_pdf, but
+    every name is found in one pass over the text instead of one scan per name.
+    """
+
+    def __init__(self, companies, whole_word=False, longest_match=False):
+        """
+        Initialize the CompanyMatcher and build the automaton.
+
+        Args:
+            companies (list): List of company names to search for
+            whole_word (bool): Only match names not surrounded by letters or digits
+            longest_match (bool): Among overlapping matches keep only the longest
+                                  (leftmost first), e.g. "Amazon Web Services"
+                                  instead of "Amazon"
+        """
+        self.companies = list(companies)
+        self.whole_word = whole_word
+        self.longest_match = longest_match
+        self._build()
+
+    def _build(self):
+        """Build the trie, failure links and merged outputs."""
+        # Node 0 is the root; each node has transitions, a failure link,
+        # and the indices of the names ending there (including via failure links)
+        goto = [{}]
+        outputs = [[]]
+        lengths = []
+        self._always = []
+
+        for index, company in enumerate(self.companies):
+            name = str(company).lower()
+            lengths.append(len(name))
+            if not name:
+                # The empty string is contained in every text
+                self._always.append(index)
+                continue
+            node = 0
+            for char in name:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(index)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                if outputs[fail[child]]:
+                    outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._lengths = lengths
+
+    def iter_matches(self, text):
+        """
+        Iterate over all occurrences of all names, including overlapping ones.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            generator: (start, end, company_index) tuples, positions in the lowercased text
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        lengths = self._lengths
+        node = 0
+        for position, char in enumerate(text.lower()):
+            while True:
+                next_node = goto[node].get(char)
+                if next_node is not None:
+                    node = next_node
+                    break
+                if not node:
+                    break
+                node = fail[node]
+            if outputs[node]:
+                end = position + 1
+                for index in outputs[node]:
+                    yield end - lengths[index], end, index
+
+    def _hit_nodes(self, text):
+        """
+        Get the automaton states with outputs reached while scanning text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            set: Node ids whose names occur in the text
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        hits = set()
+        node = 0
+        for char in text.lower():
+            while True:
+                next_node = goto[node].get(char)
+                if next_node is not None:
+                    node = next_node
+                    break
+                if not node:
+                    break
+                node = fail[node]
+            if outputs[node]:
+                hits.add(node)
+        return hits
+
+    def _select(self, text):
+        """
+        Get name occurrences after applying the whole-word and longest-match options.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, company_index) tuples ordered by position
+        """
+        matches = list(self.iter_matches(text))
+
+        if self.whole_word:
+            lowered = text.lower()
+            size = len(lowered)
+            matches = [
+                (start, end, index) for start, end, index in matches
+                if (start == 0 or not lowered[start - 1].isalnum())
+                and (end == size or not lowered[end].isalnum())
+            ]
+
+        matches.sort(key=lambda match: (match[0], match[0] - match[1], match[2]))
+
+        if self.longest_match:
+            selected = []
+            last_end = -1
+            for start, end, index in matches:
+                if start >= last_end:
+                    selected.append((start, end, index))
+                    last_end = end
+                elif (start, end) == selected[-1][:2]:
+                    # Same span under another name (duplicates in the list)
+                    selected.append((start, end, index))
+            matches = selected
+
+        return matches
+
+    def find_matches(self, text):
+        """
+        Find name occurrences in text, applying the whole-word and longest-match options.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, company) tuples ordered by position
+        """
+        return [(start, end, self.companies[index]) for start, end, index in self._select(text)]
+
+    def find(self, text):
+        """
+        Find which company names occur in text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: Found company names, in the order of the company list
+        """
+        if self.whole_word or self.longest_match:
+            indices = {index for _, _, index in self._select(text)}
+        else:
+            indices = set(self._always)
+            for node in self._hit_nodes(text):
+                indices.update(self._outputs[node])
+        return [self.companies[index] for index in sorted(indices)]
+
+    def __len__(self):
+        """Return the number of company names in the matcher."""
+        return len(self.companies)
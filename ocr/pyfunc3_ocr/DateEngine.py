@@ -0,0 +1,158 @@
+"""
+Class for finding dates in text with all patterns in a single pass.
+"""
+
+import re
+import logging
+import datetime
+import datefinder
+from .get_date_from_pdf_pattern import get_date_from_pdf_pattern
+from .parse_date import parse_date
+
+
+class DateEngine:
+    """
+    Precompiled date extraction over a list of regex patterns.
+
+    The patterns are deduplicated and merged into one alternation with a
+    named group per pattern, so the text is scanned once instead of once per
+    pattern. Matches do not overlap: where several patterns match at the same
+    position, the first one in the list wins.
+    """
+
+    def __init__(self, pattern_input_list=None, format_out_list=None):
+        """
+        Initialize the DateEngine and compile the combined pattern.
+
+        Args:
+            pattern_input_list (list, optional): Regex patterns for date extraction. A pattern
+                                                 with a group reports the text of its first group.
+                                                 Defaults to get_date_from_pdf_pattern.pattern_input_list.
+            format_out_list (list, optional): Output date formats, the first one that works is used.
+                                              Defaults to get_date_from_pdf_pattern.format_out_list.
+        """
+        if pattern_input_list is None:
+            pattern_input_list = get_date_from_pdf_pattern.pattern_input_list
+        if format_out_list is None:
+            format_out_list = get_date_from_pdf_pattern.format_out_list
+        self.patterns = list(dict.fromkeys(pattern_input_list))
+        self.format_out_list = list(format_out_list)
+        self._compile()
+
+    def _compile(self):
+        """Build the alternation and remember which group holds each pattern's date text."""
+        alternatives = []
+        self._groups = []
+        offset = 1
+        for index, pattern in enumerate(self.patterns):
+            inner = re.compile(pattern).groups
+            alternatives.append(f"(?P<p{index}>{pattern})")
+            # The pattern's own groups follow its named group
+            self._groups.append(offset + 1 if inner else offset)
+            offset += inner + 1
+        if not alternatives:
+            self._regex = None
+            return
+        combined = "|".join(alternatives)
+        # re tries every alternative at every position; when all patterns start
+        # with a digit, a lookahead lets it skip the other positions quickly
+        if all(re.sub(r'^(?:\((?:\?:)?)+', '', pattern).startswith(r'\d') for pattern in self.patterns):
+            combined = rf"(?=\d)(?:{combined})"
+        self._regex = re.compile(combined)
+
+    def iter_matches(self, text):
+        """
+        Iterate over the date strings in text, in text order.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            generator: (start, end, matched_text, pattern_index) tuples
+        """
+        if self._regex is None:
+            return
+        groups = self._groups
+        for match in self._regex.finditer(text):
+            # The named group of the matching pattern is the last one closed
+            index = int(match.lastgroup[1:])
+            group = groups[index]
+            if match.group(group) is None:
+                continue
+            yield match.start(group), match.end(group), match.group(group), index
+
+    def parse(self, matched_text):
+        """
+        Parse a matched date string (see parse_date).
+
+        Args:
+            matched_text (str): Date string found by a pattern
+
+        Returns:
+            datetime.datetime: The date, or None if it cannot be parsed
+        """
+        return parse_date(matched_text)
+
+    def format(self, date_obj):
+        """
+        Format a date with the first output format that works.
+
+        Args:
+            date_obj (datetime.datetime): Date to format
+
+        Returns:
+            str: Formatted date, or None if no format works
+        """
+        for date_format in self.format_out_list:
+            try:
+                return date_obj.strftime(date_format)
+            except ValueError:
+                continue
+        return None
+
+    def find_matches(self, text):
+        """
+        Find and parse the dates in text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, original_text, date_object, formatted_date) tuples in
+                  text order, for the matches that could be parsed and formatted
+        """
+        matches = []
+        for start, end, matched_text, _ in self.iter_matches(text):
+            date_obj = self.parse(matched_text)
+            if date_obj is None:
+                continue
+            formatted_date = self.format(date_obj)
+            if formatted_date:
+                matches.append((start, end, matched_text, date_obj, formatted_date))
+        return matches
+
+    def find(self, text, fallback=True):
+        """
+        Find the dates in text, like find_dates_in_text.
+
+        Args:
+            text (str): Cleaned text to search
+            fallback (bool): Use datefinder if no pattern matches
+
+        Returns:
+            list: List of extracted dates [original_text, date_object, formatted_date]
+        """
+        dates = [[matched_text, date_obj, formatted_date]
+                 for _, _, matched_text, date_obj, formatted_date in self.find_matches(text)]
+        if dates or not fallback:
+            return dates
+
+        try:
+            for date_obj in datefinder.find_dates(text, base_date=datetime.datetime.today()):
+                formatted_date = self.format(date_obj)
+                if formatted_date:
+                    # datefinder does not report the original text
+                    dates.append([date_obj.strftime("%Y-%m-%d"), date_obj, formatted_date])
+        except Exception as e:
+            logging.error(f"Error using datefinder: {e}")
+        return dates
@@ -0,0 +1,48 @@
+"""
+Class describing which parts of a PDF document are extracted for matching.
+"""
+
+
+class ExtractionPolicy:
+    """
+    Limits on the pages and page regions that are extracted from a document.
+
+    Invoice dates and issuers are almost always at the top of page one, so
+    reading only the first pages, stopping at the first page with a match,
+    or only the top of each page avoids extracting long statements in full.
+    """
+
+    def __init__(self, max_pages=None, stop_when_found=False, top_fraction=None):
+        """
+        Initialize the ExtractionPolicy.
+
+        Args:
+            max_pages (int, optional): Extract at most this many pages from the start
+            stop_when_found (bool): Extract page by page and stop after the first page
+                                    on which the searched values were found
+            top_fraction (float, optional): Only extract text in this top part of each
+                                            page, e.g. 0.3 for the upper 30%
+        """
+        if max_pages is not None and max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        if top_fraction is not None and not 0 < top_fraction <= 1:
+            raise ValueError("top_fraction must be between 0 and 1")
+        self.max_pages = max_pages
+        self.stop_when_found = stop_when_found
+        self.top_fraction = top_fraction
+
+    @property
+    def whole_document(self):
+        """True if every page is extracted in full, as without a policy."""
+        return self.max_pages is None and not self.stop_when_found and not self.top_fraction
+
+    def __repr__(self):
+        return (f"ExtractionPolicy(max_pages={self.max_pages!r}, stop_when_found={self.stop_when_found!r}, "
+                f"top_fraction={self.top_fraction!r})")
+
+
+# Extract the whole document
+WHOLE_DOCUMENT = ExtractionPolicy()
+
+# Read an invoice header: the first page, or the next ones until something is found
+INVOICE_HEADER = ExtractionPolicy(max_pages=3, stop_when_found=True)
@@ -0,0 +1,308 @@
+"""
+Class for reading the text of scanned PDF pages with Tesseract OCR.
+"""
+
+import os
+import math
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from PyPDF2 import PdfReader
+from .metrics import get_metrics
+
+
+class OcrEngine:
+    """
+    OCR fallback for pages without a text layer, using the command line tools
+    pdftoppm (poppler) to rasterize a page and tesseract to read it.
+
+    Only pages whose extracted text is (almost) empty are rasterized, so
+    documents with a text layer cost nothing extra. The pages of a document
+    are OCRed by several tesseract processes at once. Results are cached per
+    page hash (page content and image data plus the OCR settings), so a page
+    is only OCRed once, even when it appears in several files.
+    """
+
+    # Bump when the OCR invocation changes in a way that alters its output
+    ENGINE_VERSION = "tesseract-1"
+
+    def __init__(self, dpi=300, language="eng", workers=None, min_chars=1, timeout=120,
+                 tesseract_cmd="tesseract", pdftoppm_cmd="pdftoppm"):
+        """
+        Initialize the OcrEngine.
+
+        Args:
+            dpi (int): Resolution at which pages are rasterized
+            language (str): Tesseract language(s), e.g. "eng" or "deu+eng"
+            workers (int, optional): Number of pages OCRed at once. Defaults to the CPU count,
+                                     or 1 inside a worker process, e.g. of analyze_pdf_batch,
+                                     which already runs one document per CPU.
+            min_chars (int): Pages with fewer non-whitespace characters are OCRed
+            timeout (float): Maximum seconds for rasterizing or reading one page
+            tesseract_cmd (str): Name or path of the tesseract binary
+            pdftoppm_cmd (str): Name or path of the pdftoppm binary
+        """
+        if dpi < 1:
+            raise ValueError("dpi must be at least 1")
+        self.dpi = dpi
+        self.language = language
+        self.workers = workers
+        self.min_chars = min_chars
+        self.timeout = timeout
+        self.tesseract_cmd = tesseract_cmd
+        self.pdftoppm_cmd = pdftoppm_cmd
+        self._reported_missing = False
+
+    @property
+    def available(self):
+        """True if both command line tools are installed."""
+        return bool(shutil.which(self.tesseract_cmd) and shutil.which(self.pdftoppm_cmd))
+
+    def needs_ocr(self, text):
+        """
+        Check whether a page's extracted text is too short to be a text layer.
+
+        Args:
+            text (str): Extracted text of the page
+
+        Returns:
+            bool: True if the page should be OCRed
+        """
+        return len("".join(text.split())) < self.min_chars
+
+    def _worker_count(self):
+        if self.workers:
+            return self.workers
+        if multiprocessing.parent_process() is not None:
+            return 1
+        return os.cpu_count() or 1
+
+    def page_key(self, page, top_fraction=None):
+        """
+        Get the OCR cache key of a page.
+
+        Args:
+            page (PyPDF2.PageObject): Page to OCR
+            top_fraction (float, optional): Only the top part of the page is OCRed
+
+        Returns:
+            str: Hash of the page content, its images and the OCR settings
+        """
+        digest = hashlib.sha256()
+        digest.update(repr([float(value) for value in page.mediabox]).encode())
+        digest.update(repr(page.get("/Rotate", 0)).encode())
+        contents = page.get_contents()
+        if contents is not None:
+            digest.update(contents.get_data())
+        _hash_xobjects(page, digest, set())
+        return (f"{digest.hexdigest()}:{self.dpi}:{self.language}:{top_fraction or 1}:"
+                f"{self.ENGINE_VERSION}")
+
+    def _ocr_page(self, pdf_path, number, size, top_fraction=None):
+        """
+        Rasterize one page and read it with tesseract, raising on failure.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            number (int): Page number, starting at 1
+            size (tuple): Width and height of the page in points
+            top_fraction (float, optional): Only OCR this top part of the page
+
+        Returns:
+            str: Recognized text
+        """
+        with tempfile.TemporaryDirectory(prefix="pyfunc3_ocr_") as tmp_dir:
+            image_root = os.path.join(tmp_dir, "page")
+            command = [self.pdftoppm_cmd, "-f", str(number), "-l", str(number), "-r", str(self.dpi),
+                       "-gray", "-png", "-singlefile"]
+            if top_fraction:
+                # Crop in pixels; page rotation is ignored, as for the text layer
+                width, height = size
+                command += ["-x", "0", "-y", "0",
+                            "-W", str(math.ceil(width * self.dpi / 72)),
+                            "-H", str(math.ceil(height * top_fraction * self.dpi / 72))]
+            subprocess.run(command + [pdf_path, image_root], check=True, capture_output=True,
+                           timeout=self.timeout)
+            # One OpenMP thread per tesseract, the pages already run in parallel
+            env = dict(os.environ, OMP_THREAD_LIMIT="1")
+            result = subprocess.run(
+                [self.tesseract_cmd, image_root + ".png", "stdout", "-l", self.language, "--dpi", str(self.dpi)],
+                check=True, capture_output=True, timeout=self.timeout, env=env,
+            )
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def _timed_ocr_page(self, pdf_path, number, size, top_fraction):
+        """OCR one page, recording its duration and logging failures."""
+        metrics = get_metrics()
+        start = time.perf_counter()
+        try:
+            text = self._ocr_page(pdf_path, number, size, top_fraction)
+        except subprocess.CalledProcessError as e:
+            logging.error(f"Error running OCR on page {number} of {pdf_path}: "
+                          f"{e.stderr.decode('utf-8', errors='replace').strip()}")
+            metrics.inc("ocr_pages_total", result="error")
+            return None
+        except Exception as e:
+            logging.error(f"Error running OCR on page {number} of {pdf_path}: {e}")
+            metrics.inc("ocr_pages_total", result="error")
+            return None
+        metrics.observe("ocr_page_seconds", time.perf_counter() - start)
+        metrics.inc("ocr_pages_total", result="ocr")
+        return text
+
+    def ocr_pages(self, pdf_path, page_indexes, top_fraction=None, cache=None, pages=None):
+        """
+        OCR some pages of a PDF file, several at once.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_indexes (list): Indexes of the pages to OCR, starting at 0
+            top_fraction (float, optional): Only OCR this top part of each page
+            cache (TextCache, optional): Cache of OCR results per page key
+            pages (sequence, optional): Parsed pages of the file (PyPDF2.PageObject),
+                                        so it is not parsed again
+
+        Returns:
+            list: Recognized text of each page, empty if OCR failed
+        """
+        if not self.available:
+            if not self._reported_missing:
+                logging.warning(f"OCR needs {self.pdftoppm_cmd} and {self.tesseract_cmd}, "
+                                f"pages without a text layer are left empty")
+                self._reported_missing = True
+            return [""] * len(page_indexes)
+
+        metrics = get_metrics()
+        if pages is None:
+            pages = PdfReader(pdf_path).pages
+        texts = {}
+        jobs = []
+        queued = {}
+        same = {}
+        for index in page_indexes:
+            page = pages[index]
+            key = self.page_key(page, top_fraction) if cache is not None else None
+            text = cache.get_ocr(key) if key is not None else None
+            if text is not None:
+                metrics.inc("ocr_pages_total", result="hit")
+                texts[index] = text
+            elif key is not None and key in queued:
+                # Same page content as a page already queued
+                same[index] = queued[key]
+            else:
+                if key is not None:
+                    queued[key] = index
+                jobs.append((index, key, (float(page.mediabox.width), float(page.mediabox.height))))
+
+        workers = min(self._worker_count(), len(jobs))
+        if workers <= 1:
+            results = [self._timed_ocr_page(pdf_path, index + 1, size, top_fraction) for index, _, size in jobs]
+        else:
+            # The work happens in the tesseract processes, threads only wait for them
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda job: self._timed_ocr_page(pdf_path, job[0] + 1, job[2], top_fraction), jobs))
+
+        for (index, key, _), text in zip(jobs, results):
+            if text is not None and key is not None:
+                cache.put_ocr(key, text)
+            texts[index] = text or ""
+        return [texts[same.get(index, index)] for index in page_indexes]
+
+    def fill_pages(self, pdf_path, page_texts, top_fraction=None, cache=None, pages=None):
+        """
+        Replace the pages without a text layer by their OCR text.
+
+        Pages are passed through as they arrive. A run of pages needing OCR
+        is read ahead up to the number of workers, so those pages are OCRed
+        together.
+
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_texts (iterable): Extracted text of each page, from the first page on
+            top_fraction (float, optional): Only OCR this top part of each page
+            cache (TextCache, optional): Cache of OCR results per page key
+            pages (sequence, optional): Parsed pages of the file (PyPDF2.PageObject),
+                                        so it is not parsed again
+
+        Returns:
+            generator: Text of each page
+        """
+        workers = self._worker_count()
+        pending = []
+        for index, text in enumerate(page_texts):
+            needs_ocr = self.needs_ocr(text)
+            if needs_ocr:
+                pending.append(index)
+                if len(pending) < workers:
+                    continue
+            if pending:
+                yield from self.ocr_pages(pdf_path, pending, top_fraction, cache, pages)
+                pending = []
+            if not needs_ocr:
+                yield text
+        if pending:
+            yield from self.ocr_pages(pdf_path, pending, top_fraction, cache, pages)
+
+    def __repr__(self):
+        return (f"OcrEngine(dpi={self.dpi!r}, language={self.language!r}, workers={self.workers!r}, "
+                f"min_chars={self.min_chars!r})")
+
+
+def _hash_xobjects(obj, digest, seen):
+    """
+    Add the data of the images and forms drawn by a page or form to a hash.
+
+    Args:
+        obj (PyPDF2.generic.DictionaryObject): Page or form XObject
+        digest (hashlib._Hash): Hash to update
+        seen (set): Ids of the objects already hashed
+    """
+    resources = obj.get("/Resources")
+    if resources is None:
+        return
+    xobjects = resources.get_object().get("/XObject")
+    if xobjects is None:
+        return
+    for name, ref in sorted(xobjects.get_object().items()):
+        xobject = ref.get_object()
+        object_id = getattr(ref, "idnum", None) or id(xobject)
+        if object_id in seen:
+            continue
+        seen.add(object_id)
+        data = getattr(xobject, "_data", b"") or b""
+        digest.update(name.encode())
+        digest.update(data if isinstance(data, bytes) else str(data).encode())
+        if xobject.get("/Subtype") == "/Form":
+            _hash_xobjects(xobject, digest, seen)
+
+
+_default_engine = None
+
+
+def get_default_ocr_engine(enabled=None):
+    """
+    Get the process-wide default OCR engine.
+
+    OCR is opt-in: the engine is only returned if the environment variable
+    PYFUNC3_OCR_TESSERACT=1 is set or it is asked for explicitly.
+
+    Args:
+        enabled (bool, optional): True to get the engine regardless of the environment
+
+    Returns:
+        OcrEngine: The shared engine, or None if OCR is disabled
+    """
+    global _default_engine
+    if enabled is None:
+        enabled = os.environ.get("PYFUNC3_OCR_TESSERACT", "0").lower() in ("1", "true", "yes", "on")
+    if not enabled:
+        return None
+    if _default_engine is None:
+        _default_engine = OcrEngine()
+    return _default_engine
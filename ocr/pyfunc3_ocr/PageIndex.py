@@ -0,0 +1,190 @@
+"""
+Persistent inverted index of the words on each page of PDF documents.
+"""
+
+import os
+import zlib
+import sqlite3
+from .match_terms import tokenize, compile_terms
+
+
+class PageIndex:
+    """
+    SQLite-backed index from words to the document pages containing them.
+
+    Documents are keyed by path and stored with their size and mtime, so
+    update_page_index only extracts files that were added or changed since
+    they were indexed. The page texts are kept too: the index narrows a
+    search down to the pages containing every word of a term, and only
+    those pages are checked for the exact term.
+    """
+
+    def __init__(self, index_path):
+        """
+        Initialize the PageIndex.
+
+        Args:
+            index_path (str): Path of the index database, created if needed
+        """
+        self.index_path = index_path
+        self._initialized = False
+
+    def _connect(self):
+        """
+        Open a connection to the index database, creating it if needed.
+
+        Returns:
+            sqlite3.Connection: Open database connection
+        """
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, "
+                "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "doc_id INTEGER NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL, "
+                "PRIMARY KEY (doc_id, page))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "token TEXT NOT NULL, doc_id INTEGER NOT NULL, page INTEGER NOT NULL, "
+                "PRIMARY KEY (token, doc_id, page)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def documents(self):
+        """
+        Get the indexed documents.
+
+        Returns:
+            dict: (size, mtime_ns) of each indexed path
+        """
+        conn = self._connect()
+        try:
+            return {path: (size, mtime_ns) for path, size, mtime_ns
+                    in conn.execute("SELECT path, size, mtime_ns FROM documents")}
+        finally:
+            conn.close()
+
+    def add(self, pdf_path, pages, size, mtime_ns):
+        """
+        Index the page texts of a document, replacing an earlier version.
+
+        Args:
+            pdf_path (str): Path of the document
+            pages (list): Text of each page
+            size (int): File size when the text was extracted
+            mtime_ns (int): File modification time when the text was extracted
+        """
+        path = os.path.abspath(pdf_path)
+        conn = self._connect()
+        try:
+            self._remove(conn, path)
+            doc_id = conn.execute(
+                "INSERT INTO documents (path, size, mtime_ns) VALUES (?, ?, ?)", (path, size, mtime_ns)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO pages (doc_id, page, text) VALUES (?, ?, ?)",
+                ((doc_id, number, zlib.compress(text.encode('utf-8')))
+                 for number, text in enumerate(pages, 1)),
+            )
+            conn.executemany(
+                "INSERT INTO postings (token, doc_id, page) VALUES (?, ?, ?)",
+                ((token, doc_id, number) for number, text in enumerate(pages, 1)
+                 for token in set(tokenize(text))),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _remove(self, conn, path):
+        row = conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+        conn.execute("DELETE FROM pages WHERE doc_id = ?", row)
+        conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def remove(self, pdf_paths):
+        """
+        Remove documents from the index.
+
+        Args:
+            pdf_paths (list): Paths of the documents
+        """
+        conn = self._connect()
+        try:
+            for pdf_path in pdf_paths:
+                self._remove(conn, os.path.abspath(pdf_path))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def search(self, terms, ignore_case=True, paths=None):
+        """
+        Find the first page on which each term occurs in the indexed documents.
+
+        Args:
+            terms (list): Search terms, matched as whole words (see compile_terms)
+            ignore_case (bool): Match regardless of case
+            paths (list, optional): Only search these documents. Defaults to all.
+
+        Returns:
+            dict: For each document containing any term, the first page number
+                  (starting at 1) of each term found in it
+        """
+        patterns = compile_terms(terms, ignore_case)
+        conn = self._connect()
+        try:
+            names = dict(conn.execute("SELECT id, path FROM documents"))
+            if paths is not None:
+                wanted = {os.path.abspath(path) for path in paths}
+                names = {doc_id: path for doc_id, path in names.items() if path in wanted}
+            texts = {}
+            found = {}
+            for term, pattern in patterns.items():
+                # Pages holding every word of the term, rarest word first
+                words = set(tokenize(term))
+                counts = {word: conn.execute("SELECT COUNT(*) FROM postings WHERE token = ?",
+                                             (word,)).fetchone()[0] for word in words}
+                candidates = None
+                for word in sorted(words, key=counts.get):
+                    rows = set(conn.execute("SELECT doc_id, page FROM postings WHERE token = ?", (word,)))
+                    candidates = rows if candidates is None else candidates & rows
+                    if not candidates:
+                        break
+                if candidates is None:
+                    candidates = set(conn.execute("SELECT doc_id, page FROM pages"))
+
+                for doc_id, page in sorted(candidates):
+                    if doc_id not in names or term in found.get(doc_id, {}):
+                        continue
+                    if (doc_id, page) not in texts:
+                        row = conn.execute("SELECT text FROM pages WHERE doc_id = ? AND page = ?",
+                                           (doc_id, page)).fetchone()
+                        texts[doc_id, page] = zlib.decompress(row[0]).decode('utf-8')
+                    if pattern.search(texts[doc_id, page]):
+                        found.setdefault(doc_id, {})[term] = page
+        finally:
+            conn.close()
+        return {names[doc_id]: pages for doc_id, pages in sorted(found.items(), key=lambda item: names[item[0]])}
+
+    def clear(self):
+        """Remove all documents."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM documents")
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,357 @@
+"""
+Persistent on-disk cache for text extracted from PDF documents.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+
+
+class TextCache:
+    """
+    SQLite-backed store of extracted page texts keyed by file content.
+
+    Entries are keyed by the SHA-256 of the file bytes together with the
+    extractor version, so renamed or copied files share one entry and a
+    change to the extraction code never serves stale text. A small path
+    index (path, size, mtime) lets unchanged files skip re-hashing too.
+
+    Triggers keep the entry count and total size of each table up to date,
+    so the limits are checked without scanning the tables and eviction only
+    runs once a limit is crossed.
+    """
+
+    # Tables whose entries are evicted, each with its own limits
+    TABLES = ("texts", "ocr_pages")
+
+    # Bump when the extraction logic changes in a way that alters its output
+    EXTRACTOR_VERSION = "pypdf2-1"
+
+    DEFAULT_MAX_ENTRIES = 20000
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    DEFAULT_MAX_AGE_DAYS = 180
+
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        """
+        Initialize the TextCache.
+
+        Args:
+            cache_dir (str, optional): Directory holding the cache database.
+                                       Defaults to $PYFUNC3_OCR_CACHE_DIR or
+                                       ~/.cache/pyfunc3_ocr.
+            max_entries (int): Maximum number of cached documents (0 for no limit)
+            max_bytes (int): Maximum total size of stored text (0 for no limit)
+            max_age_days (float): Drop entries not used for this many days (0 for no limit)
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get("PYFUNC3_OCR_CACHE_DIR") or os.path.join(
+                os.path.expanduser("~"), ".cache", "pyfunc3_ocr")
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, "text_cache.sqlite")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._initialized = False
+
+    def _connect(self):
+        """
+        Open a connection to the cache database, creating it if needed.
+
+        A fresh connection is used per operation so the cache can be shared
+        between threads and worker processes.
+
+        Returns:
+            sqlite3.Connection: Open database connection
+        """
+        if not self._initialized:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # INSERT OR REPLACE fires the delete triggers only with recursive triggers on
+        conn.execute("PRAGMA recursive_triggers = ON")
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                "key TEXT PRIMARY KEY, pages BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS texts_accessed ON texts (accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_pages ("
+                "key TEXT PRIMARY KEY, text BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_pages_accessed ON ocr_pages (accessed_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS paths ("
+                "path TEXT PRIMARY KEY, size INTEGER NOT NULL, "
+                "mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS paths_sha256 ON paths (sha256)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "name TEXT PRIMARY KEY, entries INTEGER NOT NULL, size INTEGER NOT NULL)"
+            )
+            for table in self.TABLES:
+                # Counted once for databases created before the totals table
+                conn.execute(
+                    f"INSERT OR IGNORE INTO totals (name, entries, size) "
+                    f"SELECT ?, COUNT(*), COALESCE(SUM(size), 0) FROM {table}", (table,)
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table} BEGIN "
+                    f"UPDATE totals SET entries = entries + 1, size = size + NEW.size "
+                    f"WHERE name = '{table}'; END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table} BEGIN "
+                    f"UPDATE totals SET entries = entries - 1, size = size - OLD.size "
+                    f"WHERE name = '{table}'; END"
+                )
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def file_hash(self, pdf_path):
+        """
+        Get the SHA-256 of a file, reusing the stored digest if the file is unchanged.
+
+        Args:
+            pdf_path (str): Path to the file
+
+        Returns:
+            str: Hex digest of the file contents
+        """
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT size, mtime_ns, sha256 FROM paths WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                return row[2]
+
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            sha256 = digest.hexdigest()
+
+            conn.execute(
+                "INSERT OR REPLACE INTO paths (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256),
+            )
+            conn.commit()
+            return sha256
+        finally:
+            conn.close()
+
+    def key_for(self, pdf_path):
+        """
+        Get the cache key for a file.
+
+        Args:
+            pdf_path (str): Path to the file
+
+        Returns:
+            str: Cache key combining the content hash and extractor version
+        """
+        return f"{self.file_hash(pdf_path)}:{self.EXTRACTOR_VERSION}"
+
+    def get(self, pdf_path):
+        """
+        Get the cached page texts of a file.
+
+        Args:
+            pdf_path (str): Path to the file
+
+        Returns:
+            list: Page texts, or None if the file is not cached
+        """
+        try:
+            key = self.key_for(pdf_path)
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT pages FROM texts WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE texts SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            finally:
+                conn.close()
+            return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        except Exception as e:
+            logging.warning(f"Error reading text cache for {pdf_path}: {e}")
+            return None
+
+    def put(self, pdf_path, pages):
+        """
+        Store the page texts of a file and evict old entries if needed.
+
+        Args:
+            pdf_path (str): Path to the file
+            pages (list): Page texts to store
+        """
+        try:
+            key = self.key_for(pdf_path)
+            blob = zlib.compress(json.dumps(pages).encode('utf-8'))
+            now = time.time()
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO texts (key, pages, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.warning(f"Error writing text cache for {pdf_path}: {e}")
+
+    def get_ocr(self, page_key):
+        """
+        Get the cached OCR text of a page.
+
+        Args:
+            page_key (str): Page key (see OcrEngine.page_key)
+
+        Returns:
+            str: OCR text, or None if the page is not cached
+        """
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT text FROM ocr_pages WHERE key = ?", (page_key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE ocr_pages SET accessed_at = ? WHERE key = ?", (time.time(), page_key))
+                conn.commit()
+            finally:
+                conn.close()
+            return zlib.decompress(row[0]).decode('utf-8')
+        except Exception as e:
+            logging.warning(f"Error reading OCR cache: {e}")
+            return None
+
+    def put_ocr(self, page_key, text):
+        """
+        Store the OCR text of a page and evict old entries if needed.
+
+        Args:
+            page_key (str): Page key (see OcrEngine.page_key)
+            text (str): OCR text to store
+        """
+        try:
+            blob = zlib.compress(text.encode('utf-8'))
+            now = time.time()
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_pages (key, text, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (page_key, blob, len(blob), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.warning(f"Error writing OCR cache: {e}")
+
+    def _evict(self, conn, now):
+        """
+        Remove entries exceeding the age, count and size limits, least recently used first.
+
+        The limits apply to the document texts and the OCR page texts
+        separately. Path digests without a document text are removed whenever
+        document texts are.
+
+        Args:
+            conn (sqlite3.Connection): Open database connection
+            now (float): Current timestamp
+        """
+        for table in self.TABLES:
+            stale = []
+            if self.max_age_days:
+                cutoff = now - self.max_age_days * 86400
+                oldest = conn.execute(f"SELECT MIN(accessed_at) FROM {table}").fetchone()[0]
+                if oldest is not None and oldest < cutoff:
+                    stale += conn.execute(
+                        f"SELECT key, size FROM {table} WHERE accessed_at < ?", (cutoff,)
+                    ).fetchall()
+            entries, total = conn.execute(
+                "SELECT entries, size FROM totals WHERE name = ?", (table,)
+            ).fetchone()
+            entries -= len(stale)
+            total -= sum(size for _, size in stale)
+            over_count = self.max_entries and entries > self.max_entries
+            over_size = self.max_bytes and total > self.max_bytes
+            if over_count or over_size:
+                rows = conn.execute(
+                    f"SELECT key, size FROM {table} ORDER BY accessed_at LIMIT -1 OFFSET ?", (len(stale),)
+                )
+                for key, size in rows:
+                    if ((not self.max_entries or entries <= self.max_entries)
+                            and (not self.max_bytes or total <= self.max_bytes)):
+                        break
+                    stale.append((key, size))
+                    entries -= 1
+                    total -= size
+            if not stale:
+                continue
+            conn.executemany(f"DELETE FROM {table} WHERE key = ?", [(key,) for key, _ in stale])
+            if table == "texts":
+                # Also drops digests of files whose text was never stored, e.g. after a failed extraction
+                conn.execute(
+                    "DELETE FROM paths WHERE NOT EXISTS ("
+                    "SELECT 1 FROM texts WHERE texts.key = paths.sha256 || ':' || ?)",
+                    (self.EXTRACTOR_VERSION,),
+                )
+
+    def evict(self):
+        """Apply the age, count and size limits now."""
+        conn = self._connect()
+        try:
+            self._evict(conn, time.time())
+            conn.commit()
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Remove all cached texts, OCR texts and path digests."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM texts")
+            conn.execute("DELETE FROM ocr_pages")
+            conn.execute("DELETE FROM paths")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_default_cache = None
+
+
+def get_default_text_cache():
+    """
+    Get the process-wide default text cache.
+
+    Setting the environment variable PYFUNC3_OCR_CACHE=0 disables it.
+
+    Returns:
+        TextCache: The shared cache, or None if caching is disabled
+    """
+    global _default_cache
+    if os.environ.get("PYFUNC3_OCR_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    if _default_cache is None:
+        _default_cache = TextCache()
+    return _default_cache
@@ -7,5 +7,22 @@ from .get_date_from_pdf import get_date_from_pdf
 from .get_date_from_pdf_pattern import get_date_from_pdf_pattern
 from .find_string_in_file_path import find_string_in_file_path
 from .CompanyList import CompanyList
+from .CompanyMatcher import CompanyMatcher
+from .DateEngine import DateEngine
+from .parse_date import parse_date
+from .TextCache import TextCache, get_default_text_cache
+from .OcrEngine import OcrEngine, get_default_ocr_engine
+from .ExtractionPolicy import ExtractionPolicy, WHOLE_DOCUMENT, INVOICE_HEADER
+from .extract_text_from_pdf import extract_text_from_pdf, extract_pages_from_pdf, iter_pdf_pages, join_pages
+from .analyze_pdf import analyze_pdf, PdfAnalysis
+from .analyze_pdf_batch import analyze_pdf_batch
+from .metrics import Metrics, get_metrics
+from .PageIndex import PageIndex
+from .search_pdfs import search_pdfs, update_page_index
 
-__all__ = ["get_company_from_pdf", "get_date_from_pdf", "get_date_from_pdf_pattern", "find_string_in_file_path", "CompanyList"]
+__all__ = ["get_company_from_pdf", "get_date_from_pdf", "get_date_from_pdf_pattern", "find_string_in_file_path", "CompanyList", "CompanyMatcher", "DateEngine", "parse_date",
+           "TextCache", "get_default_text_cache", "OcrEngine", "get_default_ocr_engine",
+           "ExtractionPolicy", "WHOLE_DOCUMENT", "INVOICE_HEADER", "extract_text_from_pdf", "extract_pages_from_pdf",
+           "iter_pdf_pages", "join_pages",
+           "analyze_pdf", "PdfAnalysis", "analyze_pdf_batch", "Metrics", "get_metrics",
+           "PageIndex", "search_pdfs", "update_page_index"]
@@ -0,0 +1,8 @@
+"""
+Allow running the OCR command line interface with python -m pyfunc3_ocr.
+"""
+
+import sys
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Functions for analyzing PDF documents in a single pass.
+"""
+
+import os
+import logging
+from .clean_text import clean_text
+from .extract_text_from_pdf import _extract_pages, _iter_pages
+from .get_company_from_pdf import find_companies_in_text
+from .get_date_from_pdf import find_dates_in_text
+from .get_date_from_pdf_pattern import get_date_from_pdf_pattern
+from .metrics import get_metrics
+
+
+class PdfAnalysis:
+    """
+    Result of analyzing a PDF document: companies, dates and page metadata.
+    """
+
+    def __init__(self, pdf_path, companies=None, dates=None, pages=None, error=None):
+        """
+        Initialize the PdfAnalysis.
+
+        Args:
+            pdf_path (str): Path to the analyzed PDF file
+            companies (list, optional): Found company names
+            dates (list, optional): Found dates [original_text, date_object, formatted_date]
+            pages (list, optional): Per-page metadata dicts (page_number, char_count, has_text)
+            error (str, optional): Error message if the analysis failed
+        """
+        self.pdf_path = pdf_path
+        self.companies = companies if companies is not None else []
+        self.dates = dates if dates is not None else []
+        self.pages = pages if pages is not None else []
+        self.error = error
+
+    @property
+    def page_count(self):
+        """Number of pages in the document."""
+        return len(self.pages)
+
+    @property
+    def has_text(self):
+        """Whether any page of the document has a text layer."""
+        return any(page["has_text"] for page in self.pages)
+
+    def to_dict(self):
+        """
+        Convert the analysis to a plain dictionary.
+
+        Returns:
+            dict: Analysis with dates formatted as [original_text, iso_date, formatted_date]
+        """
+        return {
+            "pdf_path": self.pdf_path,
+            "companies": list(self.companies),
+            "dates": [[match, date_obj.isoformat(), formatted] for match, date_obj, formatted in self.dates],
+            "pages": list(self.pages),
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return (f"PdfAnalysis({self.pdf_path!r}, companies={self.companies!r}, "
+                f"dates={len(self.dates)}, pages={self.page_count})")
+
+
+def _page_info(number, page_text):
+    """Metadata of an extracted page for PdfAnalysis.pages."""
+    return {"page_number": number, "char_count": len(page_text), "has_text": bool(page_text.strip())}
+
+
+def _analyze_progressively(page_texts, company_list, clean_patterns, format_out_list, pattern_input_list):
+    """
+    Read pages until both companies and dates were found on some page.
+
+    Args:
+        page_texts (generator): Text of each page, extracted on demand
+        company_list (list|CompanyMatcher): Company names or compiled matcher
+        clean_patterns (list): List of text cleaning patterns
+        format_out_list (list): List of output date formats
+        pattern_input_list (list|DateEngine): Regex patterns or a compiled DateEngine
+
+    Returns:
+        tuple: (companies of the first page naming any, dates of the first page
+               containing any, metadata of the pages read)
+    """
+    metrics = get_metrics()
+    companies = []
+    dates = []
+    pages = []
+    cleaned_pages = []
+    for number, page_text in enumerate(page_texts, 1):
+        pages.append(_page_info(number, page_text))
+        with metrics.time("text_cleaning_seconds"):
+            cleaned_text = clean_text(page_text, clean_patterns)
+        if not companies:
+            with metrics.time("company_matching_seconds"):
+                companies = find_companies_in_text(cleaned_text, company_list)
+        if not dates:
+            with metrics.time("date_matching_seconds"):
+                dates = find_dates_in_text(cleaned_text, format_out_list, pattern_input_list, fallback=False)
+        if companies and dates:
+            break
+        cleaned_pages.append(cleaned_text)
+    if not dates and cleaned_pages:
+        dates = find_dates_in_text(" ".join(cleaned_pages), format_out_list, pattern_input_list)
+    return companies, dates, pages
+
+
+def analyze_pdf(pdf_path, company_list, clean_patterns=None, format_out_list=None,
+                pattern_input_list=None, locales=None, cache=None, policy=None, ocr=None):
+    """
+    Extract companies and dates from a PDF document in one pass.
+
+    The document is opened and its text extracted and cleaned only once, instead
+    of once per get_company_from_pdf and get_date_from_pdf call. With a policy
+    that stops when found, pages are read only until companies and dates have
+    both been found, and pages lists just the pages read.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        company_list (list|CompanyMatcher): List of company names to search for,
+                                            or a matcher compiled with CompanyList.compile_matcher
+        clean_patterns (list, optional): List of text cleaning patterns.
+                                         Defaults to ["remove_extra_spaces"].
+        format_out_list (list, optional): List of output date formats.
+                                          Defaults to get_date_from_pdf_pattern.format_out_list.
+        pattern_input_list (list, optional): List of regex patterns for date extraction.
+                                             Defaults to get_date_from_pdf_pattern.pattern_input_list.
+        locales (list): List of locales for date parsing
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Limits on the pages and page regions to extract
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        PdfAnalysis: Companies, dates and page metadata of the document
+    """
+    if clean_patterns is None:
+        clean_patterns = ["remove_extra_spaces"]
+    if format_out_list is None:
+        format_out_list = get_date_from_pdf_pattern.format_out_list
+    if pattern_input_list is None:
+        pattern_input_list = get_date_from_pdf_pattern.pattern_input_list
+
+    metrics = get_metrics()
+    try:
+        if not os.path.exists(pdf_path):
+            logging.error(f"PDF file not found: {pdf_path}")
+            metrics.inc("pdf_documents_total", status="error")
+            return PdfAnalysis(pdf_path, error="PDF file not found")
+
+        if policy is not None and policy.stop_when_found:
+            companies, dates, pages = _analyze_progressively(_iter_pages(pdf_path, cache, policy, ocr), company_list,
+                                                             clean_patterns, format_out_list, pattern_input_list)
+            if not any(page["has_text"] for page in pages):
+                logging.warning(f"No text extracted from PDF: {pdf_path}")
+                metrics.inc("pdf_documents_total", status="no_text")
+                return PdfAnalysis(pdf_path, pages=pages)
+            metrics.inc("pdf_documents_total", status="ok")
+            return PdfAnalysis(pdf_path, companies, dates, pages)
+
+        # Extract text from PDF
+        page_texts = _extract_pages(pdf_path, cache, policy, ocr)
+        pages = [_page_info(number, page_text) for number, page_text in enumerate(page_texts, 1)]
+        if not any(page["has_text"] for page in pages):
+            logging.warning(f"No text extracted from PDF: {pdf_path}")
+            metrics.inc("pdf_documents_total", status="no_text")
+            return PdfAnalysis(pdf_path, pages=pages)
+        text = "".join(page_text + "\n" for page_text in page_texts)
+
+        # Clean text once for both searches
+        with metrics.time("text_cleaning_seconds"):
+            cleaned_text = clean_text(text, clean_patterns)
+
+        with metrics.time("company_matching_seconds"):
+            companies = find_companies_in_text(cleaned_text, company_list)
+        with metrics.time("date_matching_seconds"):
+            dates = find_dates_in_text(cleaned_text, format_out_list, pattern_input_list)
+        metrics.inc("pdf_documents_total", status="ok")
+        return PdfAnalysis(pdf_path, companies, dates, pages)
+    except Exception as e:
+        logging.error(f"Error analyzing PDF {pdf_path}: {e}")
+        metrics.inc("pdf_documents_total", status="error")
+        return PdfAnalysis(pdf_path, error=str(e))
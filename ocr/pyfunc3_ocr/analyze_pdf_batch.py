@@ -0,0 +1,185 @@
+"""
+Functions for analyzing many PDF documents in parallel.
+"""
+
+import os
+import signal
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from .analyze_pdf import analyze_pdf, PdfAnalysis
+from .metrics import get_metrics
+
+
+class _FileTimeout(BaseException):
+    """
+    Raised inside a worker when a single file exceeds its time budget.
+
+    Derives from BaseException so the broad exception handlers of the
+    extraction code cannot swallow it.
+    """
+
+
+# Per-worker state set once by the pool initializer
+_worker_company_list = None
+_worker_options = None
+
+
+def iter_pdf_paths(paths, extensions=('.pdf',)):
+    """
+    Expand directories into the files they contain.
+
+    Args:
+        paths (str|list): A directory, a file, or a list of directories and files
+        extensions (tuple): File extensions to include when walking directories
+
+    Returns:
+        generator: File paths, directories walked recursively in sorted order
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file in sorted(files):
+                    if any(file.lower().endswith(ext.lower()) for ext in extensions):
+                        yield os.path.join(root, file)
+        else:
+            yield path
+
+
+def _raise_timeout(signum, frame):
+    raise _FileTimeout()
+
+
+def _init_worker(company_list, options):
+    """
+    Store the shared arguments in the worker process.
+
+    Args:
+        company_list (list|CompanyMatcher): Company names or compiled matcher to search for
+        options (dict): Keyword arguments passed to analyze_pdf
+    """
+    global _worker_company_list, _worker_options
+    _worker_company_list = company_list
+    _worker_options = options
+
+
+def _analyze_chunk(pdf_paths, timeout):
+    """
+    Analyze a chunk of files inside a worker process.
+
+    Args:
+        pdf_paths (list): Paths of the files to analyze
+        timeout (float): Maximum seconds per file, or None for no limit
+
+    Returns:
+        tuple: (PdfAnalysis for each file with failures recorded in their error
+               field, snapshot of the metrics recorded for the chunk)
+    """
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+    results = []
+    for pdf_path in pdf_paths:
+        result = None
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            try:
+                result = analyze_pdf(pdf_path, _worker_company_list, **_worker_options)
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        except _FileTimeout:
+            # The alarm may go off after the analysis returned but before it was disarmed
+            if result is None:
+                result = PdfAnalysis(pdf_path, error=f"Timed out after {timeout}s")
+        except Exception as e:
+            result = PdfAnalysis(pdf_path, error=str(e))
+        results.append(result)
+
+    # Hand the worker's metrics to the parent process, which merges them
+    metrics = get_metrics()
+    snapshot = metrics.snapshot()
+    metrics.reset()
+    return results, snapshot
+
+
+def analyze_pdf_batch(paths, company_list, workers=None, chunksize=1, timeout=None,
+                      extensions=('.pdf',), **kwargs):
+    """
+    Analyze many PDF documents across a pool of worker processes.
+
+    Results are yielded as soon as their chunk completes, so their order
+    differs from the input order. Failures are reported per file through
+    the error field of the result instead of being swallowed. The metrics
+    recorded in the workers are merged into get_metrics() of this process.
+
+    Args:
+        paths (str|list): A directory, a file, or a list of directories and files
+        company_list (list|CompanyMatcher): List of company names to search for,
+                                            or a matcher compiled with CompanyList.compile_matcher
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunksize (int): Number of files sent to a worker at once
+        timeout (float, optional): Maximum seconds per file (requires SIGALRM, i.e. not on Windows)
+        extensions (tuple): File extensions to include when walking directories
+        **kwargs: Further keyword arguments passed to analyze_pdf
+            (clean_patterns, format_out_list, pattern_input_list, locales, cache, policy, ocr)
+
+    Returns:
+        generator: PdfAnalysis for each file
+    """
+    if timeout and not hasattr(signal, "setitimer"):
+        logging.warning("Per-file timeouts are not supported on this platform, ignoring timeout")
+        timeout = None
+
+    chunksize = max(1, chunksize)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2
+
+    pdf_paths = iter_pdf_paths(paths, extensions)
+
+    def next_chunk():
+        chunk = []
+        for pdf_path in pdf_paths:
+            chunk.append(pdf_path)
+            if len(chunk) >= chunksize:
+                break
+        return chunk
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(company_list, kwargs)) as executor:
+        pending = {}
+        exhausted = False
+        while True:
+            # Keep a bounded number of chunks in flight
+            while not exhausted and len(pending) < max_pending:
+                chunk = next_chunk()
+                if not chunk:
+                    exhausted = True
+                    break
+                try:
+                    pending[executor.submit(_analyze_chunk, chunk, timeout)] = chunk
+                except BrokenProcessPool as e:
+                    for pdf_path in chunk:
+                        yield PdfAnalysis(pdf_path, error=f"Worker process died: {e}")
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                try:
+                    results, snapshot = future.result()
+                    get_metrics().merge(snapshot)
+                except BrokenProcessPool as e:
+                    logging.error(f"Worker process died while analyzing {chunk}: {e}")
+                    results = [PdfAnalysis(pdf_path, error=f"Worker process died: {e}") for pdf_path in chunk]
+                except Exception as e:
+                    logging.error(f"Error analyzing {chunk}: {e}")
+                    results = [PdfAnalysis(pdf_path, error=str(e)) for pdf_path in chunk]
+                for result in results:
+                    yield result
@@ -0,0 +1,28 @@
+"""
+Functions for cleaning text extracted from PDF documents.
+"""
+
+import re
+
+
+def clean_text(text, clean_patterns):
+    """
+    Clean text based on specified patterns.
+    
+    Args:
+        text (str): Text to clean
+        clean_patterns (list): List of cleaning patterns to apply
+        
+    Returns:
+        str: Cleaned text
+    """
+    if not text:
+        return ""
+    
+    for pattern in clean_patterns:
+        if pattern == "remove_extra_spaces":
+            text = re.sub(r'\s+', ' ', text).strip()
+        elif pattern == "remove_special_chars":
+            text = re.sub(r'[^\w\s\.\-\/]', ' ', text)
+    
+    return text
@@ -0,0 +1,129 @@
+"""
+Command line interface for the OCR utilities.
+"""
+
+import sys
+import json
+import logging
+import argparse
+from .CompanyList import CompanyList
+from .ExtractionPolicy import ExtractionPolicy
+from .OcrEngine import OcrEngine
+from .analyze_pdf_batch import analyze_pdf_batch
+from .search_pdfs import search_pdfs
+from .metrics import get_metrics
+
+
+def _batch(args):
+    """
+    Run the batch command: analyze PDFs and print one JSON line per file.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        int: Exit code, 1 if any file failed
+    """
+    company_list = CompanyList(args.companies).get_all()
+    policy = None
+    if args.max_pages or args.stop_when_found or args.top:
+        policy = ExtractionPolicy(args.max_pages, args.stop_when_found, args.top)
+    ocr = OcrEngine(dpi=args.ocr_dpi, language=args.ocr_language) if args.ocr else False
+    failed = 0
+    for result in analyze_pdf_batch(
+        args.paths,
+        company_list,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        timeout=args.timeout,
+        cache=False if args.no_cache else None,
+        policy=policy,
+        ocr=ocr,
+    ):
+        if result.error:
+            failed += 1
+        print(json.dumps(result.to_dict(), ensure_ascii=False), flush=True)
+    if failed:
+        logging.error(f"{failed} file(s) failed")
+    if args.metrics:
+        get_metrics().write(args.metrics)
+    return 1 if failed else 0
+
+
+def _search(args):
+    """
+    Run the search command: print one JSON line per file containing the terms.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        int: Exit code, 1 if no file matched
+    """
+    results = search_pdfs(
+        args.paths,
+        args.terms,
+        workers=args.workers,
+        ignore_case=not args.case_sensitive,
+        require_all=args.all,
+        index=args.index,
+        cache=False if args.no_cache else None,
+    )
+    for pdf_path, found in results.items():
+        print(json.dumps({"pdf_path": pdf_path, "pages": found}, ensure_ascii=False), flush=True)
+    if args.metrics:
+        get_metrics().write(args.metrics)
+    return 0 if results else 1
+
+
+def main(argv=None):
+    """
+    Entry point of the pyfunc3-ocr command.
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(prog="pyfunc3-ocr", description="OCR utilities for the month project")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Extract companies and dates from many PDFs in parallel")
+    batch.add_argument("paths", nargs="+", help="Directories and/or PDF files")
+    batch.add_argument("--companies", help="CSV file with company names (default: company.csv lookup)")
+    batch.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    batch.add_argument("--chunksize", type=int, default=1, help="Files sent to a worker at once")
+    batch.add_argument("--timeout", type=float, default=None, help="Maximum seconds per file")
+    batch.add_argument("--no-cache", action="store_true", help="Do not use the extracted-text cache")
+    batch.add_argument("--max-pages", type=int, default=None, help="Only extract the first N pages of each file")
+    batch.add_argument("--stop-when-found", action="store_true",
+                       help="Stop reading a file after the page on which companies and dates were found")
+    batch.add_argument("--top", type=float, default=None,
+                       help="Only extract this top fraction of each page, e.g. 0.3")
+    batch.add_argument("--ocr", action="store_true", help="OCR pages without a text layer with Tesseract")
+    batch.add_argument("--ocr-dpi", type=int, default=300, help="Resolution at which scanned pages are OCRed")
+    batch.add_argument("--ocr-language", default="eng", help="Tesseract language(s), e.g. deu+eng")
+    batch.add_argument("--metrics", help="Write timing metrics to this file (.prom for Prometheus text, else JSON)")
+    batch.set_defaults(func=_batch)
+
+    search = subparsers.add_parser("search", help="Find the PDFs containing one or more terms")
+    search.add_argument("paths", nargs="+", help="Directories and/or PDF files")
+    search.add_argument("-t", "--term", dest="terms", action="append", required=True,
+                        help="Term to search for (repeat for several terms)")
+    search.add_argument("--all", action="store_true", help="Only list files containing every term")
+    search.add_argument("--case-sensitive", action="store_true", help="Match the case of the terms")
+    search.add_argument("--index", help="Page index database to build and search with")
+    search.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    search.add_argument("--no-cache", action="store_true", help="Do not use the extracted-text cache")
+    search.add_argument("--metrics", help="Write timing metrics to this file (.prom for Prometheus text, else JSON)")
+    search.set_defaults(func=_search)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
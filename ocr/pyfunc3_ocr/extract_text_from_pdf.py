@@ -0,0 +1,275 @@
+"""
+Functions for extracting text from PDF documents.
+"""
+
+import time
+import logging
+from PyPDF2 import PdfReader
+from .TextCache import get_default_text_cache
+from .OcrEngine import get_default_ocr_engine
+from .metrics import get_metrics
+
+
+def _resolve_cache(cache):
+    """
+    Resolve the cache argument accepted by the extraction functions.
+
+    Args:
+        cache (TextCache|bool|None): A cache instance, None for the default cache,
+                                     or False to disable caching
+
+    Returns:
+        TextCache: Cache to use, or None if caching is disabled
+    """
+    if cache is None:
+        return get_default_text_cache()
+    if cache is False:
+        return None
+    return cache
+
+
+def _resolve_ocr(ocr):
+    """
+    Resolve the ocr argument accepted by the extraction functions.
+
+    Args:
+        ocr (OcrEngine|bool|None): An engine, True for the default engine, False to
+                                   disable OCR, or None to follow PYFUNC3_OCR_TESSERACT
+
+    Returns:
+        OcrEngine: Engine to use, or None if OCR is disabled
+    """
+    if ocr is None or ocr is True:
+        return get_default_ocr_engine(ocr)
+    if ocr is False:
+        return None
+    return ocr
+
+
+class _LazyPages:
+    """
+    Pages of a PDF file, parsed on first access.
+
+    Text extraction and OCR share one instance, so a document is parsed at
+    most once, and not at all when its text comes from the cache.
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self._pages = None
+
+    def _load(self):
+        if self._pages is None:
+            self._pages = PdfReader(self.pdf_path).pages
+        return self._pages
+
+    def __len__(self):
+        return len(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+
+def _page_text(page, top_fraction=None):
+    """
+    Extract the text of a page, or only of its top part.
+
+    Args:
+        page (PyPDF2.PageObject): Page to extract
+        top_fraction (float, optional): Only keep text in this top part of the page
+
+    Returns:
+        str: Text of the page or region
+    """
+    if not top_fraction:
+        return page.extract_text() or ""
+
+    box = page.mediabox
+    limit = float(box.top) - float(box.height) * top_fraction
+    parts = []
+
+    def keep_top(text, cm, tm, font_dict, font_size):
+        # Baseline of the text in page space. PyPDF2 may report a line with the
+        # position of the next one and ignores page rotation, so the cut is approximate.
+        if tm[4] * cm[1] + tm[5] * cm[3] + cm[5] >= limit:
+            parts.append(text)
+
+    page.extract_text(visitor_text=keep_top)
+    return "".join(parts)
+
+
+def _iter_text_layer(pdf_path, cache, policy, pages=None):
+    """
+    Extract the text layer of the pages of a PDF file one at a time, raising on failure.
+
+    Pages are only extracted when the consumer asks for them, so stopping
+    early skips the rest of the document. Whole documents are served from
+    and stored in the text cache; partial extractions are not stored.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache): Text cache to use, or None
+        policy (ExtractionPolicy, optional): Limits on the pages and regions to extract
+        pages (_LazyPages, optional): Pages of the file, shared with the OCR engine
+
+    Returns:
+        generator: Text of each extracted page
+    """
+    metrics = get_metrics()
+    max_pages = policy.max_pages if policy is not None else None
+    top_fraction = policy.top_fraction if policy is not None else None
+    if cache is not None and not top_fraction:
+        pages = cache.get(pdf_path)
+        if pages is not None:
+            metrics.inc("text_cache_total", result="hit")
+            yield from pages[:max_pages]
+            return
+        metrics.inc("text_cache_total", result="miss")
+
+    if pages is None:
+        pages = _LazyPages(pdf_path)
+    start = time.perf_counter()
+    count = len(pages)
+    texts = []
+    elapsed = time.perf_counter() - start
+    try:
+        for number in range(count if max_pages is None else min(max_pages, count)):
+            start = time.perf_counter()
+            text = _page_text(pages[number], top_fraction)
+            elapsed += time.perf_counter() - start
+            texts.append(text)
+            yield text
+    finally:
+        metrics.observe("pdf_text_extraction_seconds", elapsed)
+        metrics.inc("pdf_pages_total", len(texts))
+
+    if cache is not None and not top_fraction and len(texts) == count:
+        cache.put(pdf_path, texts)
+
+
+def _iter_pages(pdf_path, cache=None, policy=None, ocr=None):
+    """
+    Extract the pages of a PDF file one at a time, raising on failure.
+
+    Pages without a text layer are OCRed. The text cache stores the text
+    layer only; OCR results are cached per page by the OCR engine. Both
+    steps share the parsed pages, so the file is read once.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Limits on the pages and regions to extract
+        ocr (OcrEngine|bool|None): OCR engine to use (True for the default, False to disable,
+                                   None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        generator: Text of each extracted page
+    """
+    cache = _resolve_cache(cache)
+    engine = _resolve_ocr(ocr)
+    if engine is None:
+        return _iter_text_layer(pdf_path, cache, policy)
+    pages = _LazyPages(pdf_path)
+    return engine.fill_pages(pdf_path, _iter_text_layer(pdf_path, cache, policy, pages),
+                             policy.top_fraction if policy is not None else None, cache, pages)
+
+
+def _extract_pages(pdf_path, cache, policy=None, ocr=None):
+    """
+    Extract the text of every page of a PDF file, raising on failure.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Limits on the pages and regions to extract
+        ocr (OcrEngine|bool|None): OCR engine to use (True for the default, False to disable,
+                                   None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        list: Text of each page
+    """
+    return list(_iter_pages(pdf_path, cache, policy, ocr))
+
+
+def iter_pdf_pages(pdf_path, cache=None, policy=None, ocr=None):
+    """
+    Iterate over the pages of a PDF file, extracting each one when it is reached.
+
+    Consumers that stop iterating early, e.g. once a search term is found,
+    skip extracting the rest of the document. Errors are logged and end the
+    iteration.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Only extract the first max_pages pages
+                                             or the top_fraction of each page
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        generator: (page_number, text) tuples, page numbers starting at 1
+    """
+    try:
+        yield from enumerate(_iter_pages(pdf_path, cache, policy, ocr), 1)
+    except Exception as e:
+        logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
+
+
+def join_pages(pages):
+    """
+    Assemble the text of a document from its pages, each followed by a line break.
+
+    The parts are joined once, so the time is linear in the length of the text.
+
+    Args:
+        pages (iterable): Page texts, or (page_number, text) tuples as yielded by iter_pdf_pages
+
+    Returns:
+        str: Text of the document
+    """
+    parts = []
+    for page in pages:
+        parts.append(page[1] if isinstance(page, tuple) else page)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def extract_pages_from_pdf(pdf_path, cache=None, policy=None, ocr=None):
+    """
+    Extract the text of every page of a PDF file.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Only extract the first max_pages pages
+                                             or the top_fraction of each page
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        list: Text of each page, or an empty list if extraction fails
+    """
+    try:
+        return _extract_pages(pdf_path, cache, policy, ocr)
+    except Exception as e:
+        logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
+        return []
+
+
+def extract_text_from_pdf(pdf_path, cache=None, policy=None, ocr=None):
+    """
+    Extract text from a PDF file.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Only extract the first max_pages pages
+                                             or the top_fraction of each page
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
+
+    Returns:
+        str: Extracted text
+    """
+    return join_pages(extract_pages_from_pdf(pdf_path, cache, policy, ocr))
@@ -1,25 +1,23 @@
 import os
-from PyPDF2 import PdfReader
 from typing import List
+from .extract_text_from_pdf import iter_pdf_pages
 
-def find_string_in_file_path(directory: str, search_text: str, extensions: List[str] = ['.pdf']) -> List[str]:
+def find_string_in_file_path(directory: str, search_text: str, extensions: List[str] = ['.pdf'], cache=None) -> List[str]:
     """
     Search for a string in all PDF files (or files with given extensions) in a directory tree.
     Returns a list of file paths where the string was found.
+
+    Pages are extracted one at a time and a file is no longer read once the
+    string is found in it. Page texts are served from the text cache when
+    available (pass cache=False to disable).
     """
     matches = []
     for root, _, files in os.walk(directory):
         for file in files:
             if any(file.lower().endswith(ext.lower()) for ext in extensions):
                 file_path = os.path.join(root, file)
-                try:
-                    reader = PdfReader(file_path)
-                    for page in reader.pages:
-                        text = page.extract_text()
-                        if text and search_text in text:
-                            matches.append(file_path)
-                            break
-                except Exception as e:
-                    # Optionally log or print errors for unreadable files
-                    pass
+                for _, text in iter_pdf_pages(file_path, cache):
+                    if text and search_text in text:
+                        matches.append(file_path)
+                        break
     return matches
@@ -3,40 +3,79 @@ Functions for extracting company names from PDF documents.
 """
 
 import os
-import re
 import logging
-from PyPDF2 import PdfReader
+from functools import lru_cache
+from .clean_text import clean_text
+from .CompanyMatcher import CompanyMatcher
+from .extract_text_from_pdf import extract_text_from_pdf, iter_pdf_pages
+from .metrics import get_metrics
 
 
-def extract_text_from_pdf(pdf_path):
+# Below this many names a plain substring scan beats building and running the automaton
+MATCHER_MIN_COMPANIES = 200
+
+
+@lru_cache(maxsize=4)
+def _cached_matcher(companies):
     """
-    Extract text from a PDF file.
+    Build a matcher for a company tuple, reused across documents.
     
     Args:
-        pdf_path (str): Path to the PDF file
+        companies (tuple): Company names
         
     Returns:
-        str: Extracted text
+        CompanyMatcher: Matcher over the names
     """
-    try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
-        return ""
+    return CompanyMatcher(companies)
 
 
-def get_company_from_pdf(pdf_path, clean_patterns, company_list):
+def find_companies_in_text(cleaned_text, company_list):
+    """
+    Find company names in already cleaned text.
+    
+    Args:
+        cleaned_text (str): Cleaned text to search
+        company_list (list|CompanyMatcher): List of company names to search for,
+                                            or a matcher compiled with CompanyList.compile_matcher
+        
+    Returns:
+        list: List of found company names
+    """
+    if isinstance(company_list, CompanyMatcher):
+        return company_list.find(cleaned_text)
+    
+    if len(company_list) >= MATCHER_MIN_COMPANIES:
+        return _cached_matcher(tuple(company_list)).find(cleaned_text)
+    
+    # Convert text to lowercase for case-insensitive matching
+    cleaned_text_lower = cleaned_text.lower()
+    
+    # Find companies in text
+    found_companies = []
+    for company in company_list:
+        company_lower = company.lower()
+        if company_lower in cleaned_text_lower:
+            found_companies.append(company)
+    
+    return found_companies
+
+
+def get_company_from_pdf(pdf_path, clean_patterns, company_list, cache=None, policy=None, ocr=None):
     """
     Extract company names from a PDF document.
     
+    With a policy that stops when found, pages are extracted one at a time
+    and the companies of the first page naming any are returned.
+    
     Args:
         pdf_path (str): Path to the PDF file
         clean_patterns (list): List of text cleaning patterns
-        company_list (list): List of company names to search for
+        company_list (list|CompanyMatcher): List of company names to search for,
+                                            or a matcher compiled with CompanyList.compile_matcher
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Limits on the pages and page regions to extract
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
         
     Returns:
         list: List of found company names
@@ -46,31 +85,24 @@ def get_company_from_pdf(pdf_path, clean_patterns, company_list):
             logging.error(f"PDF file not found: {pdf_path}")
             return []
         
+        if policy is not None and policy.stop_when_found:
+            for _, page_text in iter_pdf_pages(pdf_path, cache, policy, ocr):
+                companies = find_companies_in_text(clean_text(page_text, clean_patterns), company_list)
+                if companies:
+                    return companies
+            return []
+        
         # Extract text from PDF
-        text = extract_text_from_pdf(pdf_path)
+        text = extract_text_from_pdf(pdf_path, cache, policy, ocr)
         if not text:
             logging.warning(f"No text extracted from PDF: {pdf_path}")
             return []
         
         # Clean text
-        cleaned_text = text
-        for pattern in clean_patterns:
-            if pattern == "remove_extra_spaces":
-                cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
-            elif pattern == "remove_special_chars":
-                cleaned_text = re.sub(r'[^\w\s\.\-\/]', ' ', cleaned_text)
-        
-        # Convert text to lowercase for case-insensitive matching
-        cleaned_text_lower = cleaned_text.lower()
-        
-        # Find companies in text
-        found_companies = []
-        for company in company_list:
-            company_lower = company.lower()
-            if company_lower in cleaned_text_lower:
-                found_companies.append(company)
+        cleaned_text = clean_text(text, clean_patterns)
         
-        return found_companies
+        with get_metrics().time("company_matching_seconds"):
+            return find_companies_in_text(cleaned_text, company_list)
     except Exception as e:
         logging.error(f"Error extracting company from PDF {pdf_path}: {e}")
         return []
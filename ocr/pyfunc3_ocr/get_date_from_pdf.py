@@ -2,69 +2,95 @@
 Functions for extracting dates from PDF documents.
 """
 
-import re
 import os
 import logging
-import datetime
-import dateutil.parser as dparser
-from PyPDF2 import PdfReader
-import datefinder
+from functools import lru_cache
+from .clean_text import clean_text
+from .DateEngine import DateEngine
+from .extract_text_from_pdf import extract_text_from_pdf, iter_pdf_pages
+from .metrics import get_metrics
 
 
-def clean_text(text, clean_patterns):
+@lru_cache(maxsize=8)
+def _cached_engine(pattern_input_list, format_out_list):
     """
-    Clean text based on specified patterns.
+    Build a date engine for a pattern and format tuple, reused across documents.
     
     Args:
-        text (str): Text to clean
-        clean_patterns (list): List of cleaning patterns to apply
+        pattern_input_list (tuple): Regex patterns for date extraction
+        format_out_list (tuple): Output date formats
         
     Returns:
-        str: Cleaned text
+        DateEngine: Engine over the patterns
     """
-    if not text:
-        return ""
+    return DateEngine(pattern_input_list, format_out_list)
+
+
+def find_dates_in_text(cleaned_text, format_out_list, pattern_input_list, fallback=True):
+    """
+    Find dates in already cleaned text.
     
-    for pattern in clean_patterns:
-        if pattern == "remove_extra_spaces":
-            text = re.sub(r'\s+', ' ', text).strip()
-        elif pattern == "remove_special_chars":
-            text = re.sub(r'[^\w\s\.\-\/]', ' ', text)
+    All patterns are matched in one pass (see DateEngine), so duplicate
+    patterns no longer report the same date twice. Dates are listed in text order.
     
-    return text
+    Args:
+        cleaned_text (str): Cleaned text to search
+        format_out_list (list): List of output date formats
+        pattern_input_list (list|DateEngine): List of regex patterns for date extraction,
+                                              or a compiled DateEngine
+        fallback (bool): Use datefinder if no pattern matches
+        
+    Returns:
+        list: List of extracted dates [original_text, date_object, formatted_date]
+    """
+    if isinstance(pattern_input_list, DateEngine):
+        return pattern_input_list.find(cleaned_text, fallback)
+    return _cached_engine(tuple(pattern_input_list), tuple(format_out_list)).find(cleaned_text, fallback)
 
 
-def extract_text_from_pdf(pdf_path):
+def _find_dates_progressively(pages, format_out_list, clean_patterns, pattern_input_list):
     """
-    Extract text from a PDF file.
+    Find the dates of the first page that has any, reading pages only until then.
     
     Args:
-        pdf_path (str): Path to the PDF file
+        pages (generator): (page_number, text) tuples, extracted on demand (see iter_pdf_pages)
+        format_out_list (list): List of output date formats
+        clean_patterns (list): List of text cleaning patterns
+        pattern_input_list (list|DateEngine): Regex patterns or a compiled DateEngine
         
     Returns:
-        str: Extracted text
+        list: List of extracted dates [original_text, date_object, formatted_date]
     """
-    try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
-        return ""
+    cleaned_pages = []
+    for _, page_text in pages:
+        cleaned_text = clean_text(page_text, clean_patterns)
+        dates = find_dates_in_text(cleaned_text, format_out_list, pattern_input_list, fallback=False)
+        if dates:
+            return dates
+        cleaned_pages.append(cleaned_text)
+    # No pattern matched on the pages read, try datefinder on all of them
+    return find_dates_in_text(" ".join(cleaned_pages), format_out_list, pattern_input_list)
 
 
-def get_date_from_pdf(pdf_path, format_out_list, clean_patterns, pattern_input_list, locales=None):
+def get_date_from_pdf(pdf_path, format_out_list, clean_patterns, pattern_input_list, locales=None, cache=None,
+                      policy=None, ocr=None):
     """
     Extract dates from a PDF document.
     
+    With a policy that stops when found, pages are extracted one at a time
+    and the dates of the first page containing any are returned.
+    
     Args:
         pdf_path (str): Path to the PDF file
         format_out_list (list): List of output date formats
         clean_patterns (list): List of text cleaning patterns
-        pattern_input_list (list): List of regex patterns for date extraction
+        pattern_input_list (list|DateEngine): List of regex patterns for date extraction,
+                                              or a compiled DateEngine
         locales (list): List of locales for date parsing
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+        policy (ExtractionPolicy, optional): Limits on the pages and page regions to extract
+        ocr (OcrEngine|bool|None): OCR engine for pages without a text layer (True for the
+                                   default, False to disable, None to follow PYFUNC3_OCR_TESSERACT)
         
     Returns:
         list: List of extracted dates [original_text, date_object, formatted_date]
@@ -74,8 +100,12 @@ def get_date_from_pdf(pdf_path, format_out_list, clean_patterns, pattern_input_l
             logging.error(f"PDF file not found: {pdf_path}")
             return []
         
+        if policy is not None and policy.stop_when_found:
+            return _find_dates_progressively(iter_pdf_pages(pdf_path, cache, policy, ocr), format_out_list,
+                                             clean_patterns, pattern_input_list)
+        
         # Extract text from PDF
-        text = extract_text_from_pdf(pdf_path)
+        text = extract_text_from_pdf(pdf_path, cache, policy, ocr)
         if not text:
             logging.warning(f"No text extracted from PDF: {pdf_path}")
             return []
@@ -83,56 +113,8 @@ def get_date_from_pdf(pdf_path, format_out_list, clean_patterns, pattern_input_l
         # Clean text
         cleaned_text = clean_text(text, clean_patterns)
         
-        # Try to find dates using regex patterns
-        dates = []
-        for pattern in pattern_input_list:
-            matches = re.findall(pattern, cleaned_text)
-            for match in matches:
-                try:
-                    # Try to parse the date
-                    date_obj = dparser.parse(match, fuzzy=True)
-                    
-                    # Format the date
-                    formatted_date = None
-                    for date_format in format_out_list:
-                        try:
-                            formatted_date = date_obj.strftime(date_format)
-                            break
-                        except:
-                            continue
-                    
-                    if formatted_date:
-                        # Check if we have YYYY.MM format
-                        if date_format == "%Y.%m":
-                            year_month = formatted_date
-                            dates.append([match, date_obj, year_month])
-                        else:
-                            dates.append([match, date_obj, formatted_date])
-                except:
-                    continue
-        
-        # If no dates found with regex, try datefinder
-        if not dates:
-            try:
-                matches = list(datefinder.find_dates(cleaned_text, base_date=datetime.datetime.today()))
-                for date_obj in matches:
-                    # Format the date
-                    formatted_date = None
-                    for date_format in format_out_list:
-                        try:
-                            formatted_date = date_obj.strftime(date_format)
-                            break
-                        except:
-                            continue
-                    
-                    if formatted_date:
-                        # Extract the original text that matched (approximate)
-                        date_str = date_obj.strftime("%Y-%m-%d")
-                        dates.append([date_str, date_obj, formatted_date])
-            except Exception as e:
-                logging.error(f"Error using datefinder: {e}")
-        
-        return dates
+        with get_metrics().time("date_matching_seconds"):
+            return find_dates_in_text(cleaned_text, format_out_list, pattern_input_list)
     except Exception as e:
         logging.error(f"Error extracting date from PDF {pdf_path}: {e}")
         return []
@@ -0,0 +1,49 @@
+"""
+Functions for matching search terms in extracted text.
+"""
+
+import re
+
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Split text into lower-case words, the keys of the page index.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        list: Words in text order
+    """
+    return _WORD.findall(text.lower())
+
+
+def compile_terms(terms, ignore_case=True):
+    """
+    Compile search terms into patterns matching them as whole words.
+
+    Whitespace in a term matches any whitespace, so a phrase is found even if
+    the extracted text breaks it across lines.
+
+    Args:
+        terms (list): Search terms, e.g. ["ACME Corp", "Invoice 2023/05"]
+        ignore_case (bool): Match regardless of case
+
+    Returns:
+        dict: Compiled pattern for each term
+    """
+    patterns = {}
+    for term in terms:
+        body = r"\s+".join(re.escape(word) for word in term.split())
+        if not body:
+            raise ValueError("Search terms must not be empty")
+        # Word boundaries only where the term starts or ends with a word character
+        if _WORD.match(term.strip()[0]):
+            body = r"(?<!\w)" + body
+        if _WORD.match(term.strip()[-1]):
+            body = body + r"(?!\w)"
+        patterns[term] = re.compile(body, re.IGNORECASE if ignore_case else 0)
+    return patterns
@@ -0,0 +1,8 @@
+"""
+Counters and timing histograms of the package, in the registry shared by the
+pyfunc3 packages (see pyfunc3_config.metrics).
+"""
+
+from pyfunc3_config.metrics import DEFAULT_BUCKETS, Metrics, get_metrics
+
+__all__ = ["DEFAULT_BUCKETS", "Metrics", "get_metrics"]
@@ -0,0 +1,80 @@
+"""
+Functions for parsing the date strings found by the date patterns.
+"""
+
+import re
+import datetime
+from functools import lru_cache
+import dateutil.parser as dparser
+
+
+# English and German month names and abbreviations, lower case
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+    "januar": 1, "februar": 2, "märz": 3, "maerz": 3, "mai": 5, "juni": 6, "juli": 7,
+    "oktober": 10, "dezember": 12,
+    "jän": 1, "mär": 3, "mrz": 3, "okt": 10, "dez": 12,
+}
+
+_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_DOTTED = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+_SLASHED = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_MONTH_NAME = re.compile(r"(\d{1,2})\.?\s+([^\W\d_]+)\.?\s+(\d{4})")
+_YEAR_MONTH = re.compile(r"(\d{4})[./](\d{1,2})")
+
+
+def _date(year, month, day):
+    """Build a date, or None if it does not exist."""
+    try:
+        return datetime.datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_text):
+    """
+    Parse a date string in one of the shapes of get_date_from_pdf_pattern.
+
+    Known shapes are converted directly: YYYY-MM-DD, DD.MM.YYYY, DD/MM/YYYY or
+    MM/DD/YYYY (month first unless the first number cannot be a month, like
+    dateutil), DD Month YYYY with English or German month names, and
+    YYYY.MM or YYYY/MM (the first of the month). Other strings are parsed
+    with dateutil. Results are memoized, since invoices repeat their dates.
+
+    Args:
+        date_text (str): Date string found by a date pattern
+
+    Returns:
+        datetime.datetime: The date, or None if it cannot be parsed
+    """
+    text = date_text.strip()
+    match = _ISO.fullmatch(text)
+    if match:
+        return _date(*match.groups())
+    match = _DOTTED.fullmatch(text)
+    if match:
+        day, month, year = match.groups()
+        return _date(year, month, day)
+    match = _SLASHED.fullmatch(text)
+    if match:
+        first, second, year = match.groups()
+        if int(first) > 12:
+            return _date(year, second, first)
+        return _date(year, first, second)
+    match = _MONTH_NAME.fullmatch(text)
+    if match and match.group(2).lower() in MONTHS:
+        day, name, year = match.groups()
+        return _date(year, MONTHS[name.lower()], day)
+    match = _YEAR_MONTH.fullmatch(text)
+    if match:
+        year, month = match.groups()
+        return _date(year, month, 1)
+
+    try:
+        return dparser.parse(text, fuzzy=True)
+    except (ValueError, OverflowError):
+        return None
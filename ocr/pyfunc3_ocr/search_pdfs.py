@@ -0,0 +1,219 @@
+"""
+Functions for searching many terms in many PDF documents at once.
+"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .extract_text_from_pdf import _iter_pages, _extract_pages
+from .analyze_pdf_batch import iter_pdf_paths
+from .match_terms import compile_terms
+from .PageIndex import PageIndex
+from .metrics import get_metrics
+
+
+def _in_worker(function, chunk, args):
+    """
+    Run a chunk function in a worker process.
+
+    Returns:
+        tuple: (results of the function, snapshot of the metrics recorded for the chunk)
+    """
+    results = function(chunk, *args)
+    metrics = get_metrics()
+    snapshot = metrics.snapshot()
+    metrics.reset()
+    return results, snapshot
+
+
+def _run_chunks(function, items, workers=None, chunksize=8, args=()):
+    """
+    Call function(chunk, *args) for chunks of items, across worker processes if more than one.
+
+    Args:
+        function (callable): Module-level function returning a list of results for a chunk
+        items (list): Items to split into chunks
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunksize (int): Number of items per chunk
+        args (tuple): Further arguments for the function
+
+    Returns:
+        generator: The results of all chunks, in completion order
+    """
+    items = list(items)
+    chunksize = max(1, chunksize)
+    chunks = [items[start:start + chunksize] for start in range(0, len(items), chunksize)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield from function(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_in_worker, function, chunk, args): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                results, snapshot = future.result()
+            except Exception as e:
+                logging.error(f"Error processing {futures[future]}: {e}")
+                continue
+            get_metrics().merge(snapshot)
+            yield from results
+
+
+def _scan_pages(pdf_path, patterns, cache):
+    """
+    Search the pages of one document in order, stopping once every term is found.
+
+    Pages are extracted one at a time (see _iter_pages), so the rest of
+    the document is skipped once every term has been found.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        patterns (dict): Compiled pattern of each term (see compile_terms)
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+
+    Returns:
+        dict: First page number (starting at 1) of each term found
+    """
+    found = {}
+    for number, text in enumerate(_iter_pages(pdf_path, cache), 1):
+        for term, pattern in patterns.items():
+            if term not in found and pattern.search(text):
+                found[term] = number
+        if len(found) == len(patterns):
+            break
+    return found
+
+
+def _search_chunk(pdf_paths, patterns, cache):
+    """
+    Search a chunk of files.
+
+    Returns:
+        list: (path, found terms) for each file, found terms empty if the file cannot be read
+    """
+    results = []
+    for pdf_path in pdf_paths:
+        try:
+            results.append((pdf_path, _scan_pages(pdf_path, patterns, cache)))
+        except Exception as e:
+            logging.error(f"Error searching {pdf_path}: {e}")
+            results.append((pdf_path, {}))
+    return results
+
+
+def _extract_chunk(files, cache):
+    """
+    Extract a chunk of files for the page index.
+
+    Returns:
+        list: (path, size, mtime_ns, page texts) for each file, page texts None if extraction failed
+    """
+    results = []
+    for pdf_path, size, mtime_ns in files:
+        try:
+            results.append((pdf_path, size, mtime_ns, _extract_pages(pdf_path, cache)))
+        except Exception as e:
+            logging.error(f"Error extracting text from PDF {pdf_path}: {e}")
+            results.append((pdf_path, size, mtime_ns, None))
+    return results
+
+
+def update_page_index(index, paths, workers=None, chunksize=8, extensions=('.pdf',), cache=None):
+    """
+    Bring a page index up to date with the files under some paths.
+
+    New and changed files (by size and mtime) are extracted across worker
+    processes and indexed; indexed files that no longer exist, or that
+    changed and can no longer be extracted, are removed.
+
+    Args:
+        index (PageIndex|str): Index or path of the index database
+        paths (str|list): A directory, a file, or a list of directories and files
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunksize (int): Number of files sent to a worker at once
+        extensions (tuple): File extensions to include when walking directories
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+
+    Returns:
+        list: Absolute paths of the files found under paths
+    """
+    if isinstance(index, (str, os.PathLike)):
+        index = PageIndex(index)
+    known = index.documents()
+    current = []
+    changed = []
+    for pdf_path in iter_pdf_paths(paths, extensions):
+        pdf_path = os.path.abspath(pdf_path)
+        try:
+            stat = os.stat(pdf_path)
+        except OSError as e:
+            logging.error(f"Error reading {pdf_path}: {e}")
+            continue
+        current.append(pdf_path)
+        if known.get(pdf_path) != (stat.st_size, stat.st_mtime_ns):
+            changed.append((pdf_path, stat.st_size, stat.st_mtime_ns))
+
+    if changed:
+        logging.info(f"Indexing {len(changed)} new or changed files")
+    indexed = set()
+    for pdf_path, size, mtime_ns, pages in _run_chunks(_extract_chunk, changed, workers, chunksize, (cache,)):
+        if pages is not None:
+            index.add(pdf_path, pages, size, mtime_ns)
+            indexed.add(pdf_path)
+
+    # Changed files that could not be extracted again must not keep their old pages
+    index.remove([pdf_path for pdf_path, _, _ in changed if pdf_path in known and pdf_path not in indexed]
+                 + [pdf_path for pdf_path in known if not os.path.exists(pdf_path)])
+    return current
+
+
+def search_pdfs(paths, terms, workers=None, chunksize=8, extensions=('.pdf',), ignore_case=True,
+                require_all=False, index=None, cache=None):
+    """
+    Search several terms in all PDF documents under some paths in one pass.
+
+    Files are searched across a pool of worker processes, and a document is
+    only extracted until every term has been found in it. Terms match as
+    whole words, with any whitespace between their words (see compile_terms).
+
+    With index, the page texts are kept in a PageIndex instead: the first
+    search over an archive builds it, later ones only extract new or changed
+    files and look the terms up in the index.
+
+    Args:
+        paths (str|list): A directory, a file, or a list of directories and files
+        terms (str|list): Term or terms to search for
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        chunksize (int): Number of files sent to a worker at once
+        extensions (tuple): File extensions to include when walking directories
+        ignore_case (bool): Match regardless of case
+        require_all (bool): Only return documents containing every term
+        index (PageIndex|str, optional): Page index, or path of its database, to search with
+        cache (TextCache|bool|None): Text cache to use (None for the default, False to disable)
+
+    Returns:
+        dict: For the absolute path of each matching document, the first page
+              number (starting at 1) of each term found in it
+    """
+    if isinstance(terms, str):
+        terms = [terms]
+    patterns = compile_terms(terms, ignore_case)
+
+    if index is not None:
+        if isinstance(index, (str, os.PathLike)):
+            index = PageIndex(index)
+        pdf_paths = update_page_index(index, paths, workers, chunksize, extensions, cache)
+        results = index.search(terms, ignore_case, pdf_paths)
+    else:
+        results = {
+            pdf_path: found for pdf_path, found
+            in _run_chunks(_search_chunk, map(os.path.abspath, iter_pdf_paths(paths, extensions)),
+                           workers, chunksize, (patterns, cache))
+            if found
+        }
+
+    if require_all:
+        results = {pdf_path: found for pdf_path, found in results.items() if len(found) == len(patterns)}
+    return dict(sorted(results.items()))
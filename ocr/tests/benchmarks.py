@@ -0,0 +1,264 @@
+"""
+Micro-benchmarks for the OCR text matching code.
+
+Run from the ocr directory with: python -m tests.benchmarks
+"""
+
+import re
+import random
+import string
+import timeit
+import dateutil.parser as dparser
+from pyfunc3_ocr.CompanyMatcher import CompanyMatcher
+from pyfunc3_ocr.DateEngine import DateEngine
+from pyfunc3_ocr.get_date_from_pdf_pattern import get_date_from_pdf_pattern
+from pyfunc3_ocr.parse_date import parse_date
+
+
+def _random_word(rng, min_length=3, max_length=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(min_length, max_length)))
+
+
+def make_company_names(count, seed=0):
+    """
+    Generate synthetic company names.
+
+    Args:
+        count (int): Number of names to generate
+        seed (int): Random seed
+
+    Returns:
+        list: Company names such as "Kelvo Trading GmbH"
+    """
+    rng = random.Random(seed)
+    suffixes = ["GmbH", "Ltd", "Inc", "S.A.", "sp. z o.o.", "AG", ""]
+    names = []
+    for _ in range(count):
+        words = [_random_word(rng).capitalize() for _ in range(rng.randint(1, 3))]
+        names.append(" ".join(words + [rng.choice(suffixes)]).strip())
+    return names
+
+
+def make_invoice_text(company_names, length=5000, mentions=3, seed=0):
+    """
+    Generate synthetic invoice text mentioning a few of the companies.
+
+    Args:
+        company_names (list): Company names to pick mentions from
+        length (int): Approximate text length in characters
+        mentions (int): Number of company names inserted into the text
+        seed (int): Random seed
+
+    Returns:
+        str: Invoice-like text
+    """
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice([_random_word(rng), str(rng.randint(1, 9999)), "EUR", "Invoice", "VAT", "Total"])
+        words.append(word)
+        size += len(word) + 1
+    for name in rng.sample(company_names, min(mentions, len(company_names))):
+        words.insert(rng.randrange(len(words)), name)
+    return " ".join(words)
+
+
+def _substring_scan(text, company_list):
+    # The per-company loop of find_companies_in_text before the matcher
+    text_lower = text.lower()
+    return [company for company in company_list if company.lower() in text_lower]
+
+
+def benchmark_company_matcher(sizes=(10, 1000, 10000), text_length=5000, repeat=5, number=3):
+    """
+    Compare the per-company substring scan with CompanyMatcher.
+
+    Args:
+        sizes (tuple): Company list sizes to test
+        text_length (int): Length of the synthetic invoice text
+        repeat (int): Number of timing repetitions (best is reported)
+        number (int): Searches per repetition
+
+    Returns:
+        list: Dicts with size, build_ms, scan_ms and matcher_ms per search
+    """
+    rows = []
+    for size in sizes:
+        names = make_company_names(size)
+        text = make_invoice_text(names, text_length)
+
+        build = min(timeit.repeat(lambda: CompanyMatcher(names), repeat=repeat, number=1))
+        matcher = CompanyMatcher(names)
+        assert matcher.find(text) == _substring_scan(text, names)
+
+        scan = min(timeit.repeat(lambda: _substring_scan(text, names), repeat=repeat, number=number)) / number
+        match = min(timeit.repeat(lambda: matcher.find(text), repeat=repeat, number=number)) / number
+        rows.append({
+            "size": size,
+            "build_ms": build * 1000,
+            "scan_ms": scan * 1000,
+            "matcher_ms": match * 1000,
+        })
+    return rows
+
+
+def make_invoice_corpus(documents=100, length=5000, dates=8, seed=0):
+    """
+    Generate synthetic invoice texts with dates in the supported shapes.
+
+    Args:
+        documents (int): Number of texts
+        length (int): Approximate length of each text in characters
+        dates (int): Number of dates inserted into each text
+        seed (int): Random seed
+
+    Returns:
+        list: Invoice-like texts
+    """
+    rng = random.Random(seed)
+    names = make_company_names(50, seed)
+    shapes = ["{y}-{m:02d}-{d:02d}", "{d:02d}.{m:02d}.{y}", "{d:02d}/{m:02d}/{y}", "{d} {month} {y}",
+              "{d} {mon} {y}", "{d} {monat} {y}", "{y}.{m:02d}", "{y}/{m:02d}"]
+    months = ["January", "February", "March", "April", "May", "June", "July", "August",
+              "September", "October", "November", "December"]
+    monate = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August",
+              "September", "Oktober", "November", "Dezember"]
+    corpus = []
+    for number in range(documents):
+        words = make_invoice_text(names, length, seed=seed + number).split(" ")
+        for _ in range(dates):
+            m = rng.randint(1, 12)
+            date = rng.choice(shapes).format(y=rng.randint(2015, 2025), m=m, d=rng.randint(1, 28),
+                                             month=months[m - 1], mon=months[m - 1][:3], monat=monate[m - 1])
+            words.insert(rng.randrange(len(words)), date)
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def _pattern_loop(text, pattern_input_list):
+    # The per-pattern scan of find_dates_in_text before the DateEngine
+    return [match for pattern in pattern_input_list for match in re.findall(pattern, text)]
+
+
+def benchmark_date_engine(documents=100, text_length=5000, repeat=5):
+    """
+    Compare the per-pattern re.findall loop with DateEngine over an invoice corpus.
+
+    Args:
+        documents (int): Number of invoice texts
+        text_length (int): Approximate length of each text
+        repeat (int): Number of timing repetitions (best is reported)
+
+    Returns:
+        dict: Scan times (matching only) and extraction times (matching and
+              parsing every match) in ms per document, and match counts
+    """
+    patterns = get_date_from_pdf_pattern.pattern_input_list
+    corpus = make_invoice_corpus(documents, text_length)
+    engine = DateEngine(patterns)
+
+    def loop_scan():
+        return [_pattern_loop(text, patterns) for text in corpus]
+
+    def engine_scan():
+        return [list(engine.iter_matches(text)) for text in corpus]
+
+    def loop_extract():
+        for text in corpus:
+            for match in _pattern_loop(text, patterns):
+                try:
+                    dparser.parse(match, fuzzy=True)
+                except (ValueError, OverflowError):
+                    pass
+
+    def engine_extract():
+        for text in corpus:
+            engine.find_matches(text)
+
+    def best(function):
+        return min(timeit.repeat(function, repeat=repeat, number=1)) / documents * 1000
+
+    return {
+        "loop_scan_ms": best(loop_scan),
+        "engine_scan_ms": best(engine_scan),
+        "loop_extract_ms": best(loop_extract),
+        "engine_extract_ms": best(engine_extract),
+        "loop_matches": sum(map(len, loop_scan())),
+        "engine_matches": sum(map(len, engine_scan())),
+    }
+
+
+def _dateutil_parse(date_text):
+    # The per-match parsing of find_dates_in_text before parse_date
+    try:
+        return dparser.parse(date_text, fuzzy=True)
+    except (ValueError, OverflowError):
+        return None
+
+
+def benchmark_date_parsing(documents=100, text_length=5000, repeat=5):
+    """
+    Compare fuzzy dateutil parsing with parse_date on the matches of an invoice corpus.
+
+    Args:
+        documents (int): Number of invoice texts
+        text_length (int): Approximate length of each text
+        repeat (int): Number of timing repetitions (best is reported)
+
+    Returns:
+        dict: Microseconds per match for dateutil, parse_date without and with
+              its memo, and the number of matches
+    """
+    engine = DateEngine(get_date_from_pdf_pattern.pattern_input_list)
+    matches = [match[2] for text in make_invoice_corpus(documents, text_length)
+               for match in engine.iter_matches(text)]
+
+    def run(function):
+        return lambda: [function(match) for match in matches]
+
+    def best(function):
+        return min(timeit.repeat(function, repeat=repeat, number=1)) / len(matches) * 1e6
+
+    def uncached():
+        parse_date.cache_clear()
+        return [parse_date(match) for match in matches]
+
+    run(parse_date)()
+    return {
+        "dateutil_us": best(run(_dateutil_parse)),
+        "structured_us": best(uncached),
+        "memoized_us": best(run(parse_date)),
+        "matches": len(matches),
+    }
+
+
+def main():
+    """Print the benchmark results as a table."""
+    print("Company matching, 5000-character invoice text (times per document)")
+    print(f"{'companies':>10} {'substring scan':>16} {'matcher':>10} {'speedup':>8} {'build once':>11}")
+    for row in benchmark_company_matcher():
+        print(
+            f"{row['size']:>10} {row['scan_ms']:>13.3f} ms {row['matcher_ms']:>7.3f} ms "
+            f"{row['scan_ms'] / row['matcher_ms']:>7.1f}x {row['build_ms']:>8.1f} ms"
+        )
+
+    result = benchmark_date_engine()
+    print()
+    print("Date extraction, 100 invoice texts of 5000 characters (times per document)")
+    print(f"{'':>10} {'pattern loop':>14} {'DateEngine':>12} {'speedup':>8}")
+    for step in ("scan", "extract"):
+        loop, engine = result[f"loop_{step}_ms"], result[f"engine_{step}_ms"]
+        print(f"{step:>10} {loop:>11.3f} ms {engine:>9.3f} ms {loop / engine:>7.1f}x")
+    print(f"{'matches':>10} {result['loop_matches']:>14} {result['engine_matches']:>12}")
+
+    result = benchmark_date_parsing()
+    print()
+    print(f"Date parsing, {result['matches']} matches (times per match)")
+    print(f"{'dateutil fuzzy':>16} {result['dateutil_us']:>8.2f} us")
+    for name, key in (("parse_date", "structured_us"), ("memoized", "memoized_us")):
+        print(f"{name:>16} {result[key]:>8.2f} us {result['dateutil_us'] / result[key]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import time
+import signal
+import importlib
+import pytest
+from pyfunc3_ocr import PdfAnalysis
+
+batch = importlib.import_module("pyfunc3_ocr.analyze_pdf_batch")
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="needs SIGALRM")
+setitimer = getattr(signal, "setitimer", None)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    """Run _analyze_chunk in this process with analyze_pdf replaced."""
+    monkeypatch.setattr(batch, "_worker_company_list", [])
+    monkeypatch.setattr(batch, "_worker_options", {})
+    previous = signal.getsignal(signal.SIGALRM)
+    yield lambda analyze: monkeypatch.setattr(batch, "analyze_pdf", analyze)
+    setitimer(signal.ITIMER_REAL, 0)
+    signal.signal(signal.SIGALRM, previous)
+
+
+def test_slow_file_times_out(worker):
+    def analyze(pdf_path, company_list):
+        if pdf_path == "slow.pdf":
+            time.sleep(5)
+        return PdfAnalysis(pdf_path)
+
+    worker(analyze)
+    results, _ = batch._analyze_chunk(["slow.pdf", "fast.pdf"], 0.1)
+    assert [(result.pdf_path, result.error) for result in results] == [
+        ("slow.pdf", "Timed out after 0.1s"), ("fast.pdf", None)]
+
+
+def test_late_alarm_keeps_the_result(worker, monkeypatch):
+    def alarm_before_disarm(which, seconds):
+        setitimer(which, seconds)
+        if seconds == 0:
+            # The alarm goes off right after the analysis returned
+            batch._raise_timeout(signal.SIGALRM, None)
+
+    worker(lambda pdf_path, company_list: PdfAnalysis(pdf_path, companies=["ACME"]))
+    monkeypatch.setattr(batch.signal, "setitimer", alarm_before_disarm)
+    results, _ = batch._analyze_chunk(["a.pdf", "b.pdf"], 10)
+    assert [(result.pdf_path, result.error, result.companies) for result in results] == [
+        ("a.pdf", None, ["ACME"]), ("b.pdf", None, ["ACME"])]
+
+
+def test_iter_pdf_paths_filters_extensions(tmp_path):
+    for name in ("b.PDF", "a.pdf", "notes.txt", "scan.tif"):
+        (tmp_path / name).write_bytes(b"")
+    assert [p.rsplit("/", 1)[-1] for p in batch.iter_pdf_paths(str(tmp_path))] == ["a.pdf", "b.PDF"]
+    assert [p.rsplit("/", 1)[-1] for p in batch.iter_pdf_paths(str(tmp_path), (".tif", ".txt"))] == [
+        "notes.txt", "scan.tif"]
@@ -0,0 +1,30 @@
+import pytest
+from pyfunc3_ocr import CompanyMatcher
+from benchmarks import make_company_names, make_invoice_text, _substring_scan
+
+
+@pytest.mark.parametrize("count", [10, 1000])
+def test_finds_the_same_names_as_the_substring_scan(count):
+    names = make_company_names(count)
+    matcher = CompanyMatcher(names)
+    for seed in range(5):
+        text = make_invoice_text(names, 5000, seed=seed)
+        assert matcher.find(text) == _substring_scan(text, names)
+
+
+def test_case_insensitive_overlapping_and_duplicate_names():
+    names = ["Amazon", "amazon web services", "Web", "ACME", "Amazon", ""]
+    text = "Invoice from AMAZON Web Services EMEA"
+    assert CompanyMatcher(names).find(text) == _substring_scan(text, names)
+    assert CompanyMatcher(names).find(text) == ["Amazon", "amazon web services", "Web", "Amazon", ""]
+
+
+def test_whole_word():
+    matcher = CompanyMatcher(["ACME", "Met"], whole_word=True)
+    assert matcher.find("ACMEs metal, acme Ltd.") == ["ACME"]
+
+
+def test_longest_match():
+    matcher = CompanyMatcher(["Amazon", "Amazon Web Services"], longest_match=True)
+    assert matcher.find_matches("Amazon Web Services, Amazon") == [
+        (0, 19, "Amazon Web Services"), (21, 27, "Amazon")]
@@ -0,0 +1,52 @@
+from collections import Counter
+from pyfunc3_ocr import DateEngine, get_date_from_pdf_pattern
+from benchmarks import make_invoice_corpus, _pattern_loop
+
+PATTERNS = get_date_from_pdf_pattern.pattern_input_list
+
+SAMPLE = ("Invoice 2023-05-14, due 14.06.2023 (US 07/04/2023), delivered 3 March 2023, "
+          "shipped 8 Jun 2023, Lieferung 2 März 2023, period 2023.05 and 2023/06")
+
+
+def engine_texts(engine, text):
+    return [matched_text for _, _, matched_text, _ in engine.iter_matches(text)]
+
+
+def test_finds_every_date_of_the_pattern_loop_once():
+    texts = engine_texts(DateEngine(PATTERNS), SAMPLE)
+    assert texts == ["2023-05-14", "14.06.2023", "07/04/2023", "3 March 2023", "8 Jun 2023",
+                     "2 März 2023", "2023.05", "2023/06"]
+    # The loop reports the dates of duplicated patterns twice
+    assert set(texts) == set(_pattern_loop(SAMPLE, PATTERNS))
+
+
+def test_matches_the_pattern_loop_on_invoices():
+    engine = DateEngine(PATTERNS)
+    for text in make_invoice_corpus(20):
+        texts = engine_texts(engine, text)
+        loop = _pattern_loop(text, PATTERNS)
+        assert set(texts) == set(loop)
+        assert not Counter(texts) - Counter(loop)
+
+
+def test_matches_do_not_overlap():
+    # The loop also reports "2023/06", which shares its year with the first date
+    text = "Period 12/05/2023/06"
+    assert _pattern_loop(text, PATTERNS) == ["12/05/2023", "12/05/2023", "2023/06"]
+    assert engine_texts(DateEngine(PATTERNS), text) == ["12/05/2023"]
+
+
+def test_first_pattern_wins_at_a_position():
+    engine = DateEngine([r'(\d{4}\.\d{1,2})', r'(\d{4}\.\d{1,2}\.\d{1,2})'])
+    assert [index for _, _, _, index in engine.iter_matches("2023.05.14")] == [0]
+
+
+def test_find_parses_and_formats():
+    dates = DateEngine(PATTERNS).find("Rechnung vom 14.06.2023, fällig 2023-07-01")
+    assert [(original, formatted) for original, _, formatted in dates] == [
+        ("14.06.2023", "2023-06-14"), ("2023-07-01", "2023-07-01")]
+
+
+def test_find_without_matches():
+    assert DateEngine(PATTERNS).find("no dates here", fallback=False) == []
+    assert DateEngine([]).find("2023-05-14", fallback=False) == []
@@ -0,0 +1,42 @@
+import pytest
+from pyfunc3_ocr import ExtractionPolicy, INVOICE_HEADER, analyze_pdf, extract_pages_from_pdf
+from pdf_files import write_pdf
+
+LINES = [f"Line {number} of the statement" for number in range(40)]
+
+
+@pytest.fixture
+def statement(tmp_path):
+    pages = [["ACME Corp Statement", "Date: 14.05.2023"] + LINES] + [LINES + ["2023-06-01"]] * 4
+    return write_pdf(str(tmp_path / "statement.pdf"), pages)
+
+
+def test_whole_document(statement):
+    assert ExtractionPolicy().whole_document
+    assert len(extract_pages_from_pdf(statement, cache=False, policy=ExtractionPolicy())) == 5
+
+
+def test_max_pages(statement):
+    pages = extract_pages_from_pdf(statement, cache=False, policy=ExtractionPolicy(max_pages=2))
+    assert len(pages) == 2
+    assert pages == extract_pages_from_pdf(statement, cache=False)[:2]
+
+
+def test_top_fraction(statement):
+    pages = extract_pages_from_pdf(statement, cache=False, policy=ExtractionPolicy(top_fraction=0.1))
+    assert "ACME Corp Statement" in pages[0]
+    assert "Line 39" not in pages[0]
+
+
+def test_stop_when_found(statement):
+    result = analyze_pdf(statement, ["ACME Corp"], cache=False, policy=INVOICE_HEADER)
+    assert result.companies == ["ACME Corp"]
+    assert [formatted for _, _, formatted in result.dates] == ["2023-05-14"]
+    whole = analyze_pdf(statement, ["ACME Corp"], cache=False)
+    assert "2023-06-01" in [formatted for _, _, formatted in whole.dates]
+
+
+@pytest.mark.parametrize("arguments", [dict(max_pages=0), dict(top_fraction=0), dict(top_fraction=1.5)])
+def test_invalid_limits(arguments):
+    with pytest.raises(ValueError):
+        ExtractionPolicy(**arguments)
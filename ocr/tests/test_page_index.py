@@ -0,0 +1,66 @@
+import pytest
+from pyfunc3_ocr import PageIndex, search_pdfs, update_page_index
+from pdf_files import write_pdf
+
+
+@pytest.fixture
+def archive(tmp_path):
+    folder = tmp_path / "archive"
+    folder.mkdir()
+    write_pdf(str(folder / "invoice.pdf"), [["ACME Corp Invoice", "Total 100 EUR"], ["Payment terms"]])
+    write_pdf(str(folder / "statement.pdf"), [["Bank Statement"], ["Transfer to ACME   Corp"]])
+    return folder
+
+
+def test_search_finds_the_first_page_of_each_term(tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    index.add("a.pdf", ["nothing here", "ACME Corp invoice", "acme corp again"], 1, 1)
+    index.add("b.pdf", ["Payment terms"], 1, 1)
+    results = index.search(["ACME Corp", "payment terms", "missing"])
+    assert {path.rsplit("/", 1)[-1]: found for path, found in results.items()} == {
+        "a.pdf": {"ACME Corp": 2}, "b.pdf": {"payment terms": 1}}
+
+
+def test_search_matches_whole_words(tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    index.add("a.pdf", ["ACMEs Corporation"], 1, 1)
+    assert index.search(["ACME Corp"]) == {}
+
+
+def test_remove(tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    index.add("a.pdf", ["ACME Corp"], 1, 1)
+    index.remove(["a.pdf"])
+    assert index.search(["ACME Corp"]) == {}
+    assert index.documents() == {}
+
+
+def test_indexed_search_matches_the_scan(archive, tmp_path):
+    terms = ["ACME Corp", "Payment terms", "Statement"]
+    scanned = search_pdfs(str(archive), terms, workers=1, cache=False)
+    indexed = search_pdfs(str(archive), terms, workers=1, cache=False, index=str(tmp_path / "index.sqlite"))
+    assert indexed == scanned
+    assert {path.rsplit("/", 1)[-1]: found for path, found in scanned.items()} == {
+        "invoice.pdf": {"ACME Corp": 1, "Payment terms": 2},
+        "statement.pdf": {"ACME Corp": 2, "Statement": 1}}
+
+
+def test_update_page_index_follows_the_files(archive, tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    update_page_index(index, str(archive), workers=1, cache=False)
+    assert len(index.documents()) == 2
+    (archive / "statement.pdf").unlink()
+    write_pdf(str(archive / "invoice.pdf"), [["Other Ltd Invoice"]])
+    update_page_index(index, str(archive), workers=1, cache=False)
+    assert len(index.documents()) == 1
+    assert index.search(["ACME Corp"]) == {}
+    assert list(index.search(["Other Ltd"])) == [str(archive / "invoice.pdf")]
+
+
+def test_update_page_index_drops_changed_files_that_fail(archive, tmp_path):
+    index = PageIndex(str(tmp_path / "index.sqlite"))
+    update_page_index(index, str(archive), workers=1, cache=False)
+    (archive / "invoice.pdf").write_bytes(b"not a PDF any more")
+    update_page_index(index, str(archive), workers=1, cache=False)
+    assert list(index.documents()) == [str(archive / "statement.pdf")]
+    assert list(index.search(["ACME Corp"])) == [str(archive / "statement.pdf")]
@@ -0,0 +1,55 @@
+import re
+import datetime
+import pytest
+import dateutil.parser as dparser
+from pyfunc3_ocr import DateEngine, parse_date, get_date_from_pdf_pattern
+from benchmarks import make_invoice_corpus
+
+ENGLISH_MONTHS = {name.lower() for name in (
+    "January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+    "November", "December", "Jan", "Feb", "Mar", "Apr", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2023-05-14", (2023, 5, 14)),
+    ("14.05.2023", (2023, 5, 14)),
+    # Dotted dates are day first
+    ("03.04.2023", (2023, 4, 3)),
+    # Slashed dates are month first unless the first number cannot be a month
+    ("03/04/2023", (2023, 3, 4)),
+    ("14/05/2023", (2023, 5, 14)),
+    ("3 March 2023", (2023, 3, 3)),
+    ("3 Mar 2023", (2023, 3, 3)),
+    ("3 März 2023", (2023, 3, 3)),
+    ("1 Dezember 2023", (2023, 12, 1)),
+    # Year and month only are the first of the month
+    ("2023.05", (2023, 5, 1)),
+    ("2023/05", (2023, 5, 1)),
+    # Other shapes fall back to dateutil
+    ("May 5th, 2021", (2021, 5, 5)),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text) == datetime.datetime(*expected)
+
+
+@pytest.mark.parametrize("text", ["31.02.2023", "2023-13-01", "not a date"])
+def test_invalid_dates(text):
+    assert parse_date(text) is None
+
+
+def test_agrees_with_dateutil_on_invoices():
+    engine = DateEngine(get_date_from_pdf_pattern.pattern_input_list)
+    compared = 0
+    for text in make_invoice_corpus(20):
+        for _, _, matched_text, _ in engine.iter_matches(text):
+            if re.fullmatch(r"\d{1,2}\.\d{1,2}\.\d{4}", matched_text):
+                expected = dparser.parse(matched_text, dayfirst=True)
+            elif (re.fullmatch(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{4}", matched_text)
+                  or " " in matched_text and matched_text.split()[1].lower() in ENGLISH_MONTHS):
+                expected = dparser.parse(matched_text, fuzzy=True)
+            else:
+                # German month names and year-month dates, which dateutil misreads
+                continue
+            assert parse_date(matched_text) == expected, matched_text
+            compared += 1
+    assert compared > 50
@@ -0,0 +1,80 @@
+import sqlite3
+import shutil
+from pyfunc3_ocr import TextCache
+
+
+def write_file(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def rows(cache, table):
+    conn = sqlite3.connect(cache.db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_put_and_get(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"))
+    pdf = write_file(tmp_path / "a.pdf", b"first")
+    assert cache.get(pdf) is None
+    cache.put(pdf, ["page 1", "page 2"])
+    assert cache.get(pdf) == ["page 1", "page 2"]
+
+
+def test_entries_are_keyed_by_content(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"))
+    pdf = write_file(tmp_path / "a.pdf", b"same content")
+    cache.put(pdf, ["text"])
+    copy = shutil.copy(pdf, tmp_path / "copy.pdf")
+    assert cache.get(str(copy)) == ["text"]
+    write_file(tmp_path / "a.pdf", b"changed content")
+    assert cache.get(pdf) is None
+
+
+def test_no_eviction_below_the_limits(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"), max_entries=3)
+    for name in "abc":
+        cache.put(write_file(tmp_path / f"{name}.pdf", name.encode()), [name])
+    assert rows(cache, "texts") == 3
+    assert rows(cache, "paths") == 3
+
+
+def test_evicts_least_recently_used_with_its_path(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"), max_entries=2)
+    pdfs = [write_file(tmp_path / f"{name}.pdf", name.encode()) for name in "abc"]
+    cache.put(pdfs[0], ["a"])
+    cache.put(pdfs[1], ["b"])
+    # Using a makes b the least recently used
+    assert cache.get(pdfs[0]) == ["a"]
+    cache.put(pdfs[2], ["c"])
+    assert rows(cache, "texts") == 2
+    assert rows(cache, "paths") == 2
+    assert cache.get(pdfs[1]) is None
+    assert cache.get(pdfs[0]) == ["a"]
+
+
+def test_evicts_entries_past_the_age_limit(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"), max_age_days=1)
+    old, new = (write_file(tmp_path / f"{name}.pdf", name.encode()) for name in ("old", "new"))
+    cache.put(old, ["old"])
+    conn = sqlite3.connect(cache.db_path)
+    conn.execute("UPDATE texts SET accessed_at = accessed_at - 2 * 86400")
+    conn.commit()
+    conn.close()
+    cache.put(new, ["new"])
+    assert rows(cache, "texts") == 1
+    assert cache.get(new) == ["new"]
+
+
+def test_ocr_pages_have_their_own_limits(tmp_path):
+    cache = TextCache(str(tmp_path / "cache"), max_entries=2)
+    cache.put(write_file(tmp_path / "a.pdf", b"a"), ["a"])
+    for number in range(3):
+        cache.put_ocr(f"page-{number}", f"text {number}")
+    assert rows(cache, "texts") == 1
+    assert rows(cache, "ocr_pages") == 2
+    assert cache.get_ocr("page-0") is None
+    assert cache.get_ocr("page-2") == "text 2"